@@ -0,0 +1,104 @@
+"""
+Benchmark: fixed vs adaptive request pacing against a simulated Reddit quota.
+
+The simulated server grants QUOTA requests per WINDOW seconds, reports
+x-ratelimit-remaining / x-ratelimit-reset like Reddit, and answers 429
+once the window's quota is spent. REQUESTS fetches run through
+AsyncRedditScraper._request_async with CONCURRENCY in flight. Time is
+compressed (a 10s window instead of Reddit's 600s), so the AIMD step is
+scaled up to match.
+
+  fixed     - the bucket stays at --rate; 429s still pause it
+  adaptive  - the AdaptivePacer starts at --rate and follows the quota
+
+Usage:
+    python benchmarks/bench_adaptive_pacing.py --requests 150 --rate 1 --quota 50 --window 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from radar.ingest import ratelimit
+from radar.ingest.async_scraper import AsyncRedditScraper
+
+
+class Response:
+    def __init__(self, status_code, headers):
+        self.status_code, self.headers = status_code, headers
+
+    def json(self):
+        return {}
+
+
+class QuotaServer:
+    def __init__(self, quota: int, window: float, latency: float):
+        self.quota, self.window, self.latency = quota, window, latency
+        self.started = time.monotonic()
+        self.used = {}
+        self.throttled = 0
+
+    async def get(self, url, **kwargs):
+        await asyncio.sleep(self.latency)
+        elapsed = time.monotonic() - self.started
+        window = int(elapsed // self.window)
+        used = self.used[window] = self.used.get(window, 0) + 1
+        reset = self.window - elapsed % self.window
+        headers = {"x-ratelimit-remaining": str(max(0, self.quota - used)), "x-ratelimit-reset": f"{reset:.1f}"}
+        if used > self.quota:
+            self.throttled += 1
+            return Response(429, headers)
+        return Response(200, headers)
+
+
+async def run(mode: str, args) -> dict:
+    ratelimit._buckets.clear()
+    ratelimit._pacers.clear()
+    server = QuotaServer(args.quota, args.window, latency=0.05)
+    scraper = AsyncRedditScraper(concurrency=args.concurrency, rate=args.rate, burst=args.burst)
+    scraper.max_retries = 10
+    pacer = scraper._pacer("https://www.reddit.com/")
+    pacer.step = args.step
+    if mode == "fixed":
+        pacer.min_rate = pacer.max_rate = args.rate
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def fetch(i):
+        async with semaphore:
+            return await scraper._request_async(server, f"https://www.reddit.com/r/bench/comments/{i}/.json")
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(fetch(i) for i in range(args.requests)))
+    elapsed = time.monotonic() - started
+    return {
+        "mode": mode,
+        "ok": sum(r is not None for r in results),
+        "elapsed_s": round(elapsed, 1),
+        "req_per_s": round(args.requests / elapsed, 2),
+        "429s": server.throttled,
+        "final_rate": round(pacer.bucket.rate, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=150)
+    parser.add_argument("--rate", type=float, default=1.0)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--quota", type=int, default=50)
+    parser.add_argument("--window", type=float, default=10.0)
+    parser.add_argument("--step", type=float, default=0.5)
+    parser.add_argument("--modes", default="fixed,adaptive")
+    args = parser.parse_args()
+
+    for mode in args.modes.split(","):
+        print(asyncio.run(run(mode, args)))
+
+
+if __name__ == "__main__":
+    main()
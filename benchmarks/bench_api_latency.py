@@ -0,0 +1,185 @@
+"""
+Load test: /health latency while /api/threads is under load.
+
+Seeds a throwaway database with one tenant's analyzed leads and starts the
+API under uvicorn in a child process. The client then measures /health
+latency (p50/p99) on an idle server and again while CONCURRENCY clients
+hammer /api/threads.
+
+  async     - handlers await radar.storage.aio.run_db (current behaviour)
+  blocking  - run_db replaced by a direct call on the event loop (old behaviour)
+
+--query-latency-ms adds a sleep inside get_lead_threads to stand in for a
+query that waits on disk, network (Postgres) or locks; the local indexed
+query alone takes well under a millisecond. Keep CONCURRENCY modest on
+small machines: once the CPU is saturated every request slows down
+regardless of how the handlers are written.
+
+Usage:
+    python benchmarks/bench_api_latency.py --posts 20000 --concurrency 16 --query-latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import httpx
+
+USER, PRODUCT = "bench_user", "bench_product"
+
+
+def seed(posts: int):
+    import radar.storage.db as db
+    db.init_db()
+    db.save_posts_bulk([{
+        'id': f"t3_lat{i}", 'platform': 'reddit', 'source': 'bench',
+        'title': f"Latency thread {i}", 'body': "lorem ipsum " * 60,
+        'score': i % 100, 'num_comments': i % 30,
+    } for i in range(posts)])
+    with db.write_connection() as conn:
+        conn.executemany(db._ANALYSIS_UPSERT_SQL, [
+            db._analysis_params(f"t3_lat{i}", PRODUCT, USER, {
+                'relevance_score': (i % 997) / 10 + 0.1, 'semantic_similarity': 0.4,
+                'community_score': 0.2, 'signals_json': '{"intents": []}',
+            }) for i in range(posts)
+        ])
+    db.close_all_connections()
+
+
+def serve(port: int, mode: str, query_latency_ms: float):
+    """Child process: run the API with auth stubbed out (and run_db inlined for 'blocking')."""
+    import uvicorn
+    import radar.api.main as api
+    import radar.storage.db as db
+
+    if query_latency_ms:
+        real_get_lead_threads = db.get_lead_threads
+
+        def slow_get_lead_threads(*args, **kwargs):
+            time.sleep(query_latency_ms / 1000)
+            return real_get_lead_threads(*args, **kwargs)
+        db.get_lead_threads = slow_get_lead_threads
+
+    if mode == "blocking":
+        async def blocking_run_db(fn, *args, lane="db", **kwargs):
+            return fn(*args, **kwargs)
+        api.run_db = blocking_run_db
+    api.app.dependency_overrides[api.get_current_user] = lambda: USER
+    uvicorn.run(api.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def measure_health(client, samples: int):
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def hammer_threads(client, stop: asyncio.Event, limit: int, counter: list):
+    while not stop.is_set():
+        response = await client.get(f"/api/threads?product={PRODUCT}&limit={limit}")
+        response.raise_for_status()
+        counter[0] += 1
+
+
+async def run_load(base_url: str, concurrency: int, samples: int, limit: int):
+    limits = httpx.Limits(max_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        idle = await measure_health(client, samples)
+
+        stop = asyncio.Event()
+        served = [0]
+        started = time.perf_counter()
+        load = [asyncio.create_task(hammer_threads(client, stop, limit, served)) for _ in range(concurrency)]
+        await asyncio.sleep(0.5)
+        loaded = await measure_health(client, samples)
+        stop.set()
+        await asyncio.gather(*load)
+        elapsed = time.perf_counter() - started
+    return idle, loaded, served[0] / elapsed
+
+
+def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=50, help="rows per /api/threads request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--query-latency-ms", type=float, default=50.0, help="simulated wait inside each threads query")
+    parser.add_argument("--samples", type=int, default=200, help="/health requests per phase")
+    parser.add_argument("--modes", nargs="+", default=["blocking", "async"], choices=["blocking", "async"])
+    parser.add_argument("--serve", choices=["blocking", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.serve, args.query_latency_ms)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="radar_bench_")
+    env = dict(os.environ, DATABASE_PATH=os.path.join(workdir, "bench.db"))
+    os.environ["DATABASE_PATH"] = env["DATABASE_PATH"]
+    try:
+        seed(args.posts)
+        print(f"{args.posts} leads, limit={args.limit}, {args.concurrency} concurrent /api/threads clients, "
+              f"+{args.query_latency_ms:g}ms per threads query")
+        print(f"{'mode':<10}{'idle p50':>10}{'idle p99':>10}{'load p50':>10}{'load p99':>10}{'threads/s':>11}")
+        for mode in args.modes:
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+                 "--query-latency-ms", str(args.query_latency_ms)],
+                env=env, cwd=ROOT,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                wait_until_up(base_url)
+                idle, loaded, throughput = asyncio.run(run_load(base_url, args.concurrency, args.samples, args.limit))
+            finally:
+                server.terminate()
+                server.wait()
+            ms = lambda seconds: f"{seconds * 1000:.1f}ms"
+            print(f"{mode:<10}{ms(statistics.median(idle)):>10}{ms(percentile(idle, 99)):>10}"
+                  f"{ms(statistics.median(loaded)):>10}{ms(percentile(loaded, 99)):>10}{throughput:>11.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
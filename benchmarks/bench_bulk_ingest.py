@@ -0,0 +1,101 @@
+"""
+Benchmark: per-row vs bulk comment ingestion.
+
+Loads a synthetic comment corpus into a throwaway database three ways:
+  legacy   - new connection + PRAGMA + commit per row (pre-pool behaviour)
+  per_row  - save_comment() per row on the pooled writer connection
+  bulk     - save_comments_bulk() once per thread (one transaction each)
+
+Usage:
+    python benchmarks/bench_bulk_ingest.py --comments 100000 --thread-size 300
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import radar.storage.db as db
+
+
+def synthetic_threads(total_comments: int, thread_size: int):
+    """Yield (post, comments) tuples until total_comments have been produced."""
+    produced = 0
+    thread_no = 0
+    while produced < total_comments:
+        post_id = f"t3_bench{thread_no}"
+        post = {
+            'id': post_id, 'platform': 'reddit', 'source': 'bench',
+            'title': f"Benchmark thread {thread_no}", 'body': "lorem ipsum " * 40,
+            'score': thread_no % 50, 'num_comments': thread_size, 'ingestion_method': 'bench',
+        }
+        count = min(thread_size, total_comments - produced)
+        comments = [{
+            'id': f"t1_bench{thread_no}_{i}", 'post_id': post_id,
+            'body': f"comment {i} " + "dolor sit amet " * 12, 'author': f"user{i % 97}",
+            'score': i % 20, 'created_at': "2026-01-01T00:00:00", 'depth': i % 4,
+        } for i in range(count)]
+        produced += count
+        thread_no += 1
+        yield post, comments
+
+
+def legacy_save_comment(comment):
+    """The original helper: open, configure, write, commit, close."""
+    conn = sqlite3.connect(db.DATABASE_PATH, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute(db._COMMENT_UPSERT_SQL, db._comment_params(comment))
+    conn.commit()
+    conn.close()
+
+
+def run(mode: str, total_comments: int, thread_size: int) -> float:
+    workdir = tempfile.mkdtemp(prefix="radar_bench_")
+    db.DATABASE_PATH = os.path.join(workdir, "bench.db")
+    db.close_all_connections()
+    db.init_db()
+    try:
+        start = time.perf_counter()
+        for post, comments in synthetic_threads(total_comments, thread_size):
+            db.save_post(post)
+            if mode == "legacy":
+                for c in comments:
+                    legacy_save_comment(c)
+            elif mode == "per_row":
+                for c in comments:
+                    db.save_comment(c)
+            else:
+                db.save_comments_bulk(comments)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close_all_connections()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return total_comments / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--thread-size", type=int, default=300)
+    parser.add_argument("--modes", default="legacy,per_row,bulk")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes.split(","):
+        rate = run(mode, args.comments, args.thread_size)
+        results[mode] = rate
+        print(f"{mode:>8}: {rate:>12,.0f} comments/sec")
+
+    if "bulk" in results:
+        for mode, rate in results.items():
+            if mode != "bulk":
+                print(f"bulk vs {mode}: {results['bulk'] / rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: deterministic ingest by replaying a response archive.
+
+Builds a seeded synthetic archive (PAGES listing pages of 100 posts, each
+with a comment thread of up to COMMENTS comments) with ResponseArchive,
+then replays it into a fresh SQLite database through the scraper's own
+parsing and storage path. Same seed, same input: runs are comparable
+across storage changes without touching Reddit.
+
+Usage:
+    python benchmarks/bench_replay_ingest.py --pages 20 --comments 40
+    python benchmarks/bench_replay_ingest.py --archive data/responses/2026-10-18
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import radar.storage.db as db
+from radar.ingest.archive import ResponseArchive, archive_files, replay_archive
+
+WORDS = ("scheduling tool pricing alternative slow export team invoice api support calendar "
+         "integration churn onboarding dashboard workflow bug feature spreadsheet crm").split()
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def build_archive(root: str, pages: int, comments: int, seed: int):
+    rng = random.Random(seed)
+    archive = ResponseArchive(root)
+    created = 1_760_000_000
+    for page in range(pages):
+        children = []
+        for i in range(100):
+            n = page * 100 + i
+            children.append({'data': {
+                'name': f"t3_bench{n}", 'title': _text(rng, 8), 'selftext': _text(rng, rng.randint(10, 120)),
+                'permalink': f"/r/bench/comments/bench{n}/", 'author': f"u{rng.randint(0, 500)}",
+                'score': rng.randint(0, 300), 'num_comments': rng.randint(0, comments), 'created_utc': created - n * 60,
+            }})
+        archive.record(f"https://www.reddit.com/r/bench/new/.json?limit=100&page={page}",
+                       {'data': {'children': children, 'after': f"t3_bench{page * 100 + 99}"}})
+        for child in children:
+            post = child['data']
+            thread = [{'kind': 't1', 'data': {
+                'name': f"t1_{post['name']}_{c}", 'body': _text(rng, rng.randint(5, 60)), 'author': f"u{rng.randint(0, 500)}",
+                'score': rng.randint(-5, 50), 'created_utc': post['created_utc'] + c,
+            }} for c in range(post['num_comments'])]
+            archive.record(f"https://www.reddit.com/r/bench/comments/{post['name'][3:]}/.json",
+                           [{'data': {'children': [{'data': {'num_comments': post['num_comments']}}]}},
+                            {'data': {'children': thread}}])
+    archive.flush()
+    return archive.records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--comments", type=int, default=40, help="max comments per thread")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--archive", help="replay this archive instead of a synthetic one")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="radar_bench_")
+    db.DATABASE_PATH = os.path.join(workdir, "bench.db")
+    db.close_all_connections()
+    db._initialized_paths.clear()
+    try:
+        archive = args.archive
+        if not archive:
+            archive = os.path.join(workdir, "responses")
+            records = build_archive(archive, args.pages, args.comments, args.seed)
+            size = sum(os.path.getsize(f) for f in archive_files(archive))
+            print(f"archive: {records} responses, {size / 1e6:.1f} MB compressed")
+        db.init_db()
+        stats = replay_archive(archive)
+        db.flush_writes()
+        print(f"replay: {stats['records']} responses ({stats['listings']} listings, {stats['threads']} threads) "
+              f"-> {stats['posts']} posts, {stats['comments']} comments in {stats['elapsed_s']}s "
+              f"({stats['records_per_s']} responses/s)")
+    finally:
+        db.close_all_connections()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark: plain vs zstd-compressed post/comment bodies.
+
+Loads the same synthetic Reddit-like corpus into a throwaway database per
+mode, then reports the database size, the read connection's page-cache hit
+ratio and the latency of a `radar process` batch (iter_unprocessed_posts +
+get_comments_bulk + build_unified_context, no model calls):
+
+  plain  - TEXT_COMPRESSION=none
+  zstd   - TEXT_COMPRESSION=zstd, no dictionary
+  dict   - TEXT_COMPRESSION=zstd with a dictionary trained on the corpus
+           (`radar db train-dictionary --recompress`)
+
+The cache hit ratio comes from sqlite3_db_status(CACHE_HIT/CACHE_MISS) via
+ctypes and is reported as n/a where the sqlite3 module does not link the
+system libsqlite3. Shrink --cache-kib (or grow the corpus) to see the
+working set stop fitting in the page cache.
+
+Usage:
+    python benchmarks/bench_text_compression.py --posts 3000 --comments-per-post 15 --cache-kib 2048 [--skip-context]
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import radar.storage.db as db
+from radar.storage import compression
+from radar.process.truncation import build_unified_context
+
+SQLITE_DBSTATUS_CACHE_HIT = 7
+SQLITE_DBSTATUS_CACHE_MISS = 8
+
+_WORDS = ("schedule posting tiktok instagram reels invoice invoicing spreadsheet buffer hootsuite pricing "
+          "freelance clients workflow automation zapier agency recommendations team budget months tried "
+          "anyone else struggling with manual process hours every week looking tool alternative cheaper "
+          "features integration export report dashboard customers support").split()
+_OPENERS = ("Has anyone found a good way to", "I've been struggling to", "Looking for recommendations to",
+            "Is there a tool that can", "Our team spends hours trying to")
+_CLOSERS = ("Any advice appreciated!", "Thanks in advance.", "Open to paid options.", "Edit: thanks everyone!")
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+
+def synthetic_corpus(posts: int, comments_per_post: int, seed: int = 42):
+    """Yield (post, comments) pairs of templated, vocabulary-heavy text."""
+    rng = random.Random(seed)
+    for n in range(posts):
+        post_id = f"t3_zb{n}"
+        body = " ".join([rng.choice(_OPENERS)] + [_sentence(rng) for _ in range(rng.randint(4, 12))] + [rng.choice(_CLOSERS)])
+        post = {
+            'id': post_id, 'platform': 'reddit', 'source': f"bench{n % 5}",
+            'title': _sentence(rng), 'body': body, 'author': f"user{n % 211}",
+            'score': n % 50, 'num_comments': comments_per_post, 'created_at': "2026-01-01T00:00:00",
+        }
+        comments = [{
+            'id': f"t1_zb{n}_{i}", 'post_id': post_id,
+            'body': " ".join(_sentence(rng) for _ in range(rng.randint(1, 4))),
+            'author': f"user{(n + i) % 97}", 'score': i % 20, 'created_at': "2026-01-01T00:00:00",
+        } for i in range(comments_per_post)]
+        yield post, comments
+
+
+def _sqlite_library():
+    """The libsqlite3 the sqlite3 module uses, or None when it cannot be reached through ctypes."""
+    name = ctypes.util.find_library("sqlite3")
+    if not name:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+    except OSError:
+        return None
+    lib.sqlite3_libversion.restype = ctypes.c_char_p
+    if lib.sqlite3_libversion().decode() != sqlite3.sqlite_version:
+        return None
+    lib.sqlite3_db_status.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int),
+                                      ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+    return lib
+
+
+def _db_status(lib, conn: sqlite3.Connection, op: int, reset: bool = False) -> int:
+    # CPython's connection object stores its sqlite3* right after the object header
+    handle = ctypes.c_void_p.from_address(id(conn) + object.__basicsize__).value
+    current, highwater = ctypes.c_int(), ctypes.c_int()
+    lib.sqlite3_db_status(handle, op, ctypes.byref(current), ctypes.byref(highwater), int(reset))
+    return current.value
+
+
+def _database_bytes(path: str) -> int:
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def run(mode: str, posts: int, comments_per_post: int, batch: int, cache_kib: int, lib, context: bool = True) -> dict:
+    workdir = tempfile.mkdtemp(prefix="radar_bench_")
+    db.DATABASE_PATH = os.path.join(workdir, "bench.db")
+    db.close_all_connections()
+    db.init_db()
+    compression.TEXT_COMPRESSION = "zstd" if mode == "zstd" else "none"
+    try:
+        for post, comments in synthetic_corpus(posts, comments_per_post):
+            db.save_posts_bulk([post])
+            db.save_comments_bulk(comments)
+        if mode == "dict":
+            compression.TEXT_COMPRESSION = "zstd"
+            db.train_text_dictionary()
+            db.recompress_text()
+        with db.write_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with db.write_connection() as conn:
+            conn.execute("VACUUM")
+        size = _database_bytes(db.DATABASE_PATH)
+
+        # One read connection serves the whole run (single thread, LIFO pool)
+        with db.read_connection() as conn:
+            conn.execute(f"PRAGMA cache_size=-{cache_kib}")
+            if lib:
+                _db_status(lib, conn, SQLITE_DBSTATUS_CACHE_HIT, reset=True)
+                _db_status(lib, conn, SQLITE_DBSTATUS_CACHE_MISS, reset=True)
+
+        latencies = []
+        batches = db.iter_unprocessed_posts(batch_size=batch, force=True)
+        while True:
+            start = time.perf_counter()
+            current = next(batches, None)
+            if not current:
+                break
+            comments_by_post = db.get_comments_bulk([p['id'] for p in current])
+            for p in current:
+                if context:
+                    build_unified_context(p, comments_by_post.get(p['id'], []))
+            latencies.append(time.perf_counter() - start)
+
+        hit_ratio = None
+        if lib:
+            with db.read_connection() as conn:
+                hits = _db_status(lib, conn, SQLITE_DBSTATUS_CACHE_HIT)
+                misses = _db_status(lib, conn, SQLITE_DBSTATUS_CACHE_MISS)
+            hit_ratio = hits / (hits + misses) if hits + misses else None
+    finally:
+        db.close_all_connections()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'size': size,
+        'hit_ratio': hit_ratio,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': sorted(latencies)[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=3000)
+    parser.add_argument("--comments-per-post", type=int, default=15)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--cache-kib", type=int, default=2048)
+    parser.add_argument("--modes", default="plain,zstd,dict")
+    parser.add_argument("--skip-context", action="store_true",
+                        help="Leave out build_unified_context (tiktoken downloads its encodings on first use).")
+    args = parser.parse_args()
+
+    lib = _sqlite_library()
+    results = {}
+    print(f"{'mode':>6} {'db size':>12} {'cache hit':>10} {'batch p50':>10} {'batch p99':>10}")
+    for mode in args.modes.split(","):
+        r = run(mode, args.posts, args.comments_per_post, args.batch, args.cache_kib, lib, not args.skip_context)
+        results[mode] = r
+        hit = f"{r['hit_ratio']:.1%}" if r['hit_ratio'] is not None else "n/a"
+        print(f"{mode:>6} {r['size'] / 1e6:>10.1f}MB {hit:>10} {r['p50_ms']:>8.1f}ms {r['p99_ms']:>8.1f}ms")
+
+    if "plain" in results:
+        for mode, r in results.items():
+            if mode != "plain":
+                print(f"{mode} vs plain: {r['size'] / results['plain']['size']:.0%} of the size, "
+                      f"{r['p50_ms'] / results['plain']['p50_ms']:.2f}x batch p50")
+
+
+if __name__ == "__main__":
+    main()
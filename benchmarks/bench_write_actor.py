@@ -0,0 +1,95 @@
+"""
+Benchmark: concurrent small writes with and without the writer actor.
+
+THREADS workers each issue WRITES single-row writes through the public
+helpers (update_post_stats, then update_triage_status every 10th write),
+the shape of scraper + processor + API traffic hitting SQLite at once.
+
+  direct  - DB_WRITE_BATCHING off: each call is its own transaction on the
+            caller's writer connection, contending for the write lock
+  actor   - calls are queued to the single writer thread and group-committed
+
+Usage:
+    python benchmarks/bench_write_actor.py --threads 16 --writes 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import radar.storage.db as db
+
+
+def seed(posts: int):
+    db.init_db()
+    db.save_posts_bulk([{
+        'id': f"t3_w{i}", 'platform': 'reddit', 'source': 'bench', 'title': f"Write {i}",
+        'score': 0, 'num_comments': 0,
+    } for i in range(posts)])
+    for i in range(posts):
+        db.save_analysis(f"t3_w{i}", "bench_product", "bench_user", {'relevance_score': 5.0})
+
+
+def worker(thread_no: int, writes: int, posts: int, errors: list):
+    try:
+        for i in range(writes):
+            post_id = f"t3_w{(thread_no * writes + i) % posts}"
+            if i % 10 == 9:
+                db.update_triage_status("bench_user", "bench_product", post_id, "agree")
+            else:
+                db.update_post_stats(post_id, i, thread_no)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        db.close_thread_connection()
+
+
+def run(mode: str, threads: int, writes: int, posts: int):
+    workdir = tempfile.mkdtemp(prefix="radar_bench_")
+    db.DATABASE_PATH = os.path.join(workdir, "bench.db")
+    db.DB_WRITE_BATCHING = mode == "actor"
+    db.close_all_connections()
+    db._initialized_paths.clear()
+    try:
+        seed(posts)
+        errors = []
+        workers = [threading.Thread(target=worker, args=(n, writes, posts, errors)) for n in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        db.flush_writes()
+        elapsed = time.perf_counter() - start
+        writer = db.get_pool_stats().get("writer", {})
+        return elapsed, errors, writer
+    finally:
+        db.close_all_connections()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=500, help="writes per thread")
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--modes", nargs="+", default=["direct", "actor"], choices=["direct", "actor"])
+    args = parser.parse_args()
+
+    total = args.threads * args.writes
+    print(f"{args.threads} threads x {args.writes} writes = {total} writes")
+    for mode in args.modes:
+        elapsed, errors, writer = run(mode, args.threads, args.writes, args.posts)
+        line = f"{mode:<8}{elapsed:8.2f}s {total / elapsed:10.0f} writes/s  errors={len(errors)}"
+        if writer:
+            line += f"  batches={writer['batches']} avg_batch={writer['avg_batch']}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,14 @@
-import sqlite3
-
-DB_PATH = "data/radar.db"
+from radar.storage.db import search_posts
 
 def find_by_body():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
     snippet = "sadly doesnt make it easy"
     print(f"\nSearching for body snippet: '{snippet}'")
-    cursor.execute("SELECT id, title FROM posts WHERE body LIKE ?", (f"%{snippet}%",))
-    row = cursor.fetchone()
-    if row:
-        print(f"FOUND! ID: {row['id']} | Title: {row['title']}")
+    # Quoted so FTS matches the words as a phrase, in title or body
+    hits = search_posts(f'"{snippet}"', include_comments=False, limit=1)
+    if hits:
+        print(f"FOUND! ID: {hits[0]['id']} | Title: {hits[0]['title']}")
     else:
-        print("Not found in body. Searching in titles...")
-        cursor.execute("SELECT id, title FROM posts WHERE title LIKE ?", (f"%{snippet}%",))
-        row = cursor.fetchone()
-        if row:
-            print(f"FOUND! ID: {row['id']} | Title: {row['title']}")
-        else:
-            print("Still not found.")
-            
-    conn.close()
+        print("Still not found.")
 
 if __name__ == "__main__":
     find_by_body()
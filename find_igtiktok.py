@@ -1,20 +1,10 @@
-import sqlite3
-
-DB_PATH = "data/radar.db"
+from radar.storage.db import search_posts
 
 def find_specific_leadbody():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
     # Looking for 'IG/TIKTOK' mentions
     print("\n--- Searching for 'IG/TIKTOK' mentions ---")
-    cursor.execute("SELECT id, title, body FROM posts WHERE body LIKE '%TIKTOK%' OR title LIKE '%TIKTOK%'")
-    rows = cursor.fetchall()
-    for row in rows:
+    for row in search_posts("TIKTOK", include_comments=False, limit=500):
         print(f"ID: {row['id']} | Title: {row['title']}")
-            
-    conn.close()
 
 if __name__ == "__main__":
     find_specific_leadbody()
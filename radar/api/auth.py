@@ -135,3 +135,11 @@ async def get_optional_user(request: Request) -> str | None:
         return payload.get("sub")
     except:
         return None
+
+
+async def require_admin(user_id: str = Depends(get_current_user)) -> str:
+    """FastAPI dependency for /api/admin/* routes: the user must be listed in ADMIN_USER_IDS."""
+    from radar.config import ADMIN_USER_IDS
+    if user_id not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user_id
@@ -1,14 +1,16 @@
 from fastapi import FastAPI, BackgroundTasks, Query, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional, Any
 from pydantic import BaseModel
 from radar.models.response import GenerateResponseRequest, FeedbackRequest
 from radar.services.response_service import ResponseGenerator
-from radar.api.auth import get_current_user, get_optional_user
+from radar.api.auth import get_current_user, get_optional_user, require_admin
 import os
 import json
-from radar.storage.db import get_connection
+from radar.storage.db import ping
+from radar.storage.aio import run_db, get_executor_stats, shutdown_executors
 from radar.products import PRODUCTS
 from radar.config import SUBREDDITS
 from radar.ingest.reddit_scraper import RedditScraper
@@ -40,7 +42,11 @@ if RATE_LIMITING_ENABLED:
 @app.on_event("startup")
 async def startup_event():
     from radar.storage.db import init_db
-    init_db()
+    await run_db(init_db)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors(wait=False)
     
 
 # Enable CORS for the React frontend
@@ -54,7 +60,7 @@ app.add_middleware(
 @app.get("/api/config")
 async def get_config(user_id: str = Depends(get_current_user)):
     from radar.storage.db import get_products
-    products = get_products(user_id)
+    products = await run_db(get_products, user_id)
     
     # Extract unique subreddits from user's products
     all_subs = set()
@@ -70,35 +76,28 @@ async def get_config(user_id: str = Depends(get_current_user)):
         "subreddits": sorted(list(all_subs))
     }
 
+def _epoch_param(value: Optional[str], name: str) -> Optional[int]:
+    """Query-string time (epoch seconds or ISO-8601) as epoch seconds; 400 if unparseable."""
+    from radar.storage.codecs import to_epoch
+    try:
+        return to_epoch(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected epoch seconds or ISO-8601")
+
 @app.get("/api/threads")
-async def get_threads(user_id: str = Depends(get_current_user), product: str = None, limit: int = 50):
-    conn = get_connection()
-    conn.row_factory = lambda cursor, row: dict(zip([col[0] for col in cursor.description], row))
-    cursor = conn.cursor()
-    
-    # Filter by user_id to only show user's analysis
-    cursor.execute("""
-        SELECT p.*, pa.relevance_score, pa.semantic_similarity, pa.community_score, pa.ai_analysis, pa.signals_json, 
-               pa.triage_status, pa.triage_relevance_snapshot,
-               CASE 
-                 WHEN pa.triage_status IS NOT NULL 
-                      AND ABS(pa.relevance_score - IFNULL(pa.triage_relevance_snapshot, 0)) > 1.0 
-                 THEN 1 ELSE 0 
-               END as is_stale,
-               r.id as res_id, r.response_text as res_text, r.style as res_style, r.tokens_used as res_tokens
-        FROM posts p
-        JOIN post_analysis pa ON p.id = pa.post_id
-        LEFT JOIN (
-            SELECT id, post_id, product_id, user_id, response_text, style, tokens_used,
-                   row_number() OVER (PARTITION BY post_id, product_id, user_id ORDER BY created_at DESC) as rn
-            FROM generated_responses
-            WHERE user_id = ?
-        ) r ON p.id = r.post_id AND pa.product_id = r.product_id AND r.rn = 1
-        WHERE pa.product_id = ? AND pa.user_id = ? AND pa.relevance_score > 0 
-        ORDER BY pa.relevance_score DESC 
-        LIMIT ?
-    """, (user_id, product, user_id, limit))
-    rows = cursor.fetchall()
+async def get_threads(
+    user_id: str = Depends(get_current_user),
+    product: str = None,
+    limit: int = 50,
+    intent: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    from radar.storage.db import get_lead_threads
+    rows = await run_db(
+        get_lead_threads, user_id, product, limit, intent=intent,
+        since=_epoch_param(since, "since"), until=_epoch_param(until, "until")
+    )
     
     threads = []
     for row in rows:
@@ -112,7 +111,6 @@ async def get_threads(user_id: str = Depends(get_current_user), product: str = N
             }
         threads.append(thread)
         
-    conn.close()
     return threads
 
 @app.post("/api/threads/{post_id}/triage")
@@ -126,7 +124,7 @@ async def triage_thread(
     from radar.storage.db import update_triage_status
     # Map 'null' string to None for DB
     db_status = None if status == "null" else status
-    update_triage_status(user_id, product_id, post_id, db_status)
+    await run_db(update_triage_status, user_id, product_id, post_id, db_status)
     return {"status": "success", "triage": status}
 
 @app.get("/api/sync/status")
@@ -142,9 +140,10 @@ async def get_sync_status(user_id: Optional[str] = Depends(get_optional_user)):
         }
         
     from radar.storage.db import get_sync_history, update_sync_run_status
-    from datetime import datetime, timedelta
+    from datetime import datetime, timedelta, timezone
+    import time
     
-    history = get_sync_history(user_id, limit=1)
+    history = await run_db(get_sync_history, user_id, limit=1)
     if not history:
         return {"is_running": False, "current_step": "Idle", "progress": 0}
     
@@ -155,13 +154,14 @@ async def get_sync_status(user_id: Optional[str] = Depends(get_optional_user)):
     # STUCK SYNC DETECTION: If running for more than 15 minutes, consider it stuck
     if is_running:
         try:
-            # Parse timestamp and check if it's older than 15 minutes
-            sync_time = datetime.fromisoformat(latest['timestamp'].replace('Z', '+00:00'))
-            now = datetime.now(sync_time.tzinfo) if sync_time.tzinfo else datetime.now()
+            # Check if it started more than 15 minutes ago (legacy rows: parse the UTC timestamp text)
+            started = latest.get('started_utc')
+            if started is None:
+                started = datetime.fromisoformat(latest['timestamp']).replace(tzinfo=timezone.utc).timestamp()
             
-            if now - sync_time > timedelta(minutes=15):
+            if time.time() - started > timedelta(minutes=15).total_seconds():
                 # Mark as timed out
-                update_sync_run_status(latest['id'], "Error: Sync timed out", 0)
+                await run_db(update_sync_run_status, latest['id'], "Error: Sync timed out", 0)
                 return {
                     "is_running": False,
                     "current_step": "Sync timed out - try again",
@@ -182,12 +182,23 @@ async def get_sync_status(user_id: Optional[str] = Depends(get_optional_user)):
 @app.get("/api/threads/{post_id}/comments")
 async def get_post_comments(post_id: str):
     from radar.storage.db import get_comments
-    return get_comments(post_id)
+    return await run_db(get_comments, post_id)
+
+@app.get("/api/search")
+async def search_posts_api(
+    q: str = Query(..., min_length=1),
+    subreddit: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user)
+):
+    from radar.storage.db import search_posts
+    return await run_db(search_posts, q, subreddit=subreddit, since=_epoch_param(since, "since"), limit=limit)
 
 @app.get("/api/sync/history")
 async def get_sync_history_api(user_id: str = Depends(get_current_user), limit: int = 10):
     from radar.storage.db import get_sync_history
-    return get_sync_history(user_id, limit)
+    return await run_db(get_sync_history, user_id, limit)
 
 @app.post("/api/sync")
 async def sync_data(
@@ -199,25 +210,25 @@ async def sync_data(
     product: Optional[str] = None
 ):
     from radar.storage.db import add_sync_run, update_sync_run_status, get_sync_history
-    from radar.ingest.reddit_scraper import RedditScraper
+    from radar.ingest.reddit_scraper import create_scraper
     from radar.cli import process as cli_process
     from datetime import datetime
 
     # Check if this specific user has a run in progress
-    history = get_sync_history(user_id, limit=1)
+    history = await run_db(get_sync_history, user_id, limit=1)
     if history:
         status = history[0]['status']
         is_active = status != 'Success' and not status.startswith('Error')
         if is_active:
             return {"error": "Sync already in progress for your account", "status": history[0]}
 
-    run_id = add_sync_run(user_id, product or "all", subreddits, days)
+    run_id = await run_db(add_sync_run, user_id, product or "all", subreddits, days)
 
     def run_sync():
         try:
             update_sync_run_status(run_id, "Ingesting", 10)
             
-            scraper_tool = RedditScraper(user_id=user_id)
+            scraper_tool = create_scraper(user_id=user_id)
             for i, sub in enumerate(subreddits):
                 progress = 10 + int((i / len(subreddits)) * 40)
                 update_sync_run_status(run_id, f"Ingesting r/{sub}...", progress)
@@ -236,19 +247,20 @@ async def sync_data(
             # No global variable to reset!
             pass
 
-    update_sync_run_status(run_id, "Initializing...", 5)
+    await run_db(update_sync_run_status, run_id, "Initializing...", 5)
+    # run_sync is a plain function, so Starlette runs it on its own thread pool
     background_tasks.add_task(run_sync)
     return {"status": "Sync started", "run_id": run_id}
 
 @app.get("/api/products")
 async def list_products_api(user_id: str = Depends(get_current_user)):
     from radar.storage.db import get_products
-    return get_products(user_id)
+    return await run_db(get_products, user_id)
 
 @app.get("/api/products/{product_id}")
 async def get_product_api(product_id: str, user_id: str = Depends(get_current_user)):
     from radar.storage.db import get_product
-    product = get_product(product_id, user_id)
+    product = await run_db(get_product, product_id, user_id)
     if not product:
         return {"error": "Product not found"}
     return product
@@ -261,26 +273,26 @@ async def create_product_api(product_data: dict, user_id: str = Depends(get_curr
         product_data['id'] = product_data['name'].lower().replace(" ", "")
     
     product_data['user_id'] = user_id
-    upsert_product(product_data)
+    await run_db(upsert_product, product_data)
     return {"id": product_data['id'], "status": "saved"}
 
 @app.put("/api/products/{product_id}")
 async def update_product_api(product_id: str, product_data: dict, user_id: str = Depends(get_current_user)):
     from radar.services.product_service import upsert_product
     from radar.storage.db import get_product
-    existing = get_product(product_id, user_id)
+    existing = await run_db(get_product, product_id, user_id)
     if not existing:
         return {"error": "Product not found"}
     
     product_data['id'] = product_id
     product_data['user_id'] = user_id
-    upsert_product(product_data)
+    await run_db(upsert_product, product_data)
     return {"id": product_id, "status": "updated"}
 
 @app.delete("/api/products/{product_id}")
 async def delete_product_api(product_id: str, user_id: str = Depends(get_current_user)):
     from radar.storage.db import delete_product
-    delete_product(product_id, user_id)
+    await run_db(delete_product, product_id, user_id)
     return {"status": "deleted"}
 
 @app.get("/api/reports/download/{filename}")
@@ -303,7 +315,8 @@ async def list_reports():
 async def generate_response_api(post_id: str, request: GenerateResponseRequest, user_id: str = Depends(get_current_user)):
     generator = ResponseGenerator()
     try:
-        result = generator.generate_response(user_id, post_id, request.product_id, request.style)
+        # OpenAI round-trip: keep it off both the event loop and the storage lanes
+        result = await run_in_threadpool(generator.generate_response, user_id, post_id, request.product_id, request.style)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -313,18 +326,18 @@ async def generate_response_api(post_id: str, request: GenerateResponseRequest,
 @app.get("/api/responses/history/{post_id}")
 async def get_response_history_api(post_id: str, product_id: str, user_id: str = Depends(get_current_user), limit: int = 5):
     from radar.storage.db import get_generated_responses
-    return get_generated_responses(user_id, post_id, product_id, limit)
+    return await run_db(get_generated_responses, user_id, post_id, product_id, limit)
 
 @app.post("/api/responses/{response_id}/feedback")
 async def submit_feedback_api(response_id: str, request: FeedbackRequest):
     from radar.storage.db import update_response_feedback
-    update_response_feedback(response_id, request.feedback)
+    await run_db(update_response_feedback, response_id, request.feedback)
     return {"status": "ok"}
 
 @app.get("/api/settings/{key}")
 async def get_setting_api(key: str, user_id: str = Depends(get_current_user)):
     from radar.storage.db import get_user_setting
-    return {"key": key, "value": get_user_setting(user_id, key)}
+    return {"key": key, "value": await run_db(get_user_setting, user_id, key)}
 
 class SettingRequest(BaseModel):
     key: str
@@ -333,7 +346,7 @@ class SettingRequest(BaseModel):
 @app.post("/api/settings")
 async def save_setting_api(req: SettingRequest, user_id: str = Depends(get_current_user)):
     from radar.storage.db import save_user_setting
-    save_user_setting(user_id, req.key, req.value)
+    await run_db(save_user_setting, user_id, req.key, req.value)
     return {"status": "ok"}
 
 
@@ -390,12 +403,11 @@ async def suggest_subreddits_api(request: SubredditSuggestionRequest, user_id: s
 async def health_check():
     """Health check endpoint for monitoring."""
     from datetime import datetime
+    from radar.storage.db import get_pool_stats
     
-    # Check database connection
+    # Check database connection (own lane: never queued behind slow API queries)
     try:
-        conn = get_connection()
-        conn.execute("SELECT 1")
-        conn.close()
+        await run_db(ping, lane="health")
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
@@ -403,5 +415,20 @@ async def health_check():
     return {
         "status": "healthy" if db_status == "healthy" else "degraded",
         "database": db_status,
+        "db_pool": get_pool_stats(),
+        "db_executors": get_executor_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
+
+
+@app.get("/api/admin/slow-queries")
+async def slow_queries_api(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total", pattern="^(total|max|avg|count)$"),
+    user_id: str = Depends(require_admin),
+):
+    """Slowest SQLite statements from the slow-query log (SLOW_QUERY_MS), aggregated."""
+    from radar.storage import querylog
+
+    queries = await run_in_threadpool(querylog.top_slow_queries, limit, sort)
+    return {"threshold_ms": querylog.SLOW_QUERY_MS, "enabled": querylog.SLOW_QUERY_MS > 0, "queries": queries}
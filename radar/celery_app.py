@@ -4,6 +4,7 @@ Requires Redis to be running and REDIS_URL environment variable to be set.
 """
 import os
 from celery import Celery
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,7 +17,7 @@ celery_app = Celery(
     "radar",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["radar.tasks.sync_tasks"]
+    include=["radar.tasks.sync_tasks", "radar.tasks.maintenance"]
 )
 
 # Celery configuration
@@ -33,10 +34,14 @@ celery_app.conf.update(
     task_acks_late=True,  # Acknowledge after completion
 )
 
-# Optional: beat schedule for periodic tasks
+# Periodic tasks (run `celery -A radar.celery_app beat` alongside the workers)
 celery_app.conf.beat_schedule = {
-    # Example: 'cleanup-old-data': {
-    #     'task': 'radar.tasks.maintenance.cleanup_old_data',
-    #     'schedule': crontab(hour=3, minute=0),  # Run at 3 AM
-    # },
+    'backup': {
+        'task': 'radar.tasks.maintenance.backup',
+        'schedule': crontab(hour=2, minute=30),  # Before retention deletes anything
+    },
+    'apply-retention': {
+        'task': 'radar.tasks.maintenance.apply_retention',
+        'schedule': crontab(hour=3, minute=0),  # Run at 3 AM UTC
+    },
 }
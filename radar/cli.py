@@ -6,6 +6,8 @@ from radar.storage.vectors import get_or_create_collection
 from radar.config import SUBREDDITS
 
 app = typer.Typer()
+db_app = typer.Typer(help="Database schema and maintenance commands.")
+app.add_typer(db_app, name="db")
 console = Console()
 
 @app.command()
@@ -16,20 +18,110 @@ def init():
     get_or_create_collection()
     console.print("[green]✓ Database and Vector collection initialized.[/green]")
 
+@db_app.command("migrate")
+def db_migrate(dry_run: bool = typer.Option(False, "--dry-run", help="List pending migrations without applying them.")):
+    """Apply pending schema migrations."""
+    from radar.storage.db import migrate_schema
+    
+    current, latest, migrations = migrate_schema(dry_run=dry_run)
+    console.print(f"Schema version: [bold]{current}[/bold] (latest: {latest})")
+    
+    if not migrations:
+        console.print("[green]✓ Database schema is up to date.[/green]")
+        return
+    
+    verb = "Pending" if dry_run else "Applied"
+    for version, description in migrations:
+        console.print(f"  {verb} [cyan]{version:03d}[/cyan] {description}")
+    if dry_run:
+        console.print(f"[yellow]{len(migrations)} migration(s) pending. Run without --dry-run to apply.[/yellow]")
+    else:
+        console.print(f"[green]✓ Applied {len(migrations)} migration(s).[/green]")
+
+@db_app.command("compact-analysis")
+def db_compact_analysis(floor: float = typer.Option(None, "--floor", help="Relevance floor (defaults to ANALYSIS_STORAGE_FLOOR).")):
+    """Move below-floor analysis rows to compact processed markers."""
+    from radar.storage.db import compact_post_analysis
+    
+    moved = compact_post_analysis(floor=floor)
+    console.print(f"[green]✓ Compacted {moved} analysis row(s).[/green]")
+
+@db_app.command("slow-queries")
+def db_slow_queries(
+    limit: int = typer.Option(10, "--limit", help="Statements to show."),
+    sort: str = typer.Option("total", "--sort", help="Order by total, max, avg or count."),
+    plans: bool = typer.Option(False, "--plans", help="Show each statement's query plan."),
+    clear: bool = typer.Option(False, "--clear", help="Empty the log afterwards."),
+):
+    """Show the slowest SQLite statements recorded with SLOW_QUERY_MS set."""
+    from radar.storage import querylog
+
+    if querylog.SLOW_QUERY_MS <= 0:
+        console.print("[yellow]Slow-query logging is off; set SLOW_QUERY_MS to enable it.[/yellow]")
+    queries = querylog.top_slow_queries(limit=limit, sort=sort)
+    if not queries:
+        console.print("[green]No slow queries recorded.[/green]")
+    for q in queries:
+        console.print(f"[cyan]{q['count']}x[/cyan] total {q['total_ms']:.1f}ms, avg {q['avg_ms']:.1f}ms, "
+                      f"max {q['max_ms']:.1f}ms  params {', '.join(q['params'])}")
+        console.print(f"  {q['sql'][:300]}", markup=False)
+        if plans:
+            for line in q['plan']:
+                console.print(f"    {line}", markup=False)
+    if clear:
+        querylog.clear_slow_queries()
+        console.print("[green]✓ Slow-query log cleared.[/green]")
+
+@db_app.command("train-dictionary")
+def db_train_dictionary(
+    samples: int = typer.Option(5000, "--samples", help="Bodies to sample for training."),
+    recompress: bool = typer.Option(False, "--recompress", help="Rewrite stored bodies with the new dictionary."),
+):
+    """Train a zstd dictionary for post/comment bodies (used with TEXT_COMPRESSION=zstd)."""
+    from radar.storage.db import train_text_dictionary, recompress_text
+
+    dict_id = train_text_dictionary(samples=samples)
+    if dict_id is None:
+        console.print("[yellow]Not enough stored text to train a dictionary.[/yellow]")
+        raise typer.Exit(code=1)
+    console.print(f"[green]✓ Trained dictionary {dict_id}.[/green]")
+    if recompress:
+        console.print(f"[green]✓ Rewrote {recompress_text()} body(ies).[/green]")
+
 @app.command()
-def ingest(subreddit: str = None, days: int = 7, scraper: bool = False):
+def ingest(
+    subreddit: str = None,
+    days: Optional[int] = typer.Option(None, help="Days to look back (default 7; a replay keeps every archived post unless set)."),
+    scraper: bool = False,
+    archive: str = typer.Option(None, "--archive", help="Record raw scraper responses under this directory."),
+    replay: str = typer.Option(None, "--replay", help="Ingest a response archive (file, date directory or root) offline."),
+):
     """Ingest posts from subreddits."""
     from radar.ingest.reddit_api import RedditAPI
-    from radar.ingest.reddit_scraper import RedditScraper
+    from radar.ingest.reddit_scraper import create_scraper
     from radar.storage.db import init_db
     
     # Auto-initialize database tables if they don't exist
     init_db()
     
+    if replay:
+        import os
+        from radar.ingest.archive import replay_archive
+        if not os.path.exists(replay):
+            console.print(f"[red]No archive at {replay}.[/red]")
+            raise typer.Exit(code=1)
+        stats = replay_archive(replay, days=days, subreddit=subreddit)
+        console.print(f"[green]✓ Replayed {stats['records']} responses ({stats['listings']} listings, {stats['threads']} threads): "
+                      f"{stats['posts']} posts, {stats['comments']} new comments in {stats['elapsed_s']}s.[/green]")
+        return
+    
     subs = [subreddit] if subreddit else SUBREDDITS.keys()
     
     if scraper:
-        client = RedditScraper()
+        client = create_scraper()
+        if archive:
+            from radar.ingest.archive import get_archive
+            client.archive = get_archive(archive)
         console.print("[blue]Using Scraper fallback...[/blue]")
     else:
         try:
@@ -41,175 +133,186 @@ def ingest(subreddit: str = None, days: int = 7, scraper: bool = False):
 
     for sub in subs:
         console.print(f"Scraping r/{sub}...")
-        count = client.fetch_subreddit_posts(sub, days=days)
+        count = client.fetch_subreddit_posts(sub, days=days or 7)
         console.print(f"[green]✓ Ingested {count} posts from r/{sub}.[/green]")
 
 @app.command()
 def process(ai_analyze: bool = False, batch: int = 50, target_product: str = None, subreddit_filter: List[str] = None, limit: int = None, force: bool = False, user_id: str = None):
     """Process pending posts: generate embeddings, semantic fit, and signals."""
-    from radar.storage.db import get_unprocessed_posts, get_connection
+    from radar.storage.db import iter_unprocessed_posts, deferred_writes
     from radar.process.embeddings import get_embeddings
     from radar.process.signals import detect_signals, calculate_intensity, classify_relevance
     from radar.process.ai_analysis import analyze_post_with_ai
     from radar.process.semantic import SemanticEngine
     from radar.storage.vectors import get_or_create_collection, add_embeddings
+    from radar.storage.db import get_work_high_water, advance_work_cursor, requeue_posts
     from radar.config import AI_ANALYSIS_THRESHOLD
-    import json
+    import itertools
+    
+    # Everything queued up to here is covered by this run
+    high_water = get_work_high_water()
     
-    posts = get_unprocessed_posts(
+    # Stream pending posts one batch at a time so memory stays bounded
+    batches = iter_unprocessed_posts(
         subreddit_filter=subreddit_filter, 
         limit=limit, 
         force=force,
         user_id=user_id,
-        product_id=target_product
+        product_id=target_product,
+        batch_size=batch
     )
-    if not posts:
+    first_batch = next(batches, None)
+    if not first_batch:
+        if not limit:
+            advance_work_cursor(user_id, target_product, subreddit_filter, high_water)
         console.print("[green]All specified posts are already processed.[/green]")
         return
         
-    console.print(f"Processing [bold]{len(posts)}[/bold] posts in batches of {batch}...")
+    console.print(f"Processing pending posts in batches of {batch}...")
     if target_product:
         console.print(f"Target Product for AI Analysis: [cyan]{target_product}[/cyan]")
     
     # Initialize Engines
     engine = SemanticEngine(user_id=user_id)
     collection = get_or_create_collection()
-    conn = get_connection()
-    cursor = conn.cursor()
     
     # Track errors for reporting
     error_count = 0
+    processed_count = 0
+    failed_ids = []  # Re-queued so the next run retries them
     
-    for i in range(0, len(posts), batch):
-        current_batch = posts[i:i+batch]
+    # Batch writes are queued to the DB writer without waiting, so saving batch N
+    # overlaps with embedding batch N+1; leaving the block waits for all of them.
+    with deferred_writes():
+        for batch_no, current_batch in enumerate(itertools.chain([first_batch], batches), start=1):
+            # 1. Fetch comments and build Unified Context for each post in batch (Smart Truncation)
+            from radar.storage.db import get_comments_bulk
+            from radar.process.truncation import build_unified_context
+            batch_texts = []
+            valid_posts = []  # Only include posts that succeeded
+            comments_by_post = get_comments_bulk([p['id'] for p in current_batch])
         
-        # 1. Fetch comments and build Unified Context for each post in batch (Smart Truncation)
-        from radar.storage.db import get_comments
-        from radar.process.truncation import build_unified_context
-        batch_texts = []
-        valid_posts = []  # Only include posts that succeeded
+            for p in current_batch:
+                try:
+                    comments = comments_by_post.get(p['id'], [])
+                    unified = build_unified_context(p, comments)
+                    batch_texts.append(unified)
+                    valid_posts.append(p)
+                except Exception as e:
+                    error_count += 1
+                    failed_ids.append(p['id'])
+                    console.print(f"  [yellow]⚠ Skipped post {p['id'][:20]}... ({e})[/yellow]")
+                    continue
         
-        for p in current_batch:
-            try:
-                comments = get_comments(p['id'])
-                unified = build_unified_context(p, comments)
-                batch_texts.append(unified)
-                valid_posts.append(p)
-            except Exception as e:
-                error_count += 1
-                console.print(f"  [yellow]⚠ Skipped post {p['id'][:20]}... ({e})[/yellow]")
+            if not valid_posts:
+                console.print(f"[yellow]⚠ Batch {batch_no} had no valid posts, skipping[/yellow]")
                 continue
-        
-        if not valid_posts:
-            console.print(f"[yellow]⚠ Batch {i//batch + 1} had no valid posts, skipping[/yellow]")
-            continue
             
-        current_batch = valid_posts  # Use only valid posts going forward
+            current_batch = valid_posts  # Use only valid posts going forward
             
-        # 2. Generate Embeddings
-        try:
-            embeddings = get_embeddings(batch_texts)
-            ids = [p['id'] for p in current_batch]
+            # 2. Generate Embeddings
+            try:
+                embeddings = get_embeddings(batch_texts)
+                ids = [p['id'] for p in current_batch]
             
-            sanitized_metadatas = []
-            for p in current_batch:
-                clean_meta = {k: (v if v is not None else "") for k, v in p.items() if k not in ['embedding_id', 'ai_analysis', 'semantic_similarity', 'community_score']}
-                sanitized_metadatas.append(clean_meta)
+                sanitized_metadatas = []
+                for p in current_batch:
+                    clean_meta = {k: (v if v is not None else "") for k, v in p.items() if k not in ['embedding_id', 'ai_analysis', 'semantic_similarity', 'community_score']}
+                    sanitized_metadatas.append(clean_meta)
                 
-            add_embeddings(collection, ids, embeddings, sanitized_metadatas, batch_texts)
-        except Exception as e:
-            console.print(f"[red]Embedding error: {e}[/red]")
-            continue
+                add_embeddings(collection, ids, embeddings, sanitized_metadatas, batch_texts)
+            except Exception as e:
+                failed_ids.extend(p['id'] for p in current_batch)
+                console.print(f"[red]Embedding error: {e}[/red]")
+                continue
             
-        # 3. Hybrid Analysis
-        from radar.storage.db import save_analysis, get_products
-        available_products = get_products(user_id=user_id)
+            # 3. Hybrid Analysis
+            from radar.storage.db import save_processed_batch, get_products
+            available_products = get_products(user_id=user_id)
+            analyses = []
         
-        for post, unified_text, emb in zip(current_batch, batch_texts, embeddings):
-            signals = detect_signals(unified_text, available_products=available_products)
-            community_score = calculate_intensity(post)
+            for post, unified_text, emb in zip(current_batch, batch_texts, embeddings):
+                signals = detect_signals(unified_text, available_products=available_products)
+                community_score = calculate_intensity(post)
             
-            # Analyze for ALL products found in DB
-            from radar.config import SCORING_CONFIG, AI_TRIGGER_CONFIG, AI_ANALYSIS_THRESHOLD
+                # Analyze for ALL products found in DB
+                from radar.config import SCORING_CONFIG, AI_TRIGGER_CONFIG, AI_ANALYSIS_THRESHOLD
             
-            for p_rec in available_products:
-                product_key = p_rec['id']
-                similarity = engine.get_product_fit(emb, product_key, p_rec['user_id'])
-                
-                # --- STRUCTURAL RELEVANCE GATING ---
-                # Gate: Only apply intent bonus if there's a specific keyword match OR baseline semantic fit
-                min_baseline = SCORING_CONFIG['structural_gating']['min_semantic_fit']
+                for p_rec in available_products:
+                    product_key = p_rec['id']
+                    similarity = engine.get_product_fit(emb, product_key, p_rec['user_id'])
                 
-                has_product_context = (
-                    len(signals['product_matches'].get(product_key, {}).get('pain_points', [])) > 0 or
-                    len(signals['product_matches'].get(product_key, {}).get('intents', [])) > 0
-                )
+                    # --- STRUCTURAL RELEVANCE GATING ---
+                    # Gate: Only apply intent bonus if there's a specific keyword match OR baseline semantic fit
+                    min_baseline = SCORING_CONFIG['structural_gating']['min_semantic_fit']
                 
-                if has_product_context or similarity >= min_baseline:
-                    intent_bonus = classify_relevance(post, signals)
-                else:
-                    intent_bonus = 0.0 # Block inflated bonuses for irrelevant posts
+                    has_product_context = (
+                        len(signals['product_matches'].get(product_key, {}).get('pain_points', [])) > 0 or
+                        len(signals['product_matches'].get(product_key, {}).get('intents', [])) > 0
+                    )
                 
-                # Formula: (Similarity * Multiplier) + Intent + Community
-                sim_multiplier = SCORING_CONFIG['relevance_weights']['semantic_multiplier']
-                relevance = (similarity * sim_multiplier) + intent_bonus + community_score
+                    if has_product_context or similarity >= min_baseline:
+                        intent_bonus = classify_relevance(post, signals)
+                    else:
+                        intent_bonus = 0.0 # Block inflated bonuses for irrelevant posts
                 
-                ai_result = None
-                # Step 5: Efficient AI Triggering (Minimum Fit Threshold + High-Relevance Bypass)
-                min_fit = AI_TRIGGER_CONFIG['min_semantic_fit']
-                bypass = AI_TRIGGER_CONFIG['high_relevance_bypass']
+                    # Formula: (Similarity * Multiplier) + Intent + Community
+                    sim_multiplier = SCORING_CONFIG['relevance_weights']['semantic_multiplier']
+                    relevance = (similarity * sim_multiplier) + intent_bonus + community_score
                 
-                should_ai_analyze = ai_analyze and (
-                    (relevance >= AI_ANALYSIS_THRESHOLD and similarity >= min_fit) or
-                    (relevance >= bypass)
-                )
+                    ai_result = None
+                    # Step 5: Efficient AI Triggering (Minimum Fit Threshold + High-Relevance Bypass)
+                    min_fit = AI_TRIGGER_CONFIG['min_semantic_fit']
+                    bypass = AI_TRIGGER_CONFIG['high_relevance_bypass']
                 
-                if target_product and product_key != target_product:
-                    should_ai_analyze = False
+                    should_ai_analyze = ai_analyze and (
+                        (relevance >= AI_ANALYSIS_THRESHOLD and similarity >= min_fit) or
+                        (relevance >= bypass)
+                    )
                 
-                # Check if AI analysis already exists (skip if not force mode)
-                if should_ai_analyze and not force:
-                    from radar.storage.db import get_existing_analysis
-                    existing = get_existing_analysis(post['id'], product_key, p_rec['user_id'])
-                    if existing and existing.get('ai_analysis'):
-                        # Reuse existing AI analysis
-                        ai_result = existing['ai_analysis']
+                    if target_product and product_key != target_product:
                         should_ai_analyze = False
                 
-                if should_ai_analyze:
-                    try:
-                        console.print(f"  [cyan]AI Analyzing for {product_key}: {post['title'][:40]}... (Sim: {similarity:.2f} | Score: {relevance:.1f})[/cyan]")
-                        ai_result = analyze_post_with_ai(unified_text, p_rec)
-                    except Exception as e:
-                        error_count += 1
-                        console.print(f"  [yellow]⚠ AI error for {post['id'][:15]}...: {e}[/yellow]")
-                        ai_result = None
+                    # Check if AI analysis already exists (skip if not force mode)
+                    if should_ai_analyze and not force:
+                        from radar.storage.db import get_existing_analysis
+                        existing = get_existing_analysis(post['id'], product_key, p_rec['user_id'])
+                        if existing and existing.get('ai_analysis'):
+                            # Reuse existing AI analysis
+                            ai_result = existing['ai_analysis']
+                            should_ai_analyze = False
                 
-                # Save to specific analysis table
-                save_analysis(post['id'], product_key, p_rec['user_id'], {
-                    "relevance_score": relevance,
-                    "semantic_similarity": similarity,
-                    "community_score": community_score,
-                    "ai_analysis": ai_result,
-                    "signals_json": json.dumps(signals),
-                    "last_processed_score": post['score'],
-                    "last_processed_comments": post['num_comments']
-                }, cursor=cursor)
-
-            # Update master post record state
-            try:
-                cursor.execute("""
-                    UPDATE posts 
-                    SET last_processed_score = ?, last_processed_comments = ?
-                    WHERE id = ?
-                """, (post['score'], post['num_comments'], post['id']))
-            except:
-                pass
+                    if should_ai_analyze:
+                        try:
+                            console.print(f"  [cyan]AI Analyzing for {product_key}: {post['title'][:40]}... (Sim: {similarity:.2f} | Score: {relevance:.1f})[/cyan]")
+                            ai_result = analyze_post_with_ai(unified_text, p_rec)
+                        except Exception as e:
+                            error_count += 1
+                            console.print(f"  [yellow]⚠ AI error for {post['id'][:15]}...: {e}[/yellow]")
+                            ai_result = None
+                
+                    # Queued for the specific analysis table
+                    analyses.append({
+                        "post_id": post['id'],
+                        "product_id": product_key,
+                        "user_id": p_rec['user_id'],
+                        "relevance_score": relevance,
+                        "semantic_similarity": similarity,
+                        "community_score": community_score,
+                        "ai_analysis": ai_result,
+                        "signals": signals,
+                        "last_processed_score": post['score'],
+                        "last_processed_comments": post['num_comments']
+                    })
             
-        conn.commit()
-        console.print(f"[green]✓ Processed batch {i//batch + 1}[/green]")
-        
-    conn.close()
+            # Analyses and master post record state are written in one transaction
+            save_processed_batch(analyses, current_batch)
+            processed_count += len(current_batch)
+            console.print(f"[green]✓ Processed batch {batch_no} ({processed_count} posts so far)[/green]")
+    
+    requeue_posts(failed_ids)
+    if not limit:
+        advance_work_cursor(user_id, target_product, subreddit_filter, high_water)
     
     # Final summary
     if error_count > 0:
@@ -220,7 +323,7 @@ def process(ai_analyze: bool = False, batch: int = 50, target_product: str = Non
 @app.command()
 def report(product: str, mode: str = "DIRECT_FIT", limit: int = 15, user_id: str = None):
     """Generate a calibrated report using different discovery modes."""
-    from radar.storage.db import get_connection
+    from radar.storage.db import get_report_rows
     import pandas as pd
     from radar.config import AI_ANALYSIS_THRESHOLD
     
@@ -231,37 +334,8 @@ def report(product: str, mode: str = "DIRECT_FIT", limit: int = 15, user_id: str
         console.print(f"[red]Error: Product '{product}' not found in database.[/red]")
         return
         
-    conn = get_connection()
-    
-    # Discovery Mode Logic
-    if mode == "DIRECT_FIT":
-        # Prioritize Semantic Similarity
-        order_by = "pa.semantic_similarity DESC, pa.community_score DESC"
-        where_clause = "pa.semantic_similarity >= 0.3"
-    elif mode == "OPPORTUNITY":
-        # Look for adjacent problems (mid-similarity, high intent)
-        order_by = "pa.relevance_score DESC"
-        where_clause = "pa.semantic_similarity BETWEEN 0.15 AND 0.4"
-    elif mode == "INTENSITY":
-        # Prioritize where most people are talking
-        order_by = "pa.community_score DESC, pa.semantic_similarity DESC"
-        where_clause = "pa.community_score >= 0.5"
-    else:
-        order_by = "pa.relevance_score DESC"
-        where_clause = "pa.relevance_score > 0"
-
-    query = f"""
-        SELECT 
-            p.id, p.title, p.url, p.body, p.source, p.created_at, p.intent,
-            pa.relevance_score, pa.semantic_similarity, pa.community_score, pa.ai_analysis
-        FROM posts p
-        JOIN post_analysis pa ON p.id = pa.post_id
-        WHERE pa.product_id = ? AND {where_clause} 
-        ORDER BY {order_by} 
-        LIMIT {limit}
-    """
-    df = pd.read_sql_query(query, conn, params=(product,))
-    conn.close()
+    # Discovery mode filters/ordering live in radar.storage.db.REPORT_MODES
+    df = pd.DataFrame(get_report_rows(product, mode, limit))
     
     if df.empty:
         console.print(f"[yellow]No posts found for mode {mode}. Try a different mode.[/yellow]")
@@ -291,6 +365,70 @@ def report(product: str, mode: str = "DIRECT_FIT", limit: int = 15, user_id: str
             
     console.print(f"[green]✓ {mode} report generated at {output_path}[/green]")
 
+@app.command()
+def maintenance(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Count expired rows without archiving or deleting them."),
+    batch: int = typer.Option(None, "--batch", help="Rows per delete transaction (defaults to RETENTION_BATCH_SIZE)."),
+    pause: float = typer.Option(0.0, "--pause", help="Seconds to sleep between batches."),
+):
+    """Archive and delete rows older than the retention policy (RETENTION_DAYS)."""
+    from radar.config import ARCHIVE_PATH
+    from radar.storage.retention import apply_retention, effective_policy
+    
+    init_db()
+    policy = ", ".join(f"{table}={days}d" for table, days in effective_policy().items())
+    console.print(f"Retention policy: [bold]{policy}[/bold] (archive: {ARCHIVE_PATH})")
+    results = apply_retention(batch_size=batch, dry_run=dry_run, pause=pause)
+    verb = "Would expire" if dry_run else "Expired"
+    for table, count in results.items():
+        console.print(f"  {verb} [cyan]{count}[/cyan] {table} row(s)")
+    if not dry_run:
+        console.print(f"[green]✓ Retention applied ({sum(results.values())} row(s) expired).[/green]")
+
+@app.command()
+def backup(
+    dest: str = typer.Option(None, "--dest", help="Backup root directory (defaults to BACKUP_PATH)."),
+    pages: int = typer.Option(None, "--pages", help="Pages copied per step (defaults to BACKUP_PAGES_PER_STEP)."),
+    pause: float = typer.Option(None, "--pause", help="Seconds to sleep between steps (defaults to BACKUP_STEP_PAUSE)."),
+    skip_vectors: bool = typer.Option(False, "--skip-vectors", help="Leave the Chroma store out."),
+):
+    """Back up radar.db and the Chroma store while writers stay online."""
+    from radar.storage.backup import create_backup
+
+    init_db()
+    manifest = create_backup(dest, pages=pages, pause=pause, vectors=not skip_vectors)
+    console.print(f"  [cyan]{sum(manifest['rows'].values())}[/cyan] row(s) in {len(manifest['rows'])} table(s)")
+    console.print(f"  [cyan]{sum(manifest['vectors'].values())}[/cyan] vector(s) in {len(manifest['vectors'])} collection(s)")
+    console.print(f"[green]✓ Backup written to {manifest['path']} ({manifest['seconds']}s).[/green]")
+
+@app.command()
+def restore(
+    path: str = typer.Argument(None, help="Backup directory (defaults to the newest under BACKUP_PATH)."),
+    db_path: str = typer.Option(None, "--db-path", help="Restore the database here instead of DATABASE_PATH."),
+    chroma_path: str = typer.Option(None, "--chroma-path", help="Restore the Chroma store here instead of CHROMA_PATH."),
+    force: bool = typer.Option(False, "--force", help="Replace existing targets (stop the API and workers first)."),
+):
+    """Restore a backup and verify its row and vector counts."""
+    from radar.storage.backup import latest_backup, restore_backup
+
+    path = path or latest_backup()
+    if not path:
+        console.print("[red]No backup found.[/red]")
+        raise typer.Exit(code=1)
+    try:
+        report = restore_backup(path, db_path=db_path, chroma_path=chroma_path, overwrite=force)
+    except FileExistsError as e:
+        console.print(f"[red]{e}; use --force.[/red]")
+        raise typer.Exit(code=1)
+    for kind in ("rows", "vectors"):
+        for name, (expected, restored) in report[kind].items():
+            if expected != restored:
+                console.print(f"  [red]{name}: expected {expected} {kind}, restored {restored}[/red]")
+    if not report['ok']:
+        console.print(f"[red]✗ Restore of {path} failed verification.[/red]")
+        raise typer.Exit(code=1)
+    console.print(f"[green]✓ Restored {path} ({len(report['rows'])} table(s), {len(report['vectors'])} collection(s) verified).[/green]")
+
 @app.command()
 def serve(host: str = "127.0.0.1", port: int = 8000):
     """Start the Radar API server."""
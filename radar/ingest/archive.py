@@ -0,0 +1,173 @@
+"""
+Raw-response archive for the scrapers, and offline replay.
+
+With RESPONSE_ARCHIVE_PATH set (or `radar ingest --scraper --archive DIR`)
+every listing and comment-thread JSON the scrapers receive is appended as
+one line, {"url", "fetched_utc", "data"}, to
+
+    <root>/<YYYY-MM-DD>/responses-<host>-<pid>.jsonl.zst   (.jsonl.gz without zstandard)
+
+partitioned by UTC fetch date. Each process writes its own file; a run ends
+its compressed frame on flush(), so files from crashed runs stay readable up
+to their last flush.
+
+replay_archive() feeds archived responses back through RedditScraper's own
+parsing and storage path (_parse_listing, save_posts_bulk,
+_save_comments_json) without touching the network: for re-running parsing
+and scoring experiments, and as a deterministic ingest benchmark.
+"""
+import gzip
+import io
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from radar.storage.codecs import HAS_ZSTD
+
+if HAS_ZSTD:
+    import zstandard
+
+ARCHIVE_SUFFIXES = (".jsonl.zst", ".jsonl.gz")
+# What a file cut short by a crash raises while being decompressed
+_TRUNCATED = (EOFError, OSError) + ((zstandard.ZstdError,) if HAS_ZSTD else ())
+
+
+class ResponseArchive:
+    """Append-only writer of raw scraper responses under `root`."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.records = 0
+        self._lock = threading.Lock()
+        self._date = None
+        self._raw = None
+        self._stream = None
+
+    def _open(self, day: str):
+        directory = os.path.join(self.root, day)
+        os.makedirs(directory, exist_ok=True)
+        name = f"responses-{socket.gethostname()}-{os.getpid()}"
+        if HAS_ZSTD:
+            # Appending starts a new frame; readers decode across frames
+            self._raw = open(os.path.join(directory, name + ".jsonl.zst"), "ab")
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._raw = open(os.path.join(directory, name + ".jsonl.gz"), "ab")
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        self._date = day
+
+    def record(self, url: str, data: Any):
+        """Append one response. Rolls over to a new date partition at UTC midnight."""
+        now = time.time()
+        day = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d")
+        line = json.dumps({"url": url, "fetched_utc": int(now), "data": data}, separators=(",", ":")) + "\n"
+        with self._lock:
+            if day != self._date:
+                self._close()
+                self._open(day)
+            self._stream.write(line.encode("utf-8"))
+            self.records += 1
+
+    def _close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._raw.close()
+        self._stream = self._raw = self._date = None
+
+    def flush(self):
+        """End the current compressed frame so everything recorded so far is readable."""
+        with self._lock:
+            self._close()
+
+
+_archives: Dict[str, ResponseArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(root: str) -> ResponseArchive:
+    """The process-wide archive writer for `root`, shared by every scraper (one file per process)."""
+    root = os.path.abspath(root)
+    with _archives_lock:
+        if root not in _archives:
+            _archives[root] = ResponseArchive(root)
+        return _archives[root]
+
+
+def archive_files(path: str) -> list:
+    """Archive files under `path` (a file, a date partition or an archive root), oldest first."""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for directory, _, names in os.walk(path):
+        files += [os.path.join(directory, n) for n in names if n.endswith(ARCHIVE_SUFFIXES)]
+    return sorted(files, key=lambda f: (os.path.relpath(f, path), f))
+
+
+def _open_archive(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if not HAS_ZSTD:
+        raise RuntimeError(f"{path} is zstd-compressed: install radar[compression]")
+    raw = open(path, "rb")
+    reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    return io.TextIOWrapper(reader, encoding="utf-8")
+
+
+def iter_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Archived records in recording order (per file). A truncated last line is skipped."""
+    for file_path in archive_files(path):
+        with _open_archive(file_path) as lines:
+            try:
+                for line in lines:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"DEBUG: Skipping unreadable record in {file_path}", flush=True)
+            except _TRUNCATED as e:
+                print(f"DEBUG: {file_path} ends early ({e})", flush=True)
+
+
+def _subreddit_of(url: str) -> Optional[str]:
+    parts = url.split("/r/", 1)
+    return parts[1].split("/", 1)[0] if len(parts) == 2 else None
+
+
+def replay_archive(path: str, days: Optional[int] = None, subreddit: str = None) -> Dict[str, Any]:
+    """
+    Ingest archived responses through the scraper's parsing and storage
+    path. `days` applies the sync cutoff relative to each listing's fetch
+    time (None keeps every post); `subreddit` limits the replay to one.
+    Returns counts and throughput.
+    """
+    from radar.ingest.reddit_scraper import RedditScraper
+    from radar.storage.db import save_posts_bulk, update_post_stats_bulk
+
+    scraper = RedditScraper()
+    stats = {"records": 0, "listings": 0, "threads": 0, "posts": 0, "comments": 0}
+    started = time.monotonic()
+    for record in iter_archive(path):
+        url, data = record.get("url", ""), record.get("data")
+        sub = _subreddit_of(url)
+        if not sub or (subreddit and sub.lower() != subreddit.lower()):
+            continue
+        stats["records"] += 1
+        if "/comments/" in url:
+            post_id = "t3_" + url.split("/comments/", 1)[1].split("/", 1)[0]
+            stats["comments"] += scraper._save_comments_json(data, post_id) or 0
+            stats["threads"] += 1
+        elif isinstance(data, dict):
+            cutoff = record.get("fetched_utc", 0) - days * 86400 if days else 0
+            items = data.get("data", {}).get("children", [])
+            page_posts, page_stats, _, _ = scraper._parse_listing(items, cutoff, sub)
+            save_posts_bulk(page_posts)
+            update_post_stats_bulk(page_stats)
+            stats["posts"] += len(page_posts) + len(page_stats)
+            stats["listings"] += 1
+    elapsed = time.monotonic() - started
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["records_per_s"] = round(stats["records"] / elapsed, 1) if elapsed else None
+    return stats
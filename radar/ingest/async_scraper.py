@@ -0,0 +1,173 @@
+"""
+Concurrent Reddit scraper.
+
+Same contract as RedditScraper.fetch_subreddit_posts, but requests go out
+over one keep-alive session (curl_cffi AsyncSession, httpx.AsyncClient as
+fallback) and comment threads are fetched up to SCRAPER_CONCURRENCY at a
+time while the next listing page loads. Politeness comes from the
+per-proxy, per-host token bucket (starting at SCRAPER_RATE requests/s,
+bursts of SCRAPER_BURST, steered by Reddit's rate-limit headers) instead
+of a 2-5s sleep before every request.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Optional
+
+from radar.config import SCRAPER_CONCURRENCY
+from radar.ingest.ratelimit import is_throttled
+from radar.ingest.reddit_scraper import RedditScraper, HAS_CURL_CFFI
+from radar.storage.db import save_posts_bulk, update_post_stats_bulk
+
+
+class AsyncRedditScraper(RedditScraper):
+    """RedditScraper whose fetches run concurrently on asyncio."""
+
+    def __init__(self, user_id: str = None, concurrency: int = None, rate: float = None, burst: int = None):
+        super().__init__(user_id=user_id)
+        self.concurrency = concurrency or SCRAPER_CONCURRENCY
+        self.rate = rate or self.rate
+        self.burst = burst or self.burst
+        self.stats.update({"in_flight": 0, "peak_in_flight": 0, "bucket_wait_s": 0.0})
+
+    def fetch_subreddit_posts(self, subreddit_name: str, days: int = 1, limit: int = 100):
+        """Blocking entry point (CLI, API background tasks, Celery); see fetch_subreddit_posts_async."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_subreddit_posts_async(subreddit_name, days=days, limit=limit))
+        raise RuntimeError("fetch_subreddit_posts() blocks; await fetch_subreddit_posts_async() inside an event loop")
+
+    @asynccontextmanager
+    async def _open_session(self):
+        """One keep-alive session for a whole subreddit run."""
+        if HAS_CURL_CFFI:
+            from curl_cffi.requests import AsyncSession
+            session = AsyncSession(max_clients=self.concurrency)
+            try:
+                yield session
+            finally:
+                await session.close()
+        else:
+            import httpx
+            proxy = self.proxies["https"] if self.proxies else None
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            async with httpx.AsyncClient(proxy=proxy, timeout=20, limits=limits) as session:
+                yield session
+
+    async def _get(self, session, url: str):
+        if HAS_CURL_CFFI:
+            return await session.get(url, headers=self._get_headers(), proxies=self.proxies,
+                                     impersonate="chrome110", timeout=30, verify=False)
+        return await session.get(url, headers=self._get_headers())
+
+    async def _request_async(self, session, url: str) -> Optional[Any]:
+        """_request_with_retry for the async engine: token bucket first, paced by the host's AdaptivePacer."""
+        pacer = self._pacer(url)
+        for attempt in range(self.max_retries):
+            self.stats["bucket_wait_s"] += await pacer.bucket.acquire()
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+            try:
+                response = await self._get(session, url)
+            except Exception as e:
+                print(f"DEBUG: Request exception: {e}", flush=True)
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._get_backoff_delay(attempt))
+                continue
+            finally:
+                self.stats["in_flight"] -= 1
+
+            # Throttling pauses the shared bucket; the retry waits it out in acquire()
+            pacer.observe(response.status_code, response.headers, self._get_backoff_delay(attempt))
+            if is_throttled(response.status_code, response.headers):
+                self.stats["rate_limited"] += 1
+                self.stats["retries"] += 1
+                continue
+            if response.status_code == 403:
+                print(f"DEBUG: Forbidden (private, quarantined or banned?): {url}", flush=True)
+                self.stats["forbidden"] += 1
+                break
+            if response.status_code == 200:
+                self.stats["success"] += 1
+                return self._record(url, response.json())
+            print(f"DEBUG: Request failed with status {response.status_code}", flush=True)
+
+        self.stats["failed"] += 1
+        return None
+
+    async def _fetch_comments(self, session, semaphore: asyncio.Semaphore, post_id: str, subreddit_name: str) -> int:
+        async with semaphore:
+            data = await self._request_async(session, self._comments_url(post_id, subreddit_name))
+        return await asyncio.to_thread(self._save_comments_json, data, post_id)
+
+    async def fetch_subreddit_posts_async(self, subreddit_name: str, days: int = 1, limit: int = 100) -> int:
+        """
+        Fetch posts (and their comment threads) from a subreddit's /new
+        listing back to `days` ago, capped at 500 posts. Returns the number
+        of posts saved or refreshed.
+        """
+        posts_added = 0
+        cutoff = datetime.utcnow().timestamp() - (days * 86400)
+        after = None
+        max_total = 500  # Same safety cap as the sequential scraper
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        comment_tasks = []
+
+        print(f"DEBUG: Starting async sync for r/{subreddit_name} (Max {days} days, {self.concurrency} concurrent)", flush=True)
+
+        async with self._open_session() as session:
+            while posts_added < max_total:
+                url = f"https://www.reddit.com/r/{subreddit_name}/new/.json?limit={limit}"
+                if after:
+                    url += f"&after={after}"
+
+                data = await self._request_async(session, url)
+                if not data:
+                    print(f"DEBUG: Failed to fetch next page for r/{subreddit_name}. Ending sync early.", flush=True)
+                    break
+                try:
+                    items = data.get('data', {}).get('children', [])
+                    current_after = data.get('data', {}).get('after')
+                except Exception as e:
+                    print(f"DEBUG: Failed to parse JSON for r/{subreddit_name}: {e}", flush=True)
+                    break
+                if not items:
+                    break
+
+                # Storage calls block, so they run off the event loop
+                page_posts, page_stats, page_old_posts, page_threads = await asyncio.to_thread(
+                    self._parse_listing, items, cutoff, subreddit_name
+                )
+                posts_added += len(page_posts) + len(page_stats)
+                await asyncio.to_thread(save_posts_bulk, page_posts)
+                await asyncio.to_thread(update_post_stats_bulk, page_stats)
+
+                # New and grown comment threads load while the next page is requested
+                comment_tasks += [
+                    asyncio.create_task(self._fetch_comments(session, semaphore, post_id, subreddit_name))
+                    for post_id in page_threads
+                ]
+                print(f"DEBUG: [r/{subreddit_name}] Page: {len(page_posts) + len(page_stats)} saved, "
+                      f"{page_old_posts} beyond cutoff. Total: {posts_added}", flush=True)
+
+                if not current_after or page_old_posts > 0:
+                    break
+                after = current_after
+
+            comments_saved = sum(n or 0 for n in await asyncio.gather(*comment_tasks))
+
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.flush)
+        print(f"DEBUG: r/{subreddit_name}: {posts_added} posts, {comments_saved} comments "
+              f"in {time.monotonic() - started:.1f}s", flush=True)
+        return posts_added
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["bucket_wait_s"] = round(stats["bucket_wait_s"], 2)
+        stats["current_delays"] += f" (burst {self.burst}), {self.concurrency} concurrent"
+        return stats
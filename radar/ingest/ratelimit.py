@@ -0,0 +1,277 @@
+"""
+Request pacing for the scrapers.
+
+Each (proxy identity, host) pair gets a token bucket: `rate` requests per
+second on average, bursts of up to `capacity`. A request reserves a token
+and sleeps only as long as its reservation needs, so concurrent fetches
+share the budget without a fixed sleep in front of every request.
+
+With RATE_LIMIT_REDIS_URL set the bucket state lives in Redis, so Celery
+workers, API syncs and CLI ingests draw on one global budget. When Redis
+cannot be reached the bucket falls back to its in-process state and
+retries Redis after a short pause.
+
+An AdaptivePacer steers each bucket's rate (AIMD) from Reddit's
+x-ratelimit-* headers and throttling responses (is_throttled); see pacer_for.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from radar.config import RATE_LIMIT_REDIS_URL, SCRAPER_MIN_RATE, SCRAPER_MAX_RATE
+
+# Seconds to stay on the in-process fallback after a Redis error
+_REDIS_RETRY_S = 30.0
+
+# KEYS[1] = bucket hash; ARGV = rate, capacity, tokens. Returns the wait in seconds (as text: Lua numbers
+# come back from Redis truncated to integers). Uses the server clock so all clients agree on refills.
+_RESERVE_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+local wait = 0
+if tokens < 0 then wait = -tokens / rate end
+redis.call('EXPIRE', KEYS[1], math.ceil(wait + capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens/second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take `tokens` now and return how many seconds the caller must wait
+        before using them. The balance may go negative: later callers queue
+        behind earlier reservations instead of racing for the next refill.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Reserve `tokens` and sleep until they are due. Returns the seconds waited."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def wait(self, tokens: float = 1.0) -> float:
+        """Blocking acquire, for the synchronous fetch paths."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RedisTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in a Redis hash shared by every process using `key`."""
+
+    def __init__(self, client, key: str, rate: float, capacity: float):
+        super().__init__(rate, capacity)  # the local state is the fallback
+        self.client = client
+        self.key = key
+        self._script = client.register_script(_RESERVE_LUA)
+        self._retry_at = 0.0
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        from redis.exceptions import RedisError
+
+        if time.monotonic() >= self._retry_at:
+            try:
+                return float(self._script(keys=[self.key], args=[self.rate, self.capacity, tokens]))
+            except RedisError as e:
+                print(f"DEBUG: rate limiter using the in-process bucket for {self.key} ({e})", flush=True)
+                self._retry_at = time.monotonic() + _REDIS_RETRY_S
+        return super().reserve(tokens)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        # The Redis round trip blocks, so it runs off the event loop
+        wait = await asyncio.to_thread(self.reserve, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def _header_float(headers, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name) if headers is not None else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttled(status: int, headers=None) -> bool:
+    """
+    Whether a response means "slow down": a 429, or a 403 with the quota
+    spent. Any other 403 is permanent (private, quarantined or banned
+    subreddit) and must not throttle the shared bucket.
+    """
+    if status == 429:
+        return True
+    remaining = _header_float(headers, "x-ratelimit-remaining")
+    return status == 403 and remaining is not None and remaining < 1
+
+
+class AdaptivePacer:
+    """
+    AIMD controller for a bucket's rate, fed with every response.
+
+    Successes add `step` req/s, up to max_rate and to what the quota in
+    x-ratelimit-remaining / x-ratelimit-reset can sustain until the window
+    resets. A throttling response (is_throttled) multiplies the rate by `decrease` (at most once per
+    `hold` seconds, so a burst of concurrent 429s counts once) and pauses the
+    bucket for Retry-After, the quota reset or the caller's backoff. The
+    pause is taken from the bucket itself, so every scraper and coroutine
+    drawing from it (and, with Redis, every process) backs off together.
+    Rates are per process; with Redis they converge since all processes
+    read the same quota headers.
+    """
+
+    def __init__(self, bucket: TokenBucket, min_rate: float, max_rate: float,
+                 step: float = 0.05, decrease: float = 0.5, hold: float = 5.0):
+        self.bucket = bucket
+        self.min_rate = min(min_rate, bucket.rate)
+        self.max_rate = max(max_rate, bucket.rate)
+        self.step = step
+        self.decrease = decrease
+        self.hold = hold
+        self.quota_remaining: Optional[float] = None
+        self.quota_reset_s: Optional[float] = None
+        self.increases = 0
+        self.decreases = 0
+        self.paused_s = 0.0
+        self._last_decrease = float("-inf")
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _set_rate(self, rate: float):
+        self.bucket.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def _pause(self, seconds: float, now: float) -> float:
+        # Only the part not already covered by an earlier pause is drawn from the bucket
+        until = now + seconds
+        if until <= self._paused_until:
+            return 0.0
+        extra = until - max(now, self._paused_until)
+        self._paused_until = until
+        self.paused_s += extra
+        self.bucket.reserve(extra * self.bucket.rate)
+        return extra
+
+    def observe(self, status: int, headers=None, backoff: float = 0.0) -> float:
+        """Adjust the rate for one response. Returns the seconds of pause it added to the bucket."""
+        remaining = _header_float(headers, "x-ratelimit-remaining")
+        reset = _header_float(headers, "x-ratelimit-reset")
+        retry_after = _header_float(headers, "retry-after")
+        now = time.monotonic()
+        with self._lock:
+            if remaining is not None:
+                self.quota_remaining = remaining
+            if reset is not None:
+                self.quota_reset_s = reset
+            ceiling = self.max_rate
+            if remaining is not None and reset is not None:
+                ceiling = min(ceiling, remaining / max(reset, 1.0))
+
+            if is_throttled(status, headers):
+                if now - self._last_decrease >= self.hold:
+                    self._set_rate(self.bucket.rate * self.decrease)
+                    self._last_decrease = now
+                    self.decreases += 1
+                return self._pause(retry_after or reset or backoff, now)
+            if status != 200:
+                return 0.0
+            if remaining is not None and remaining < 1:
+                # Quota spent: wait for the window to reset; the next window's quota sets the rate
+                return self._pause(reset or backoff, now)
+            if ceiling < self.bucket.rate:
+                self._set_rate(ceiling)
+            elif self.bucket.rate < ceiling:
+                self._set_rate(min(ceiling, self.bucket.rate + self.step))
+                self.increases += 1
+            return 0.0
+
+    def state(self) -> dict:
+        """Controller state for scraper stats."""
+        return {
+            "rate": round(self.bucket.rate, 3),
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "quota_remaining": self.quota_remaining,
+            "quota_reset_s": self.quota_reset_s,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "paused_s": round(self.paused_s, 2),
+        }
+
+
+def proxy_identity(proxy: Optional[str]) -> str:
+    """Stable, credential-free name for a proxy URL (its session user included): 'direct' without one."""
+    if not proxy:
+        return "direct"
+    return hashlib.sha1(proxy.encode()).hexdigest()[:12]
+
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_pacers: Dict[Tuple[str, str], AdaptivePacer] = {}
+_buckets_lock = threading.Lock()
+_client = None
+
+
+def _redis_client():
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(RATE_LIMIT_REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _client
+
+
+def bucket_for(proxy: Optional[str], host: str, rate: float, capacity: float) -> TokenBucket:
+    """
+    The bucket for a proxy (None = direct) and host, shared by every
+    scraper in the process (and, with RATE_LIMIT_REDIS_URL, every process).
+    The first caller's rate and capacity create it.
+    """
+    identity = proxy_identity(proxy)
+    key = (identity, host)
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            if RATE_LIMIT_REDIS_URL:
+                bucket = RedisTokenBucket(_redis_client(), f"radar:ratelimit:{identity}:{host}", rate, capacity)
+            else:
+                bucket = TokenBucket(rate, capacity)
+            _buckets[key] = bucket
+        return bucket
+
+
+def pacer_for(proxy: Optional[str], host: str, rate: float, capacity: float) -> AdaptivePacer:
+    """The AdaptivePacer steering bucket_for(proxy, host, ...), shared like the bucket."""
+    key = (proxy_identity(proxy), host)
+    bucket = bucket_for(proxy, host, rate, capacity)
+    with _buckets_lock:
+        pacer = _pacers.get(key)
+        if pacer is None or pacer.bucket is not bucket:
+            pacer = AdaptivePacer(bucket, SCRAPER_MIN_RATE, SCRAPER_MAX_RATE)
+            _pacers[key] = pacer
+        return pacer
@@ -1,22 +1,35 @@
 import praw
+import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from radar.config import REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT
-from radar.storage.db import save_post, save_comment
+from urllib.parse import urlsplit
+from radar.config import REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, SCRAPER_RATE, SCRAPER_BURST
+from radar.ingest.ratelimit import bucket_for
+from radar.storage.db import save_posts_bulk, save_comments_bulk
+
+
+class RateLimitedSession(requests.Session):
+    """requests session for PRAW that draws every call from the shared per-host token bucket."""
+
+    def request(self, method, url, *args, **kwargs):
+        bucket_for(None, urlsplit(url).netloc, SCRAPER_RATE, SCRAPER_BURST).wait()
+        return super().request(method, url, *args, **kwargs)
+
 
 class RedditAPI:
     def __init__(self):
         self.reddit = praw.Reddit(
             client_id=REDDIT_CLIENT_ID,
             client_secret=REDDIT_CLIENT_SECRET,
-            user_agent=REDDIT_USER_AGENT
+            user_agent=REDDIT_USER_AGENT,
+            requestor_kwargs={"session": RateLimitedSession()}
         )
 
     def fetch_subreddit_posts(self, subreddit_name: str, days: int = 7, limit: int = 100):
         subreddit = self.reddit.subreddit(subreddit_name)
         cutoff = datetime.utcnow() - timedelta(days=days)
         
-        posts_count = 0
+        posts = []
         for submission in subreddit.new(limit=limit):
             if datetime.fromtimestamp(submission.created_utc) < cutoff:
                 break
@@ -32,12 +45,12 @@ class RedditAPI:
                 'score': submission.score,
                 'num_comments': submission.num_comments,
                 'created_at': datetime.fromtimestamp(submission.created_utc).isoformat(),
+                'created_utc': int(submission.created_utc),
                 'ingestion_method': 'api'
             }
-            save_post(post_data)
-            posts_count += 1
+            posts.append(post_data)
             
-        return posts_count
+        return save_posts_bulk(posts)
 
     def fetch_post_comments(self, post_id: str, limit: int = 50):
         # post_id here is the internal one, e.g. "reddit_abc123"
@@ -45,7 +58,7 @@ class RedditAPI:
         submission = self.reddit.submission(id=reddit_id)
         submission.comments.replace_more(limit=0)
         
-        comments_count = 0
+        comments = []
         for comment in submission.comments.list()[:limit]:
             comment_data = {
                 'id': f"comment_{comment.id}",
@@ -55,9 +68,9 @@ class RedditAPI:
                 'author': str(comment.author),
                 'score': comment.score,
                 'created_at': datetime.fromtimestamp(comment.created_utc).isoformat(),
+                'created_utc': int(comment.created_utc),
                 'depth': comment.depth
             }
-            save_comment(comment_data)
-            comments_count += 1
+            comments.append(comment_data)
             
-        return comments_count
+        return save_comments_bulk(comments)
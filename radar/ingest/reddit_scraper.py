@@ -11,8 +11,12 @@ except ImportError:
     import requests
     HAS_CURL_CFFI = False
 
-from radar.config import REDDIT_PROXY_URL
-from radar.storage.db import save_post, save_comment, get_post, update_post_stats
+from urllib.parse import urlsplit
+
+from radar.config import REDDIT_PROXY_URL, SCRAPER_RATE, SCRAPER_BURST, COMMENT_REFRESH_MIN_NEW, RESPONSE_ARCHIVE_PATH
+from radar.ingest.archive import get_archive
+from radar.ingest.ratelimit import AdaptivePacer, pacer_for, is_throttled
+from radar.storage.db import save_posts_bulk, save_thread_comments, get_post, update_post_stats_bulk
 
 # Pool of modern browser User-Agents
 USER_AGENTS = [
@@ -26,11 +30,13 @@ class RedditScraper:
     """Scraper with anti-ban protections for Reddit using JSON fallback and Proxy support."""
     
     def __init__(self, user_id: str = None):
-        # Rate limiting config
-        self.min_delay = 2.0
-        self.max_delay = 5.0
-        self.burst_probability = 0.15
-        self.burst_multiplier = 2.5
+        # Shared per-proxy, per-host budget (radar.ingest.ratelimit); the rate
+        # is only the starting point, the host's AdaptivePacer steers it
+        self.rate = SCRAPER_RATE
+        self.burst = SCRAPER_BURST
+        self._pacers = {}
+        # Raw responses are recorded for offline replay when an archive is configured
+        self.archive = get_archive(RESPONSE_ARCHIVE_PATH) if RESPONSE_ARCHIVE_PATH else None
         
         # Retry config
         self.max_retries = 3
@@ -44,7 +50,9 @@ class RedditScraper:
             "failed": 0,
             "retries": 0,
             "rate_limited": 0,
+            "forbidden": 0,
             "skipped_deep": 0,
+            "threads_refreshed": 0,
         }
 
         # Proxy Configuration
@@ -84,19 +92,19 @@ class RedditScraper:
             "Cache-Control": "no-cache",
         }
     
-    def _smart_delay(self):
-        """Apply human-like delay with jitter between requests."""
-        base_delay = random.uniform(self.min_delay, self.max_delay)
-        if random.random() < self.burst_probability:
-            base_delay *= self.burst_multiplier
-        
-        jitter = base_delay * random.uniform(-0.1, 0.1)
-        time.sleep(base_delay + jitter)
-    
+    def _pacer(self, url: str) -> AdaptivePacer:
+        """Adaptive pacer (and its token bucket) for this scraper's proxy and the URL's host."""
+        host = urlsplit(url).netloc
+        pacer = pacer_for(self.proxies["https"] if self.proxies else None, host, self.rate, self.burst)
+        self._pacers[host] = pacer
+        return pacer
+
     def _request_with_retry(self, url: str) -> Optional[Any]:
         """Make request with exponential backoff, retry, and proxy support."""
+        pacer = self._pacer(url)
         for attempt in range(self.max_retries):
             try:
+                pacer.bucket.wait()
                 self.stats["requests"] += 1
                 headers = self._get_headers()
                 
@@ -117,28 +125,38 @@ class RedditScraper:
                         timeout=20
                     )
                 
-                # Handle rate limiting
-                if response.status_code == 429:
+                # Rate-limit headers and throttling responses steer the shared
+                # bucket; a throttled retry waits out the pause in pacer.bucket.wait()
+                pacer.observe(response.status_code, response.headers, self._get_backoff_delay(attempt))
+                if is_throttled(response.status_code, response.headers):
                     self.stats["rate_limited"] += 1
-                    wait_time = min(self.backoff_base * (2 ** attempt), self.backoff_max)
-                    time.sleep(wait_time)
                     self.stats["retries"] += 1
                     continue
+                if response.status_code == 403:
+                    print(f"DEBUG: Forbidden (private, quarantined or banned?): {url}", flush=True)
+                    self.stats["forbidden"] += 1
+                    break
                 
                 if response.status_code == 200:
                     self.stats["success"] += 1
-                    return response.json()
+                    return self._record(url, response.json())
                 
                 print(f"DEBUG: Request failed with status {response.status_code}", flush=True)
                 
             except Exception as e:
                 print(f"DEBUG: Request exception: {e}", flush=True)
-                time.sleep(self.backoff_base * (2 ** attempt))
+                time.sleep(self._get_backoff_delay(attempt))
                 self.stats["retries"] += 1
         
         self.stats["failed"] += 1
         return None
     
+    def _record(self, url: str, data: Any) -> Any:
+        """Archive a raw response (see radar.ingest.archive) and pass it through."""
+        if self.archive is not None:
+            self.archive.record(url, data)
+        return data
+
     def fetch_subreddit_posts(self, subreddit_name: str, days: int = 1, limit: int = 100):
         """
         Fetch posts from a subreddit using JSON endpoint with pagination support.
@@ -157,7 +175,6 @@ class RedditScraper:
             if after:
                 url += f"&after={after}"
             
-            self._smart_delay()
             data = self._request_with_retry(url)
 
             if not data:
@@ -174,54 +191,17 @@ class RedditScraper:
             if not items:
                 break
             
-            page_processed = 0
-            page_old_posts = 0
+            page_posts, page_stats, page_old_posts, page_threads = self._parse_listing(items, cutoff, subreddit_name)
+            page_processed = len(page_posts) + len(page_stats)
+            posts_added += page_processed
             
-            for item_wrapper in items:
-                item = item_wrapper.get('data', {})
-                post_id = item.get('name')
-                created_utc = item.get('created_utc', 0)
-                
-                if created_utc < cutoff:
-                    page_old_posts += 1
-                    continue
-                    
-                title = item.get('title')
-                full_url = f"https://www.reddit.com{item.get('permalink')}"
-                
-                existing = get_post(post_id)
-                score = item.get('score', 0)
-                num_comments = item.get('num_comments', 0)
-
-                if existing and existing.get('body'):
-                    update_post_stats(post_id, score, num_comments)
-                    self.stats["skipped_deep"] += 1
-                    posts_added += 1
-                    page_processed += 1
-                    continue
-
-                post_data = {
-                    'id': post_id,
-                    'platform': 'reddit',
-                    'source': subreddit_name,
-                    'url': full_url,
-                    'title': title,
-                    'body': item.get('selftext', "").strip(),
-                    'author': item.get('author'),
-                    'score': score,
-                    'num_comments': num_comments,
-                    'created_at': datetime.fromtimestamp(created_utc).isoformat(),
-                    'ingestion_method': 'scraper'
-                }
-                save_post(post_data)
-                
-                # Fetch comments
-                if num_comments > 0:
-                    self._smart_delay()
-                    self._scrape_comments_json(post_id, subreddit_name)
-
-                posts_added += 1
-                page_processed += 1
+            # One transaction for the whole page
+            save_posts_bulk(page_posts)
+            update_post_stats_bulk(page_stats)
+            
+            # Fetch new and grown threads (one transaction per thread)
+            for post_id in page_threads:
+                self._scrape_comments_json(post_id, subreddit_name)
             
             print(f"DEBUG: [r/{subreddit_name}] Page processed: {page_processed} saved, {page_old_posts} beyond cutoff. Total: {posts_added}", flush=True)
 
@@ -234,25 +214,103 @@ class RedditScraper:
                 
             after = current_after
             
+        if self.archive is not None:
+            self.archive.flush()
         return posts_added
 
+    def _parse_listing(self, items: list, cutoff: float, subreddit_name: str):
+        """
+        Split a listing page into posts to save (new ones, or stored ones
+        whose body just appeared), (post_id, score, num_comments) refreshes
+        for the other stored posts, the number of posts older than `cutoff`,
+        and the ids of threads to download: new posts with comments, and
+        stored posts whose num_comments grew by COMMENT_REFRESH_MIN_NEW since
+        their thread was last fetched.
+        """
+        page_posts = []
+        page_stats = []
+        page_old_posts = 0
+        page_threads = []
+        
+        for item_wrapper in items:
+            item = item_wrapper.get('data', {})
+            post_id = item.get('name')
+            created_utc = item.get('created_utc', 0)
+            
+            if created_utc < cutoff:
+                page_old_posts += 1
+                continue
+                
+            title = item.get('title')
+            full_url = f"https://www.reddit.com{item.get('permalink')}"
+            
+            existing = get_post(post_id)
+            score = item.get('score', 0)
+            num_comments = item.get('num_comments', 0)
+
+            if num_comments > 0 and self._thread_is_stale(existing, num_comments):
+                page_threads.append(post_id)
+
+            if existing and (existing.get('body') or not item.get('selftext', "").strip()):
+                page_stats.append((post_id, score, num_comments))
+                self.stats["skipped_deep"] += 1
+                continue
+
+            page_posts.append({
+                'id': post_id,
+                'platform': 'reddit',
+                'source': subreddit_name,
+                'url': full_url,
+                'title': title,
+                'body': item.get('selftext', "").strip(),
+                'author': item.get('author'),
+                'score': score,
+                'num_comments': num_comments,
+                'created_at': datetime.fromtimestamp(created_utc).isoformat(),
+                'created_utc': int(created_utc),
+                'ingestion_method': 'scraper'
+            })
+        
+        return page_posts, page_stats, page_old_posts, page_threads
+
+    def _thread_is_stale(self, existing: Optional[dict], num_comments: int) -> bool:
+        """Whether a thread needs downloading: never fetched, or grown past the refresh threshold."""
+        if not existing or existing.get('comments_fetched_count') is None:
+            return True
+        grown = num_comments - existing['comments_fetched_count'] >= COMMENT_REFRESH_MIN_NEW
+        if grown:
+            self.stats["threads_refreshed"] += 1
+        return grown
+
     def _scrape_comments_json(self, post_id: str, subreddit_name: str):
         """Scrape comments from a post using JSON endpoint."""
+        data = self._request_with_retry(self._comments_url(post_id, subreddit_name))
+        self._save_comments_json(data, post_id)
+
+    def _comments_url(self, post_id: str, subreddit_name: str) -> str:
         simple_id = post_id.split('_')[1] if '_' in post_id else post_id
-        url = f"https://www.reddit.com/r/{subreddit_name}/comments/{simple_id}/.json"
-        
-        data = self._request_with_retry(url)
+        return f"https://www.reddit.com/r/{subreddit_name}/comments/{simple_id}/.json"
+
+    def _save_comments_json(self, data: Any, post_id: str) -> int:
+        """Save the comments of a comment-thread JSON response not stored yet. Returns new rows saved."""
         if not data or not isinstance(data, list) or len(data) < 2:
-            return
+            return 0
             
         try:
             comments_data = data[1].get('data', {}).get('children', [])
-            self._parse_json_comments(comments_data, post_id)
+            comments = self._parse_json_comments(comments_data, post_id)
+            # The thread response starts with the post itself: its num_comments is what we just fetched
+            listing = data[0].get('data', {}).get('children', []) if isinstance(data[0], dict) else []
+            num_comments = listing[0].get('data', {}).get('num_comments', len(comments)) if listing else len(comments)
+            return save_thread_comments(post_id, comments, num_comments)
         except Exception as e:
             print(f"DEBUG: Error parsing comments JSON: {e}", flush=True)
+            return 0
 
-    def _parse_json_comments(self, children: list, post_id: str, depth: int = 0):
-        """Recursively parse JSON comments."""
+    def _parse_json_comments(self, children: list, post_id: str, depth: int = 0, out: list = None) -> list:
+        """Recursively parse JSON comments into a flat list of comment rows."""
+        if out is None:
+            out = []
         for child in children:
             if child.get('kind') != 't1':
                 continue
@@ -264,20 +322,23 @@ class RedditScraper:
             if not c_id or not body:
                 continue
                 
-            save_comment({
+            out.append({
                 'id': c_id,
                 'post_id': post_id,
                 'author': data.get('author'),
                 'body': body,
                 'score': data.get('score', 0),
                 'created_at': datetime.fromtimestamp(data.get('created_utc', time.time())).isoformat(),
+                'created_utc': int(data.get('created_utc', time.time())),
                 'depth': depth
             })
             
             replies = data.get('replies')
             if replies and isinstance(replies, dict):
                 reply_children = replies.get('data', {}).get('children', [])
-                self._parse_json_comments(reply_children, post_id, depth + 1)
+                self._parse_json_comments(reply_children, post_id, depth + 1, out)
+        
+        return out
 
     def _get_backoff_delay(self, attempt: int) -> float:
         """Calculate exponential backoff delay with jitter."""
@@ -293,5 +354,16 @@ class RedditScraper:
         return {
             **self.stats,
             "success_rate": f"{(self.stats['success'] / total) * 100:.1f}%",
-            "current_delays": f"{self.min_delay:.1f}s - {self.max_delay:.1f}s",
+            "current_delays": ", ".join(f"{host} {p.bucket.rate:.2f} req/s" for host, p in self._pacers.items())
+                              or f"{self.rate:g} req/s",
+            "pacing": {host: p.state() for host, p in self._pacers.items()},
         }
+
+
+def create_scraper(user_id: str = None) -> RedditScraper:
+    """The scraper selected by SCRAPER_ENGINE ("async" or "sync")."""
+    from radar.config import SCRAPER_ENGINE
+    if SCRAPER_ENGINE == "async":
+        from radar.ingest.async_scraper import AsyncRedditScraper
+        return AsyncRedditScraper(user_id=user_id)
+    return RedditScraper(user_id=user_id)
@@ -5,7 +5,7 @@ from radar.process.embeddings import get_embeddings
 
 def calculate_similarity(vec1: List[float], vec2: List[float]) -> float:
     """Calculate cosine similarity between two normalized vectors."""
-    return np.dot(vec1, vec2)
+    return float(np.dot(vec1, vec2))
 
 def generate_product_context(product: Dict[str, Any]) -> str:
     """Combine name, description, and signals into a single semantic context string."""
@@ -51,7 +51,7 @@ class SemanticEngine:
             # Try to load cached embedding first
             cached_embedding = get_product_embedding(p_id, p_user_id)
             
-            if cached_embedding:
+            if cached_embedding is not None:
                 # Use cached embedding
                 self.product_embeddings[(p_user_id, p_id)] = cached_embedding
             else:
@@ -79,6 +79,6 @@ class SemanticEngine:
     def get_product_fit(self, post_embedding: List[float], product_key: str, user_id: str) -> float:
         """Get similarity score between a post and a specific product."""
         product_emb = self.product_embeddings.get((user_id, product_key))
-        if not product_emb:
+        if product_emb is None:
             return 0.0
         return calculate_similarity(post_embedding, product_emb)
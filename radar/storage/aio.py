@@ -0,0 +1,79 @@
+"""
+Async access to the (blocking) storage functions for FastAPI handlers.
+
+Storage calls run on dedicated, bounded thread pools instead of the event
+loop, so a slow query only occupies a worker thread:
+
+    rows = await run_db(get_lead_threads, user_id, product_id, limit)
+
+Two lanes keep monitoring independent of user traffic:
+  db      - every handler query (DB_ASYNC_WORKERS threads, kept below the
+            read pool size so a reader is always left for the health lane)
+  health  - /health pings (one thread), never queued behind slow queries
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from radar.config import DB_ASYNC_WORKERS
+
+LANE_SIZES = {
+    "db": DB_ASYNC_WORKERS,
+    "health": 1,
+}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+_stats = {lane: {"submitted": 0, "in_flight": 0, "max_in_flight": 0} for lane in LANE_SIZES}
+
+
+def _executor(lane: str) -> ThreadPoolExecutor:
+    executor = _executors.get(lane)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(lane)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=LANE_SIZES[lane], thread_name_prefix=f"radar-{lane}")
+                _executors[lane] = executor
+    return executor
+
+
+def _tracked(lane: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    with _lock:
+        stats = _stats[lane]
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with _lock:
+            _stats[lane]["in_flight"] -= 1
+
+
+async def run_db(fn: Callable, *args, lane: str = "db", **kwargs) -> Any:
+    """Await a blocking storage call on the given lane's thread pool."""
+    if lane not in LANE_SIZES:
+        raise ValueError(f"Unknown storage lane: {lane}")
+    with _lock:
+        _stats[lane]["submitted"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor(lane), functools.partial(_tracked, lane, fn, args, kwargs)
+    )
+
+
+def get_executor_stats() -> Dict[str, Dict[str, int]]:
+    """Per-lane counters (submitted, in_flight, max_in_flight, workers)."""
+    with _lock:
+        return {lane: dict(stats, workers=LANE_SIZES[lane]) for lane, stats in _stats.items()}
+
+
+def shutdown_executors(wait: bool = True):
+    """Stop the lane thread pools (e.g. on application shutdown)."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
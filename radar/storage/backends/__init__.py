@@ -0,0 +1,23 @@
+"""
+Pluggable storage backends.
+
+SQLite (the default) keeps everything in DATABASE_PATH. Setting DATABASE_URL
+to a postgresql:// URL switches radar.storage.db to the PostgreSQL backend.
+"""
+from typing import Optional
+
+from radar.storage.backends.base import StorageBackend, STORAGE_API
+from radar.storage.backends.sqlite import SQLiteBackend
+
+
+def create_backend(url: Optional[str] = None, **kwargs) -> StorageBackend:
+    """Build the backend for a database URL (None or sqlite:// -> SQLite)."""
+    if not url or url.startswith("sqlite"):
+        return SQLiteBackend(**kwargs)
+    if url.startswith(("postgres://", "postgresql://")):
+        from radar.storage.backends.postgres import PostgresBackend
+        return PostgresBackend(url, **kwargs)
+    raise ValueError(f"Unsupported DATABASE_URL scheme: {url.split(':', 1)[0]}")
+
+
+__all__ = ["StorageBackend", "STORAGE_API", "SQLiteBackend", "create_backend"]
@@ -0,0 +1,94 @@
+"""
+The storage contract shared by every backend.
+
+radar.storage.db exposes these names as module-level functions. With the
+default SQLite backend they are the functions defined in that module; when
+DATABASE_URL points at another database, db.py rebinds them to the methods
+of the configured backend, so callers never change their imports.
+"""
+from typing import List
+
+# Public storage functions every backend must provide
+STORAGE_API: List[str] = [
+    # lifecycle
+    "init_db",
+    "migrate_schema",
+    "ping",
+    "write_connection",
+    "read_connection",
+    "get_pool_stats",
+    "close_thread_connection",
+    "close_all_connections",
+    # posts / comments
+    "save_post",
+    "save_posts_bulk",
+    "update_post_stats",
+    "update_post_stats_bulk",
+    "save_comment",
+    "save_comments_bulk",
+    "save_thread_comments",
+    "get_post",
+    "get_comments",
+    "get_comments_bulk",
+    "search_posts",
+    "rebuild_search_index",
+    "train_text_dictionary",
+    "recompress_text",
+    # analysis / triage
+    "save_analysis",
+    "save_processed_batch",
+    "compact_post_analysis",
+    "get_existing_analysis",
+    "get_analysis",
+    "update_triage_status",
+    "get_triage_history",
+    "get_lead_threads",
+    "get_report_rows",
+    "prune_blobs",
+    "explain_query_plan",
+    # pending work
+    "get_work_high_water",
+    "get_work_cursor",
+    "advance_work_cursor",
+    "requeue_posts",
+    "iter_unprocessed_posts",
+    "get_unprocessed_posts",
+    # sync runs
+    "add_sync_run",
+    "update_sync_run_status",
+    "get_sync_history",
+    # products
+    "get_products",
+    "get_product",
+    "save_product_record",
+    "delete_product",
+    "update_product_embedding",
+    "get_product_embedding",
+    # responses / settings
+    "save_generated_response",
+    "get_generated_responses",
+    "update_response_feedback",
+    "get_user_setting",
+    "save_user_setting",
+    # retention
+    "find_expired_rows",
+    "export_expired_rows",
+    "purge_expired_rows",
+]
+
+
+class StorageBackend:
+    """Base class for storage backends. Subclasses implement every name in STORAGE_API."""
+
+    name = "base"
+
+    def missing_methods(self) -> List[str]:
+        """Names from STORAGE_API this backend does not implement."""
+        return [name for name in STORAGE_API if not callable(getattr(self, name, None))]
+
+    def api(self) -> dict:
+        """Mapping of STORAGE_API name -> bound implementation."""
+        missing = self.missing_methods()
+        if missing:
+            raise NotImplementedError(f"{type(self).__name__} is missing: {', '.join(missing)}")
+        return {name: getattr(self, name) for name in STORAGE_API}
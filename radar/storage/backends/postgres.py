@@ -0,0 +1,1163 @@
+"""
+PostgreSQL backend (optional; requires `pip install radar[postgres]`).
+
+Enabled by setting DATABASE_URL=postgresql://... . Connections come from a
+psycopg_pool ConnectionPool, bulk ingest loads rows with COPY into a
+transaction-scoped staging table followed by one INSERT ... ON CONFLICT, and
+the schema (including the pending_work change log) mirrors the SQLite one.
+
+Timestamps are stored as TEXT in the same 'YYYY-MM-DD HH:MM:SS' UTC format
+SQLite's CURRENT_TIMESTAMP produces, so rows look identical to API callers
+regardless of backend.
+"""
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from radar.storage.backends.base import StorageBackend
+from radar.storage.codecs import pack_vector, unpack_vector
+
+try:
+    import psycopg
+    from psycopg import sql as pg_sql
+    from psycopg.rows import dict_row
+    from psycopg_pool import ConnectionPool
+    HAS_PSYCOPG = True
+except ImportError:
+    HAS_PSYCOPG = False
+
+# SQL expression equivalent to SQLite's CURRENT_TIMESTAMP text
+NOW = "to_char(timezone('utc', now()), 'YYYY-MM-DD HH24:MI:SS')"
+
+# Queue (or requeue) a post; xid defaults to the current transaction's
+_ENQUEUE_SQL = f"""
+INSERT INTO pending_work (post_id, seq) VALUES (%s, nextval('pending_work_seq'))
+ON CONFLICT (post_id) DO UPDATE SET seq = excluded.seq, xid = excluded.xid, queued_at = {NOW}
+"""
+
+
+def _pg(query: str) -> str:
+    """Translate the portable `?` placeholders used in radar.storage.db to psycopg's `%s`."""
+    return query.replace("?", "%s")
+
+
+_BASELINE_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS posts (
+        id TEXT PRIMARY KEY,
+        platform TEXT NOT NULL,
+        source TEXT NOT NULL,
+        url TEXT,
+        title TEXT,
+        body TEXT,
+        author TEXT,
+        score BIGINT DEFAULT 0,
+        num_comments BIGINT DEFAULT 0,
+        created_at TEXT,
+        scraped_at TEXT DEFAULT {NOW},
+        ingestion_method TEXT,
+        embedding_id TEXT,
+        pain_signals TEXT,
+        intent TEXT,
+        relevance_score DOUBLE PRECISION DEFAULT 0,
+        ai_analysis TEXT,
+        semantic_similarity DOUBLE PRECISION DEFAULT 0,
+        community_score DOUBLE PRECISION DEFAULT 0,
+        last_processed_score BIGINT DEFAULT -1,
+        last_processed_comments BIGINT DEFAULT -1
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS comments (
+        id TEXT PRIMARY KEY,
+        post_id TEXT NOT NULL,
+        parent_id TEXT,
+        body TEXT,
+        author TEXT,
+        score BIGINT DEFAULT 0,
+        created_at TEXT,
+        scraped_at TEXT DEFAULT {NOW},
+        depth INTEGER DEFAULT 0,
+        embedding_id TEXT,
+        pain_signals TEXT,
+        is_solution BOOLEAN DEFAULT FALSE
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS post_analysis (
+        post_id TEXT,
+        product_id TEXT,
+        user_id TEXT DEFAULT 'default_user',
+        relevance_score DOUBLE PRECISION DEFAULT 0,
+        semantic_similarity DOUBLE PRECISION DEFAULT 0,
+        community_score DOUBLE PRECISION DEFAULT 0,
+        ai_analysis TEXT,
+        signals_json TEXT,
+        updated_at TEXT DEFAULT {NOW},
+        last_processed_score BIGINT DEFAULT -1,
+        last_processed_comments BIGINT DEFAULT -1,
+        triage_status TEXT,
+        triage_at TEXT,
+        triage_relevance_snapshot DOUBLE PRECISION,
+        triage_semantic_snapshot DOUBLE PRECISION,
+        PRIMARY KEY (post_id, product_id, user_id)
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS products (
+        id TEXT,
+        user_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT NOT NULL,
+        pain_signals TEXT NOT NULL,
+        intent_signals TEXT NOT NULL,
+        target_subreddits TEXT NOT NULL,
+        embedding_context TEXT,
+        embedding_id TEXT,
+        created_at TEXT DEFAULT {NOW},
+        updated_at TEXT DEFAULT {NOW},
+        website_url TEXT,
+        default_response_style TEXT DEFAULT 'empathetic',
+        embedding_vector BYTEA,
+        PRIMARY KEY (id, user_id)
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS sync_runs (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        user_id TEXT,
+        timestamp TEXT DEFAULT {NOW},
+        product TEXT,
+        subreddits TEXT,
+        days INTEGER,
+        status TEXT,
+        progress INTEGER DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS generated_responses (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        style TEXT NOT NULL DEFAULT 'empathetic',
+        response_text TEXT NOT NULL,
+        tokens_used INTEGER,
+        created_at TEXT DEFAULT {NOW},
+        feedback TEXT
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS triage_history (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        post_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        relevance_score DOUBLE PRECISION,
+        semantic_similarity DOUBLE PRECISION,
+        community_score DOUBLE PRECISION,
+        ai_analysis_snapshot TEXT,
+        created_at TEXT DEFAULT {NOW}
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_settings (
+        user_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT,
+        PRIMARY KEY (user_id, key)
+    )
+    """,
+    # Same hot-path indexes as SQLite migration 2
+    "CREATE INDEX IF NOT EXISTS idx_post_analysis_tenant_relevance ON post_analysis (user_id, product_id, relevance_score DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_comments_post_score ON comments (post_id, score DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_sync_runs_user_timestamp ON sync_runs (user_id, timestamp DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_generated_responses_tenant_created ON generated_responses (user_id, post_id, product_id, created_at DESC)",
+    # Pending work change log (SQLite migration 3), numbered by a real sequence.
+    # Sequence values can commit out of order, so work cursors here are
+    # transaction ids instead: every row records the xid that queued it.
+    "CREATE SEQUENCE IF NOT EXISTS pending_work_seq",
+    f"""
+    CREATE TABLE IF NOT EXISTS pending_work (
+        post_id TEXT PRIMARY KEY,
+        seq BIGINT NOT NULL,
+        xid BIGINT NOT NULL DEFAULT (pg_current_xact_id()::text::bigint),
+        queued_at TEXT DEFAULT {NOW}
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_pending_work_seq ON pending_work (seq)",
+    "CREATE INDEX IF NOT EXISTS idx_pending_work_xid ON pending_work (xid)",
+    f"""
+    CREATE TABLE IF NOT EXISTS work_cursors (
+        consumer TEXT PRIMARY KEY,
+        last_seq BIGINT NOT NULL DEFAULT 0,
+        updated_at TEXT DEFAULT {NOW}
+    )
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION radar_enqueue_post() RETURNS trigger AS $$
+    BEGIN
+        {_ENQUEUE_SQL.replace("%s", "NEW.id")};
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_posts_enqueue_insert
+    AFTER INSERT ON posts
+    FOR EACH ROW EXECUTE FUNCTION radar_enqueue_post()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_posts_enqueue_stats
+    AFTER UPDATE OF score, num_comments ON posts
+    FOR EACH ROW
+    WHEN (NEW.score IS DISTINCT FROM OLD.score
+          OR NEW.num_comments IS DISTINCT FROM OLD.num_comments)
+    EXECUTE FUNCTION radar_enqueue_post()
+    """,
+]
+
+# Full-text search: expression GIN indexes, maintained by Postgres itself.
+# Queries must repeat the exact expression for the planner to use the index.
+def _post_document(alias: str = "") -> str:
+    return f"to_tsvector('simple', coalesce({alias}title, '') || ' ' || coalesce({alias}body, ''))"
+
+
+def _comment_document(alias: str = "") -> str:
+    return f"to_tsvector('simple', coalesce({alias}body, ''))"
+
+
+_FULL_TEXT_SEARCH = [
+    f"CREATE INDEX IF NOT EXISTS idx_posts_fts ON posts USING GIN ({_post_document()})",
+    f"CREATE INDEX IF NOT EXISTS idx_comments_fts ON comments USING GIN ({_comment_document()})",
+]
+
+# Materialized /api/threads leaderboard (SQLite migration 6)
+_LEAD_INDEX = [
+    """
+    CREATE TABLE IF NOT EXISTS lead_index (
+        user_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        relevance_score DOUBLE PRECISION NOT NULL,
+        semantic_similarity DOUBLE PRECISION,
+        community_score DOUBLE PRECISION,
+        ai_analysis TEXT,
+        signals_json TEXT,
+        triage_status TEXT,
+        triage_relevance_snapshot DOUBLE PRECISION,
+        platform TEXT,
+        source TEXT,
+        url TEXT,
+        title TEXT,
+        author TEXT,
+        score BIGINT,
+        num_comments BIGINT,
+        created_at TEXT,
+        latest_response_id TEXT,
+        PRIMARY KEY (user_id, product_id, post_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_lead_index_rank ON lead_index (user_id, product_id, relevance_score DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_lead_index_post ON lead_index (post_id)",
+    """
+    INSERT INTO lead_index (
+        user_id, product_id, post_id, relevance_score, semantic_similarity, community_score,
+        ai_analysis, signals_json, triage_status, triage_relevance_snapshot,
+        platform, source, url, title, author, score, num_comments, created_at, latest_response_id
+    )
+    SELECT pa.user_id, pa.product_id, pa.post_id, pa.relevance_score, pa.semantic_similarity,
+           pa.community_score, pa.ai_analysis, pa.signals_json, pa.triage_status, pa.triage_relevance_snapshot,
+           p.platform, p.source, p.url, p.title, p.author, p.score, p.num_comments, p.created_at,
+           (SELECT gr.id FROM generated_responses gr
+            WHERE gr.user_id = pa.user_id AND gr.post_id = pa.post_id AND gr.product_id = pa.product_id
+            ORDER BY gr.created_at DESC LIMIT 1)
+    FROM post_analysis pa
+    JOIN posts p ON p.id = pa.post_id
+    WHERE pa.relevance_score > 0
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+# Content-addressed blobs (SQLite migration 7). Existing text is moved as 'raw';
+# Postgres already TOAST-compresses large values.
+_CONTENT_ADDRESSED_BLOBS = [
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        size BIGINT NOT NULL,
+        data BYTEA NOT NULL
+    )
+    """,
+    "ALTER TABLE post_analysis ADD COLUMN IF NOT EXISTS signals_hash TEXT",
+    "ALTER TABLE triage_history ADD COLUMN IF NOT EXISTS ai_analysis_hash TEXT",
+    "ALTER TABLE lead_index ADD COLUMN IF NOT EXISTS signals_hash TEXT",
+    """
+    INSERT INTO blobs (hash, codec, size, data)
+    SELECT DISTINCT encode(sha256(convert_to(text, 'UTF8')), 'hex'), 'raw',
+           octet_length(convert_to(text, 'UTF8')), convert_to(text, 'UTF8')
+    FROM (
+        SELECT signals_json AS text FROM post_analysis WHERE signals_json IS NOT NULL
+        UNION SELECT ai_analysis_snapshot FROM triage_history WHERE ai_analysis_snapshot IS NOT NULL
+    ) texts
+    ON CONFLICT (hash) DO NOTHING
+    """,
+    """
+    UPDATE post_analysis SET signals_hash = encode(sha256(convert_to(signals_json, 'UTF8')), 'hex'), signals_json = NULL
+    WHERE signals_json IS NOT NULL
+    """,
+    """
+    UPDATE triage_history
+    SET ai_analysis_hash = encode(sha256(convert_to(ai_analysis_snapshot, 'UTF8')), 'hex'), ai_analysis_snapshot = NULL
+    WHERE ai_analysis_snapshot IS NOT NULL
+    """,
+    """
+    UPDATE lead_index li SET signals_json = NULL, signals_hash = pa.signals_hash
+    FROM post_analysis pa
+    WHERE pa.user_id = li.user_id AND pa.product_id = li.product_id AND pa.post_id = li.post_id
+    """,
+]
+
+
+def _backfill_normalized_signals(conn):
+    """Move each post_analysis signals blob into post_signals + the row's own product matches."""
+    from radar.storage.codecs import decode_blob
+    rows = conn.execute("""
+        SELECT pa.post_id, pa.product_id, pa.user_id, b.codec, b.data
+        FROM post_analysis pa JOIN blobs b ON b.hash = pa.signals_hash
+    """).fetchall()
+    with conn.cursor() as cur:
+        for row in rows:
+            signals = json.loads(decode_blob(row['codec'], row['data']))
+            cur.executemany(
+                "INSERT INTO post_signals (post_id, intent) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                [(row['post_id'], intent) for intent in signals.get("intents", [])]
+            )
+            matches = signals.get("product_matches", {}).get(row['product_id']) or {}
+            pain, intents = matches.get("pain_points"), matches.get("intents")
+            cur.execute("""
+                UPDATE post_analysis SET pain_matches = %s, intent_matches = %s, signals_hash = NULL
+                WHERE post_id = %s AND product_id = %s AND user_id = %s
+            """, (json.dumps(pain) if pain else None, json.dumps(intents) if intents else None,
+                  row['post_id'], row['product_id'], row['user_id']))
+
+
+# Normalized signals (SQLite migration 8)
+_NORMALIZED_SIGNALS = [
+    """
+    CREATE TABLE IF NOT EXISTS post_signals (
+        post_id TEXT NOT NULL,
+        intent TEXT NOT NULL,
+        PRIMARY KEY (post_id, intent)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_post_signals_intent ON post_signals (intent, post_id)",
+    "ALTER TABLE post_analysis ADD COLUMN IF NOT EXISTS pain_matches TEXT",
+    "ALTER TABLE post_analysis ADD COLUMN IF NOT EXISTS intent_matches TEXT",
+    "ALTER TABLE lead_index ADD COLUMN IF NOT EXISTS pain_matches TEXT",
+    "ALTER TABLE lead_index ADD COLUMN IF NOT EXISTS intent_matches TEXT",
+    _backfill_normalized_signals,
+    """
+    UPDATE lead_index li SET signals_hash = NULL, pain_matches = pa.pain_matches, intent_matches = pa.intent_matches
+    FROM post_analysis pa
+    WHERE pa.user_id = li.user_id AND pa.product_id = li.product_id AND pa.post_id = li.post_id
+    """,
+    """
+    DELETE FROM blobs
+    WHERE hash NOT IN (SELECT ai_analysis_hash FROM triage_history WHERE ai_analysis_hash IS NOT NULL)
+    """,
+]
+
+
+def _put_blobs(cur, texts: List[Optional[str]]):
+    from radar.storage.db import _BLOB_INSERT_SQL, _blob_rows
+    rows = _blob_rows(texts)
+    if rows:
+        cur.executemany(_pg(_BLOB_INSERT_SQL), rows)
+
+
+def _load_post_intents(conn, post_ids: List[str]) -> Dict[str, List[str]]:
+    intents = {}
+    if post_ids:
+        rows = conn.execute(
+            "SELECT post_id, intent FROM post_signals WHERE post_id = ANY(%s)", (list(dict.fromkeys(post_ids)),)
+        ).fetchall()
+        for row in rows:
+            intents.setdefault(row['post_id'], []).append(row['intent'])
+    return intents
+
+
+# Below-floor "scored, not relevant" markers (SQLite migration 9)
+_ANALYSIS_MARKERS = [
+    """
+    CREATE TABLE IF NOT EXISTS analysis_markers (
+        user_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        processed_score BIGINT NOT NULL,
+        processed_comments BIGINT NOT NULL,
+        PRIMARY KEY (user_id, product_id, post_id)
+    )
+    """,
+]
+
+
+# Retention engine lookups (SQLite migration 10); posts/comments use the created_utc indexes of migration 8
+_RETENTION_INDEXES = [
+    # Legacy analyses without updated_at age from their post's creation time
+    f"""
+    UPDATE post_analysis SET updated_at = COALESCE(
+        (SELECT replace(substr(p.created_at, 1, 19), 'T', ' ') FROM posts p WHERE p.id = post_analysis.post_id),
+        {NOW}
+    ) WHERE updated_at IS NULL
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_post_analysis_updated_at ON post_analysis (updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_triage_history_post ON triage_history (post_id)",
+    "CREATE INDEX IF NOT EXISTS idx_generated_responses_post ON generated_responses (post_id)",
+]
+
+
+def _backfill_created_epochs(conn):
+    """created_utc from the scrapers' naive local-time created_at text."""
+    from radar.storage.migrations import _created_epochs
+    for table in ("posts", "comments"):
+        rows = conn.execute(f"SELECT id, created_at FROM {table} WHERE created_at IS NOT NULL").fetchall()
+        with conn.cursor() as cur:
+            cur.executemany(
+                f"UPDATE {table} SET created_utc = %s WHERE id = %s",
+                _created_epochs((row['id'], row['created_at']) for row in rows)
+            )
+
+
+# Integer Unix-time timestamps (SQLite migration 11); text timestamps are UTC
+_EPOCH_TIMESTAMPS = [
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS created_utc BIGINT",
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS scraped_utc BIGINT",
+    "ALTER TABLE comments ADD COLUMN IF NOT EXISTS created_utc BIGINT",
+    "ALTER TABLE comments ADD COLUMN IF NOT EXISTS scraped_utc BIGINT",
+    "ALTER TABLE lead_index ADD COLUMN IF NOT EXISTS created_utc BIGINT",
+    "ALTER TABLE sync_runs ADD COLUMN IF NOT EXISTS started_utc BIGINT",
+    _backfill_created_epochs,
+    "UPDATE posts SET scraped_utc = extract(epoch FROM scraped_at::timestamp)::bigint WHERE scraped_at IS NOT NULL",
+    "UPDATE comments SET scraped_utc = extract(epoch FROM scraped_at::timestamp)::bigint WHERE scraped_at IS NOT NULL",
+    "UPDATE lead_index li SET created_utc = p.created_utc FROM posts p WHERE p.id = li.post_id",
+    "UPDATE sync_runs SET started_utc = extract(epoch FROM timestamp::timestamp)::bigint WHERE timestamp IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_posts_created_utc ON posts (created_utc)",
+    "CREATE INDEX IF NOT EXISTS idx_comments_created_utc ON comments (created_utc)",
+    "CREATE INDEX IF NOT EXISTS idx_lead_index_created ON lead_index (user_id, product_id, created_utc)",
+]
+
+
+# Incremental comment refreshes (SQLite migration 13)
+_COMMENT_SYNC_STATE = [
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS comments_fetched_count INTEGER",
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS last_comment_fetch_utc BIGINT",
+    """
+    UPDATE posts SET
+        comments_fetched_count = num_comments,
+        last_comment_fetch_utc = (SELECT MAX(c.scraped_utc) FROM comments c WHERE c.post_id = posts.id)
+    WHERE EXISTS (SELECT 1 FROM comments c WHERE c.post_id = posts.id)
+    """,
+]
+
+
+# Shared helpers from radar.storage.db, with placeholders translated for psycopg
+def _save_post_intents(cur, analyses: List[Dict[str, Any]]):
+    from radar.storage.db import _save_post_intents as save_post_intents
+    save_post_intents(cur, analyses, _pg)
+
+
+def _refresh_leads(cur, keys: List[tuple]):
+    from radar.storage.db import _refresh_leads as refresh_leads
+    refresh_leads(cur, keys, _pg)
+
+
+def _refresh_lead_posts(cur, post_ids: List[str]):
+    from radar.storage.db import _refresh_lead_posts as refresh_lead_posts
+    refresh_lead_posts(cur, post_ids, _pg)
+
+
+def _store_analyses(cur, analyses: List[Dict[str, Any]]):
+    from radar.storage.db import _store_analyses as store_analyses
+    store_analyses(cur, analyses, sql=_pg, upsert_sql=_ANALYSIS_UPSERT_SQL, update_sql=_ANALYSIS_UPDATE_SQL)
+
+
+# (version, description, statements) in ascending version order
+MIGRATIONS = [
+    (1, "baseline schema", _BASELINE_SCHEMA),
+    (2, "full-text search", _FULL_TEXT_SEARCH),
+    (3, "lead index", _LEAD_INDEX),
+    (4, "content-addressed blobs", _CONTENT_ADDRESSED_BLOBS),
+    (5, "normalized signals", _NORMALIZED_SIGNALS),
+    (6, "analysis markers", _ANALYSIS_MARKERS),
+    (7, "retention indexes", _RETENTION_INDEXES),
+    (8, "epoch timestamps", _EPOCH_TIMESTAMPS),
+    (9, "comment sync state", _COMMENT_SYNC_STATE),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Upserts mirror SQLite's INSERT OR REPLACE: columns not supplied go back to their defaults
+_POST_COLUMNS = [
+    "id", "platform", "source", "url", "title", "body", "author",
+    "score", "num_comments", "created_at", "ingestion_method", "created_utc", "scraped_utc",
+]
+# Listing columns only, as in SQLite: embedding, processing and comment fetch state survive a re-save
+_POST_CONFLICT = f"""
+ON CONFLICT (id) DO UPDATE SET
+    platform = excluded.platform, source = excluded.source, url = excluded.url,
+    title = excluded.title, body = excluded.body, author = excluded.author,
+    score = excluded.score, num_comments = excluded.num_comments,
+    created_at = excluded.created_at, ingestion_method = excluded.ingestion_method,
+    created_utc = excluded.created_utc, scraped_utc = excluded.scraped_utc,
+    scraped_at = {NOW}
+"""
+
+_COMMENT_COLUMNS = [
+    "id", "post_id", "parent_id", "body", "author", "score", "created_at", "depth",
+    "created_utc", "scraped_utc",
+]
+_COMMENT_CONFLICT = f"""
+ON CONFLICT (id) DO UPDATE SET
+    post_id = excluded.post_id, parent_id = excluded.parent_id, body = excluded.body,
+    author = excluded.author, score = excluded.score, created_at = excluded.created_at,
+    depth = excluded.depth, created_utc = excluded.created_utc, scraped_utc = excluded.scraped_utc,
+    scraped_at = {NOW}, embedding_id = NULL,
+    pain_signals = NULL, is_solution = FALSE
+"""
+
+_ANALYSIS_UPSERT_SQL = f"""
+INSERT INTO post_analysis (
+    post_id, product_id, user_id, relevance_score, semantic_similarity,
+    community_score, ai_analysis, pain_matches, intent_matches, updated_at,
+    last_processed_score, last_processed_comments
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, {NOW}, %s, %s)
+ON CONFLICT (post_id, product_id, user_id) DO UPDATE SET
+    relevance_score = excluded.relevance_score,
+    semantic_similarity = excluded.semantic_similarity,
+    community_score = excluded.community_score,
+    ai_analysis = COALESCE(excluded.ai_analysis, post_analysis.ai_analysis),
+    pain_matches = excluded.pain_matches,
+    intent_matches = excluded.intent_matches,
+    last_processed_score = excluded.last_processed_score,
+    last_processed_comments = excluded.last_processed_comments,
+    updated_at = {NOW}
+"""
+
+_ANALYSIS_UPDATE_SQL = f"""
+UPDATE post_analysis SET
+    relevance_score = %s, semantic_similarity = %s, community_score = %s,
+    ai_analysis = COALESCE(%s, ai_analysis), pain_matches = %s, intent_matches = %s,
+    last_processed_score = %s, last_processed_comments = %s, updated_at = {NOW}
+WHERE post_id = %s AND product_id = %s AND user_id = %s
+"""
+
+
+class PostgresBackend(StorageBackend):
+    """psycopg 3 implementation of the storage API over a connection pool."""
+
+    name = "postgres"
+
+    def __init__(self, url: str, min_size: int = 1, max_size: int = 10, timeout: float = 30.0, schema: str = None):
+        if not HAS_PSYCOPG:
+            raise ImportError("PostgreSQL support requires psycopg: pip install 'radar[postgres]'")
+        self.url = url
+        self.schema = schema
+        kwargs = {"row_factory": dict_row}
+        if schema:
+            kwargs["options"] = f"-c search_path={schema}"
+        self._pool = ConnectionPool(
+            url, min_size=min_size, max_size=max_size, timeout=timeout,
+            kwargs=kwargs, open=True, name="radar",
+        )
+        self._initialized = False
+
+    # --- lifecycle ---------------------------------------------------------
+
+    @contextmanager
+    def write_connection(self):
+        """Pooled connection; commits on exit, rolls back on error."""
+        with self._pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def read_connection(self):
+        """Pooled connection for reads (Postgres readers never block writers)."""
+        with self._pool.connection() as conn:
+            yield conn
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        stats = self._pool.get_stats()
+        stats["backend"] = self.name
+        return stats
+
+    def close_thread_connection(self):
+        """Connections are returned to the pool after every call; nothing to do."""
+
+    def close_all_connections(self):
+        self._pool.close()
+
+    def ping(self) -> bool:
+        with self.read_connection() as conn:
+            conn.execute("SELECT 1")
+        return True
+
+    def _schema_version(self, conn) -> int:
+        row = conn.execute("SELECT to_regclass('schema_version') AS t").fetchone()
+        if row["t"] is None:
+            return 0
+        return conn.execute("SELECT COALESCE(MAX(version), 0) AS v FROM schema_version").fetchone()["v"]
+
+    def migrate_schema(self, dry_run: bool = False):
+        """Returns (version_before, latest_version, [(version, description), ...])."""
+        with self.write_connection() as conn:
+            if self.schema:
+                conn.execute(pg_sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(pg_sql.Identifier(self.schema)))
+            current = self._schema_version(conn)
+            pending = [(v, d) for v, d, _ in MIGRATIONS if v > current]
+            if dry_run or not pending:
+                return current, LATEST_VERSION, pending
+
+            # Serialises concurrent starters (API workers, Celery, CLI)
+            conn.execute("SELECT pg_advisory_xact_lock(hashtext('radar.schema_version'))")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TEXT DEFAULT {NOW}
+                )
+            """)
+            applied = []
+            for version, description, statements in MIGRATIONS:
+                if version <= self._schema_version(conn):
+                    continue
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                applied.append((version, description))
+        return current, LATEST_VERSION, applied
+
+    def init_db(self):
+        if self._initialized:
+            return
+        self.migrate_schema()
+        self._initialized = True
+
+    # --- posts / comments --------------------------------------------------
+
+    def _copy_upsert(self, table: str, columns: List[str], rows: List[tuple], conflict: str, after=None) -> int:
+        """
+        COPY rows into a staging table, then upsert them in one statement (last
+        duplicate wins). `after(cursor)` runs in the same transaction.
+        """
+        if not rows:
+            return 0
+        stage = f"_stage_{table}"
+        cols = ", ".join(columns)
+        with self.write_connection() as conn:
+            conn.execute(f"""
+                CREATE TEMP TABLE IF NOT EXISTS {stage}
+                (LIKE {table} INCLUDING DEFAULTS, _ord BIGINT) ON COMMIT DELETE ROWS
+            """)
+            with conn.cursor() as cur:
+                with cur.copy(f"COPY {stage} ({cols}, _ord) FROM STDIN") as copy:
+                    for ordinal, row in enumerate(rows):
+                        copy.write_row(row + (ordinal,))
+                cur.execute(f"""
+                    INSERT INTO {table} ({cols})
+                    SELECT DISTINCT ON (id) {cols} FROM {stage} ORDER BY id, _ord DESC
+                    {conflict}
+                """)
+                if after:
+                    after(cur)
+        return len(rows)
+
+    def save_post(self, post_data: Dict[str, Any]):
+        self.save_posts_bulk([post_data])
+
+    def save_posts_bulk(self, posts: List[Dict[str, Any]]) -> int:
+        from radar.storage.db import _post_params
+        return self._copy_upsert(
+            "posts", _POST_COLUMNS, [_post_params(p) for p in posts], _POST_CONFLICT,
+            after=lambda cur: _refresh_lead_posts(cur, [p['id'] for p in posts])
+        )
+
+    def update_post_stats(self, post_id: str, score: int, num_comments: int):
+        self.update_post_stats_bulk([(post_id, score, num_comments)])
+
+    def update_post_stats_bulk(self, stats: List[tuple]):
+        if not stats:
+            return
+        with self.write_connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(f"""
+                    UPDATE posts
+                    SET score = %s, num_comments = %s, scraped_at = {NOW}, scraped_utc = %s
+                    WHERE id = %s
+                """, [(score, num_comments, int(time.time()), post_id) for post_id, score, num_comments in stats])
+                _refresh_lead_posts(cur, [post_id for post_id, _, _ in stats])
+
+    def save_comment(self, comment_data: Dict[str, Any]):
+        self.save_comments_bulk([comment_data])
+
+    def save_comments_bulk(self, comments: List[Dict[str, Any]]) -> int:
+        from radar.storage.db import _comment_params
+        return self._copy_upsert("comments", _COMMENT_COLUMNS, [_comment_params(c) for c in comments], _COMMENT_CONFLICT)
+
+    def save_thread_comments(self, post_id: str, comments: List[Dict[str, Any]], num_comments: int) -> int:
+        from radar.storage.db import _comment_params
+        with self.write_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id FROM comments WHERE post_id = %s", (post_id,))
+                known = {row['id'] for row in cur.fetchall()}
+                new = [c for c in {c['id']: c for c in comments}.values() if c['id'] not in known]
+                if new:
+                    cur.executemany(f"""
+                        INSERT INTO comments ({", ".join(_COMMENT_COLUMNS)})
+                        VALUES ({", ".join(["%s"] * len(_COMMENT_COLUMNS))})
+                        ON CONFLICT (id) DO NOTHING
+                    """, [_comment_params(c) for c in new])
+                cur.execute(
+                    "UPDATE posts SET comments_fetched_count = %s, last_comment_fetch_utc = %s WHERE id = %s",
+                    (num_comments, int(time.time()), post_id)
+                )
+                if new and known:
+                    cur.execute(_ENQUEUE_SQL, (post_id,))
+        return len(new)
+
+    def search_posts(self, query: str, subreddit: str = None, since=None, limit: int = 50, include_comments: bool = True) -> List[Dict[str, Any]]:
+        """Same contract as the SQLite version; rank is negated ts_rank so lower is better."""
+        from radar.storage.db import _search_filters
+        if not (query or "").strip():
+            return []
+        filters, filter_params = _search_filters(subreddit, since)
+        columns = "p.id, p.platform, p.source, p.url, p.title, p.author, p.score, p.num_comments, p.created_at"
+        searches = [("post", f"""
+            SELECT {columns},
+                   ts_headline('simple', coalesce(p.title, '') || ' ' || coalesce(p.body, ''), q,
+                               'StartSel=[, StopSel=], MaxWords=16, MinWords=4') AS snippet,
+                   -ts_rank({_post_document("p.")}, q) AS rank
+            FROM posts p, websearch_to_tsquery('simple', %s) q
+            WHERE {_post_document("p.")} @@ q {_pg(filters)}
+            ORDER BY rank LIMIT %s
+        """)]
+        if include_comments:
+            searches.append(("comment", f"""
+                SELECT {columns},
+                       ts_headline('simple', coalesce(c.body, ''), q,
+                                   'StartSel=[, StopSel=], MaxWords=16, MinWords=4') AS snippet,
+                       -ts_rank({_comment_document("c.")}, q) AS rank
+                FROM comments c JOIN posts p ON p.id = c.post_id, websearch_to_tsquery('simple', %s) q
+                WHERE {_comment_document("c.")} @@ q {_pg(filters)}
+                ORDER BY rank LIMIT %s
+            """))
+
+        best = {}
+        with self.read_connection() as conn:
+            for matched_in, sql in searches:
+                for row in conn.execute(sql, [query] + filter_params + [limit]).fetchall():
+                    row['matched_in'] = matched_in
+                    if row['id'] not in best or row['rank'] < best[row['id']]['rank']:
+                        best[row['id']] = row
+        return sorted(best.values(), key=lambda hit: hit['rank'])[:limit]
+
+    def rebuild_search_index(self):
+        """GIN expression indexes are maintained by Postgres; nothing to rebuild."""
+
+    def train_text_dictionary(self, samples: int = 5000):
+        """Bodies are compressed by TOAST; there is no dictionary to train."""
+        return None
+
+    def recompress_text(self, batch_size: int = 500) -> int:
+        """Bodies are compressed by TOAST; nothing to rewrite."""
+        return 0
+
+    def get_post(self, post_id: str):
+        with self.read_connection() as conn:
+            return conn.execute("SELECT * FROM posts WHERE id = %s", (post_id,)).fetchone()
+
+    def get_comments(self, post_id: str):
+        from radar.storage.db import _COMMENTS_SQL
+        with self.read_connection() as conn:
+            return conn.execute(_pg(_COMMENTS_SQL), (post_id,)).fetchall()
+
+    def get_comments_bulk(self, post_ids: List[str]) -> Dict[str, List[Dict]]:
+        if not post_ids:
+            return {}
+        with self.read_connection() as conn:
+            rows = conn.execute("""
+                SELECT * FROM comments
+                WHERE post_id = ANY(%s)
+                ORDER BY post_id, score DESC
+            """, (list(post_ids),)).fetchall()
+        result = {pid: [] for pid in post_ids}
+        for row in rows:
+            result[row['post_id']].append(row)
+        return result
+
+    # --- analysis / triage -------------------------------------------------
+
+    def save_analysis(self, post_id: str, product_id: str, user_id: str, data: Dict[str, Any], cursor=None):
+        analysis = dict(data, post_id=post_id, product_id=product_id, user_id=user_id)
+        if cursor:
+            _store_analyses(cursor, [analysis])
+        else:
+            with self.write_connection() as conn:
+                with conn.cursor() as cur:
+                    _store_analyses(cur, [analysis])
+
+    def save_processed_batch(self, analyses: List[Dict[str, Any]], processed_posts: List[Dict[str, Any]]):
+        from radar.storage.db import _MARK_PROCESSED_SQL
+        with self.write_connection() as conn:
+            with conn.cursor() as cur:
+                if analyses:
+                    _store_analyses(cur, analyses)
+                if processed_posts:
+                    cur.executemany(_pg(_MARK_PROCESSED_SQL), [
+                        (p['score'], p['num_comments'], p['id'], p['id']) for p in processed_posts
+                    ])
+
+    def compact_post_analysis(self, floor: float = None) -> int:
+        from radar.storage.db import _COMPACT_SPARSE, _MARKERS_FROM_ANALYSIS_SQL
+        from radar.config import ANALYSIS_STORAGE_FLOOR
+        floor = ANALYSIS_STORAGE_FLOOR if floor is None else floor
+        sparse = _pg(_COMPACT_SPARSE)
+        with self.write_connection() as conn:
+            conn.execute(_MARKERS_FROM_ANALYSIS_SQL.format(where=sparse), (floor,))
+            conn.execute(f"DELETE FROM lead_index WHERE {sparse}", (floor,))
+            return conn.execute(f"DELETE FROM post_analysis WHERE {sparse}", (floor,)).rowcount
+
+    def get_existing_analysis(self, post_id: str, product_id: str, user_id: str):
+        with self.read_connection() as conn:
+            return conn.execute("""
+                SELECT ai_analysis, relevance_score, semantic_similarity
+                FROM post_analysis
+                WHERE post_id = %s AND product_id = %s AND user_id = %s
+            """, (post_id, product_id, user_id)).fetchone()
+
+    def get_analysis(self, post_id: str, product_id: str, user_id: str = None):
+        from radar.storage.db import _with_signals
+        with self.read_connection() as conn:
+            if user_id:
+                row = conn.execute(
+                    "SELECT * FROM post_analysis WHERE post_id = %s AND product_id = %s AND user_id = %s",
+                    (post_id, product_id, user_id)
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT * FROM post_analysis WHERE post_id = %s AND product_id = %s",
+                    (post_id, product_id)
+                ).fetchone()
+            if not row:
+                return None
+            return _with_signals([row], _load_post_intents(conn, [row['post_id']]))[0]
+
+    def update_triage_status(self, user_id: str, product_id: str, post_id: str, status: str):
+        from radar.storage.db import _text_hash
+        with self.write_connection() as conn:
+            current = conn.execute("""
+                SELECT relevance_score, semantic_similarity, community_score, ai_analysis
+                FROM post_analysis
+                WHERE post_id = %s AND product_id = %s AND user_id = %s
+                FOR UPDATE
+            """, (post_id, product_id, user_id)).fetchone()
+            if not current:
+                return
+            conn.execute(f"""
+                UPDATE post_analysis
+                SET triage_status = %s, triage_at = {NOW}, updated_at = {NOW},
+                    triage_relevance_snapshot = %s, triage_semantic_snapshot = %s
+                WHERE post_id = %s AND product_id = %s AND user_id = %s
+            """, (status, current['relevance_score'], current['semantic_similarity'], post_id, product_id, user_id))
+            with conn.cursor() as cur:
+                _put_blobs(cur, [current['ai_analysis']])
+                cur.execute("""
+                    INSERT INTO triage_history (
+                        post_id, product_id, user_id, status,
+                        relevance_score, semantic_similarity, community_score, ai_analysis_hash
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    post_id, product_id, user_id, status if status is not None else "null",
+                    current['relevance_score'], current['semantic_similarity'],
+                    current['community_score'], _text_hash(current['ai_analysis'])
+                ))
+                _refresh_leads(cur, [(user_id, product_id, post_id)])
+
+    def get_lead_threads(self, user_id: str, product_id: str, limit: int = 50, intent: str = None,
+                         since=None, until=None) -> List[Dict[str, Any]]:
+        from radar.storage.db import _threads_query, _with_signals
+        query, params = _threads_query(user_id, product_id, limit, intent, since, until)
+        with self.read_connection() as conn:
+            rows = conn.execute(_pg(query), params).fetchall()
+            return _with_signals(rows, _load_post_intents(conn, [row['id'] for row in rows]), post_key='id')
+
+    def prune_blobs(self) -> int:
+        from radar.storage.db import _BLOB_PRUNE_SQL
+        with self.write_connection() as conn:
+            return conn.execute(_BLOB_PRUNE_SQL).rowcount
+
+    def get_triage_history(self, user_id: str = None, product_id: str = None, post_id: str = None, limit: int = None) -> List[Dict[str, Any]]:
+        from radar.storage.db import _triage_history_query, _triage_row
+        query, params = _triage_history_query(user_id, product_id, post_id, limit)
+        with self.read_connection() as conn:
+            return [_triage_row(row) for row in conn.execute(_pg(query), params).fetchall()]
+
+    def get_report_rows(self, product_id: str, mode: str = "DIRECT_FIT", limit: int = 20) -> List[Dict[str, Any]]:
+        from radar.storage.db import _REPORT_SQL, REPORT_MODES, _DEFAULT_REPORT_MODE
+        where, order_by = REPORT_MODES.get(mode, _DEFAULT_REPORT_MODE)
+        with self.read_connection() as conn:
+            return conn.execute(_pg(_REPORT_SQL.format(where=where, order_by=order_by)), (product_id, limit)).fetchall()
+
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        with self.read_connection() as conn:
+            rows = conn.execute(f"EXPLAIN {_pg(query)}", params).fetchall()
+        return [row["QUERY PLAN"] for row in rows]
+
+    # --- pending work ------------------------------------------------------
+
+    def get_work_high_water(self) -> int:
+        """
+        The oldest transaction id still running: every row queued by an
+        older transaction is committed (or gone), so a cursor moved here
+        skips nothing. MAX(seq) would skip a lower seq committed later.
+        """
+        with self.read_connection() as conn:
+            return conn.execute(
+                "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS xid"
+            ).fetchone()["xid"]
+
+    def get_work_cursor(self, user_id: str = None, product_id: str = None, subreddit_filter: List[str] = None) -> Optional[int]:
+        from radar.storage.db import work_consumer
+        with self.read_connection() as conn:
+            row = conn.execute(
+                "SELECT last_seq FROM work_cursors WHERE consumer = %s",
+                (work_consumer(user_id, product_id, subreddit_filter),)
+            ).fetchone()
+        return row["last_seq"] if row else None
+
+    def advance_work_cursor(self, user_id: str = None, product_id: str = None, subreddit_filter: List[str] = None, seq: int = 0):
+        from radar.storage.db import work_consumer
+        with self.write_connection() as conn:
+            conn.execute(f"""
+                INSERT INTO work_cursors (consumer, last_seq, updated_at) VALUES (%s, %s, {NOW})
+                ON CONFLICT (consumer) DO UPDATE SET
+                    last_seq = GREATEST(work_cursors.last_seq, excluded.last_seq),
+                    updated_at = {NOW}
+            """, (work_consumer(user_id, product_id, subreddit_filter), seq))
+
+    def requeue_posts(self, post_ids: List[str]):
+        if not post_ids:
+            return
+        with self.write_connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(_ENQUEUE_SQL, [(post_id,) for post_id in post_ids])
+
+    def iter_unprocessed_posts(self, subreddit_filter: List[str] = None, limit: int = None, force: bool = False, user_id: str = None, product_id: str = None, batch_size: int = 50,
+                               since=None, until=None):
+        from radar.storage.db import _unprocessed_query, _unprocessed_page
+        last_seq = None if force else self.get_work_cursor(user_id, product_id, subreddit_filter)
+        source, conditions, join_params, where_params, key_column = _unprocessed_query(
+            subreddit_filter, force, user_id, product_id, last_seq, since, until, cursor_condition="w.xid >= ?"
+        )
+        last_key = None
+        remaining = limit
+
+        while remaining is None or remaining > 0:
+            page_size = batch_size if remaining is None else min(batch_size, remaining)
+            query, params = _unprocessed_page(
+                source, conditions, join_params, where_params, key_column, last_key, page_size
+            )
+            with self.read_connection() as conn:
+                rows = conn.execute(_pg(query), params).fetchall()
+            if not rows:
+                return
+            last_key = rows[-1]['_page_key']
+            for row in rows:
+                del row['_page_key']
+            yield rows
+
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < page_size:
+                return
+
+    def get_unprocessed_posts(self, subreddit_filter: List[str] = None, limit: int = None, force: bool = False, user_id: str = None, product_id: str = None,
+                              since=None, until=None):
+        posts = []
+        for batch in self.iter_unprocessed_posts(subreddit_filter, limit, force, user_id, product_id, batch_size=500, since=since, until=until):
+            posts.extend(batch)
+        return posts
+
+    # --- sync runs -----------------------------------------------------------
+
+    def add_sync_run(self, user_id: str, product: str, subreddits: List[str], days: int):
+        with self.write_connection() as conn:
+            return conn.execute("""
+                INSERT INTO sync_runs (user_id, product, subreddits, days, status, progress, started_utc)
+                VALUES (%s, %s, %s, %s, 'Running', 0, %s)
+                RETURNING id
+            """, (user_id, product, ', '.join(subreddits), days, int(time.time()))).fetchone()["id"]
+
+    def update_sync_run_status(self, run_id: int, status: str, progress: int):
+        with self.write_connection() as conn:
+            conn.execute("UPDATE sync_runs SET status = %s, progress = %s WHERE id = %s", (status, progress, run_id))
+
+    def get_sync_history(self, user_id: str = None, limit: int = 10):
+        from radar.storage.db import _SYNC_HISTORY_SQL
+        with self.read_connection() as conn:
+            if user_id:
+                return conn.execute(_pg(_SYNC_HISTORY_SQL), (user_id, limit)).fetchall()
+            return conn.execute("SELECT * FROM sync_runs ORDER BY timestamp DESC LIMIT %s", (limit,)).fetchall()
+
+    # --- products ----------------------------------------------------------
+
+    def get_products(self, user_id: str = None) -> List[Dict[str, Any]]:
+        from radar.storage.db import _product_row
+        with self.read_connection() as conn:
+            if user_id:
+                rows = conn.execute("SELECT * FROM products WHERE user_id = %s ORDER BY name ASC", (user_id,)).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM products ORDER BY name ASC").fetchall()
+        return [_product_row(row) for row in rows]
+
+    def get_product(self, product_id: str, user_id: str = None) -> Optional[Dict[str, Any]]:
+        from radar.storage.db import _product_row
+        with self.read_connection() as conn:
+            if user_id:
+                row = conn.execute("SELECT * FROM products WHERE id = %s AND user_id = %s", (product_id, user_id)).fetchone()
+            else:
+                row = conn.execute("SELECT * FROM products WHERE id = %s", (product_id,)).fetchone()
+        return _product_row(row) if row else None
+
+    def save_product_record(self, product_data: Dict[str, Any]):
+        def as_json(value):
+            return value if isinstance(value, str) else json.dumps(value)
+
+        with self.write_connection() as conn:
+            conn.execute(f"""
+            INSERT INTO products (
+                id, user_id, name, description, pain_signals, intent_signals,
+                target_subreddits, embedding_context, embedding_id, updated_at, website_url, default_response_style
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, {NOW}, %s, %s)
+            ON CONFLICT (id, user_id) DO UPDATE SET
+                name = excluded.name, description = excluded.description,
+                pain_signals = excluded.pain_signals, intent_signals = excluded.intent_signals,
+                target_subreddits = excluded.target_subreddits,
+                embedding_context = excluded.embedding_context, embedding_id = excluded.embedding_id,
+                website_url = excluded.website_url, default_response_style = excluded.default_response_style,
+                created_at = {NOW}, updated_at = {NOW}, embedding_vector = NULL
+            """, (
+                product_data['id'],
+                product_data['user_id'],
+                product_data['name'],
+                product_data['description'],
+                as_json(product_data['pain_signals']),
+                as_json(product_data['intent_signals']),
+                as_json(product_data['target_subreddits']),
+                product_data.get('embedding_context'),
+                product_data.get('embedding_id'),
+                product_data.get('website_url'),
+                product_data.get('default_response_style', 'empathetic')
+            ))
+
+    def delete_product(self, product_id: str, user_id: str):
+        with self.write_connection() as conn:
+            conn.execute("DELETE FROM products WHERE id = %s AND user_id = %s", (product_id, user_id))
+
+    def update_product_embedding(self, product_id: str, user_id: str, embedding: List[float], context: str = None):
+        embedding_blob = pack_vector(embedding)
+        with self.write_connection() as conn:
+            if context:
+                conn.execute(f"""
+                    UPDATE products
+                    SET embedding_vector = %s, embedding_context = %s, updated_at = {NOW}
+                    WHERE id = %s AND user_id = %s
+                """, (embedding_blob, context, product_id, user_id))
+            else:
+                conn.execute(f"""
+                    UPDATE products
+                    SET embedding_vector = %s, updated_at = {NOW}
+                    WHERE id = %s AND user_id = %s
+                """, (embedding_blob, product_id, user_id))
+
+    def get_product_embedding(self, product_id: str, user_id: str) -> Optional[np.ndarray]:
+        with self.read_connection() as conn:
+            row = conn.execute("""
+                SELECT embedding_vector FROM products
+                WHERE id = %s AND user_id = %s
+            """, (product_id, user_id)).fetchone()
+        return unpack_vector(row["embedding_vector"]) if row else None
+
+    # --- responses / settings ----------------------------------------------
+
+    def save_generated_response(self, user_id: str, post_id: str, product_id: str, style: str, response_text: str, tokens_used: int):
+        from radar.storage.db import _LEAD_RESPONSE_SQL
+        response_id = str(uuid.uuid4())[:8]
+        with self.write_connection() as conn:
+            conn.execute("""
+                INSERT INTO generated_responses (id, user_id, post_id, product_id, style, response_text, tokens_used)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (response_id, user_id, post_id, product_id, style, response_text, tokens_used))
+            conn.execute(_pg(_LEAD_RESPONSE_SQL), (response_id, user_id, product_id, post_id))
+        return response_id
+
+    def get_generated_responses(self, user_id: str, post_id: str, product_id: str, limit: int = 5):
+        from radar.storage.db import _GENERATED_RESPONSES_SQL
+        with self.read_connection() as conn:
+            return conn.execute(_pg(_GENERATED_RESPONSES_SQL), (user_id, post_id, product_id, limit)).fetchall()
+
+    def update_response_feedback(self, response_id: str, feedback: str):
+        with self.write_connection() as conn:
+            conn.execute("UPDATE generated_responses SET feedback = %s WHERE id = %s", (feedback, response_id))
+
+    def get_user_setting(self, user_id: str, key: str, default: Any = None) -> Any:
+        with self.read_connection() as conn:
+            row = conn.execute("SELECT value FROM user_settings WHERE user_id = %s AND key = %s", (user_id, key)).fetchone()
+        if row:
+            try:
+                return json.loads(row["value"])
+            except (TypeError, ValueError):
+                return row["value"]
+        return default
+
+    def save_user_setting(self, user_id: str, key: str, value: Any):
+        val_str = json.dumps(value) if not isinstance(value, str) else value
+        with self.write_connection() as conn:
+            conn.execute("""
+                INSERT INTO user_settings (user_id, key, value) VALUES (%s, %s, %s)
+                ON CONFLICT (user_id, key) DO UPDATE SET value = excluded.value
+            """, (user_id, key, val_str))
+
+    # --- retention ---------------------------------------------------------
+
+    def find_expired_rows(self, table: str, cutoff, limit: int = None) -> List:
+        from radar.storage.db import _expired_keys
+        with self.read_connection() as conn:
+            with conn.cursor() as cur:
+                return _expired_keys(cur, table, cutoff, limit, sql=_pg)
+
+    def export_expired_rows(self, table: str, keys: List) -> Dict[str, List[Dict[str, Any]]]:
+        from radar.storage.db import _export_rows
+        with self.read_connection() as conn:
+            with conn.cursor() as cur:
+                return _export_rows(cur, table, keys, sql=_pg)
+
+    def purge_expired_rows(self, table: str, cutoff, keys: List) -> List:
+        # Search is an expression index here, so deleting the rows is enough
+        from radar.storage.db import _purge_rows
+        with self.write_connection() as conn:
+            with conn.cursor() as cur:
+                return _purge_rows(cur, table, cutoff, keys, sql=_pg)
@@ -0,0 +1,17 @@
+"""
+SQLite backend: the module-level functions of radar.storage.db, as a backend object.
+"""
+from radar.storage.backends.base import StorageBackend, STORAGE_API
+
+
+class SQLiteBackend(StorageBackend):
+    """Binds the SQLite implementations in radar.storage.db."""
+
+    name = "sqlite"
+
+    def __init__(self, module=None):
+        if module is None:
+            from radar.storage import db as module
+        # Captured at construction, so rebinding db's globals later cannot recurse
+        for name in STORAGE_API:
+            setattr(self, name, getattr(module, name))
@@ -0,0 +1,191 @@
+"""
+Online backups of radar.db and the Chroma store.
+
+A backup is a timestamped directory under BACKUP_PATH holding radar.db,
+chroma/ and manifest.json (row counts per table, vector counts per
+collection). The SQLite copy uses the online backup API a few pages per
+step, reading from one pinned WAL snapshot: writers keep committing while
+it runs, and their commits neither block the copy nor restart it. Chroma's
+segment files are copied first and its own SQLite file last, so the copy's
+metadata is never behind its indexes (Chroma replays the difference from
+its queue when the snapshot is opened).
+
+restore_backup() copies a backup into place and checks the restored row
+and vector counts against the manifest.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from radar.config import BACKUP_PATH, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_PAUSE, DATABASE_URL
+from radar.storage.compression import register_text_functions
+
+MANIFEST = "manifest.json"
+_CHROMA_DB = "chroma.sqlite3"
+
+
+def copy_sqlite(source: str, dest: str, pages: int = None, pause: float = None) -> int:
+    """
+    Copy a live SQLite database with the online backup API, `pages` pages
+    per step and `pause` seconds between steps. Returns the pages copied.
+    """
+    pages = pages or BACKUP_PAGES_PER_STEP
+    pause = BACKUP_STEP_PAUSE if pause is None else pause
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True, timeout=30, isolation_level=None)
+    dst = sqlite3.connect(dest)
+    # The FTS tables read their content through radar_text() views
+    register_text_functions(src)
+    register_text_functions(dst)
+    copied = []
+
+    def _progress(status, remaining, total):
+        copied.append(total)
+        if pause and remaining:
+            time.sleep(pause)
+
+    try:
+        # Pin one snapshot: commits from other connections would otherwise restart the copy
+        src.execute("BEGIN")
+        src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        src.backup(dst, pages=pages, progress=_progress)
+        src.execute("COMMIT")
+    finally:
+        src.close()
+        dst.close()
+    return copied[-1] if copied else 0
+
+
+def _row_counts(path: str) -> Dict[str, int]:
+    """Rows per table, leaving out virtual tables (FTS) and their shadow tables."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    register_text_functions(conn)
+    try:
+        tables = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        virtual = [name for name, sql in tables if (sql or "").upper().startswith("CREATE VIRTUAL")]
+        return {
+            name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            for name, _ in tables
+            if name not in virtual and not any(name.startswith(f"{v}_") for v in virtual)
+        }
+    finally:
+        conn.close()
+
+
+def _vector_counts(path: str) -> Dict[str, int]:
+    """Vectors per Chroma collection (opening the store proves it loads)."""
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    return {collection.name: collection.count() for collection in client.list_collections()}
+
+
+def snapshot_chroma(source: str, dest: str, pages: int = None, pause: float = None):
+    """Copy a Chroma persistent directory: segment files first, then its SQLite file online."""
+    shutil.copytree(source, dest, ignore=shutil.ignore_patterns(f"{_CHROMA_DB}*"))
+    if os.path.exists(os.path.join(source, _CHROMA_DB)):
+        copy_sqlite(os.path.join(source, _CHROMA_DB), os.path.join(dest, _CHROMA_DB), pages, pause)
+
+
+def _prune_backups(root: str, keep: int):
+    backups = sorted(d for d in os.listdir(root) if d.startswith("radar-") and os.path.isdir(os.path.join(root, d)))
+    for name in backups[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        print(f"DEBUG: pruned backup {name}")
+
+
+def create_backup(dest_root: str = None, pages: int = None, pause: float = None, vectors: bool = True,
+                  keep: int = None) -> Dict[str, Any]:
+    """
+    Back up radar.db (SQLite only; use pg_dump for Postgres) and, with
+    `vectors`, the Chroma store into a new directory under `dest_root`,
+    then prune all but the newest `keep` backups. Returns the manifest.
+    """
+    from radar.storage import db
+    from radar.storage import vectors as vector_store
+
+    dest_root = dest_root or BACKUP_PATH
+    keep = BACKUP_KEEP if keep is None else keep
+    started = time.time()
+    dest = base = os.path.join(dest_root, datetime.utcnow().strftime("radar-%Y%m%d-%H%M%S"))
+    suffix = 1
+    while os.path.exists(dest):
+        suffix += 1
+        dest = f"{base}.{suffix}"
+    os.makedirs(dest)
+
+    manifest = {'created_at': datetime.utcnow().isoformat() + "Z", 'database': None, 'rows': {},
+                'chroma': None, 'vectors': {}}
+    if DATABASE_URL:
+        print("DEBUG: backup skips the Postgres database (back it up with pg_dump)")
+    else:
+        db_copy = os.path.join(dest, "radar.db")
+        manifest['pages'] = copy_sqlite(db.DATABASE_PATH, db_copy, pages, pause)
+        manifest['database'] = "radar.db"
+        manifest['rows'] = _row_counts(db_copy)
+    if vectors and os.path.isdir(vector_store.CHROMA_PATH):
+        chroma_copy = os.path.join(dest, "chroma")
+        snapshot_chroma(vector_store.CHROMA_PATH, chroma_copy, pages, pause)
+        manifest['chroma'] = "chroma"
+        manifest['vectors'] = _vector_counts(chroma_copy)
+    manifest['seconds'] = round(time.time() - started, 3)
+    manifest['path'] = dest
+
+    with open(os.path.join(dest, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"DEBUG: backup written to {dest} in {manifest['seconds']}s")
+    _prune_backups(dest_root, keep)
+    return manifest
+
+
+def latest_backup(root: str = None) -> Optional[str]:
+    """Newest backup directory under `root` (BACKUP_PATH), or None."""
+    root = root or BACKUP_PATH
+    if not os.path.isdir(root):
+        return None
+    backups = sorted(d for d in os.listdir(root) if os.path.exists(os.path.join(root, d, MANIFEST)))
+    return os.path.join(root, backups[-1]) if backups else None
+
+
+def restore_backup(backup_dir: str, db_path: str = None, chroma_path: str = None,
+                   overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Restore a backup to `db_path` / `chroma_path` (defaults: the live
+    locations) and verify it. Existing targets are replaced only with
+    `overwrite`. Returns {'ok', 'rows', 'vectors'} where rows/vectors map
+    each name to (expected, restored) counts; ok is False on any mismatch.
+    """
+    from radar.storage import db
+    from radar.storage import vectors as vector_store
+
+    with open(os.path.join(backup_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    db_path = db_path or db.DATABASE_PATH
+    chroma_path = chroma_path or vector_store.CHROMA_PATH
+    targets = ([db_path] if manifest['database'] else []) + ([chroma_path] if manifest['chroma'] else [])
+    existing = [path for path in targets if os.path.exists(path)]
+    if existing and not overwrite:
+        raise FileExistsError(f"refusing to overwrite {', '.join(existing)} (pass overwrite=True)")
+
+    report = {'ok': True, 'rows': {}, 'vectors': {}}
+    if manifest['database']:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # Through the backup API, so a target in WAL mode is replaced consistently
+        copy_sqlite(os.path.join(backup_dir, manifest['database']), db_path, pages=-1, pause=0)
+        report['rows'] = _compare(manifest['rows'], _row_counts(db_path))
+    if manifest['chroma']:
+        if os.path.exists(chroma_path):
+            shutil.rmtree(chroma_path)
+        shutil.copytree(os.path.join(backup_dir, manifest['chroma']), chroma_path)
+        report['vectors'] = _compare(manifest['vectors'], _vector_counts(chroma_path))
+    report['ok'] = all(expected == restored for expected, restored in
+                       list(report['rows'].values()) + list(report['vectors'].values()))
+    return report
+
+
+def _compare(expected: Dict[str, int], restored: Dict[str, int]) -> Dict[str, tuple]:
+    return {name: (expected.get(name), restored.get(name)) for name in sorted(set(expected) | set(restored))}
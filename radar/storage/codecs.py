@@ -0,0 +1,91 @@
+"""
+Compact binary encodings for values stored in SQLite.
+"""
+import hashlib
+import json
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Union
+import numpy as np
+
+# Little-endian float32, 4 bytes per dimension
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+def pack_vector(vector: Union[List[float], np.ndarray]) -> bytes:
+    """Encode an embedding as a packed float32 BLOB."""
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def unpack_vector(value: Union[bytes, str, None]) -> Optional[np.ndarray]:
+    """
+    Decode a stored embedding. BLOBs are wrapped with np.frombuffer (no copy,
+    read-only array); legacy JSON text is still accepted.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        if len(value) == 0:
+            return None
+        return np.frombuffer(value, dtype=VECTOR_DTYPE)
+    try:
+        return np.asarray(json.loads(value), dtype=VECTOR_DTYPE)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return None
+
+
+# --- content-addressed text blobs -------------------------------------------
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# Below this many bytes compression rarely pays for its frame header
+BLOB_COMPRESS_MIN_BYTES = 128
+
+
+def blob_hash(text: str) -> str:
+    """Content address of a text blob: hex SHA-256 of its UTF-8 bytes."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_blob(text: str, compression: str = "zstd") -> Tuple[str, str, bytes]:
+    """Encode text for the blobs table. Returns (hash, codec, data); codec is 'zstd' or 'raw'."""
+    raw = text.encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    if compression == "zstd" and HAS_ZSTD and len(raw) >= BLOB_COMPRESS_MIN_BYTES:
+        packed = zstandard.ZstdCompressor(level=3).compress(raw)
+        if len(packed) < len(raw):
+            return digest, "zstd", packed
+    return digest, "raw", raw
+
+
+def decode_blob(codec: str, data: bytes) -> str:
+    """Inverse of encode_blob."""
+    data = bytes(data)
+    if codec == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("blob is zstd-compressed; install radar[compression] to read it")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data.decode("utf-8")
+
+
+def to_epoch(value: Union[int, float, str, date, None]) -> Optional[int]:
+    """
+    Unix seconds for an epoch number, date/datetime or ISO-8601 string.
+    Naive values are local time, like the scrapers' created_at text.
+    Raises ValueError for unparseable strings.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(float(value))
+        except ValueError:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return int(value.timestamp())
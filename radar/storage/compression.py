@@ -0,0 +1,156 @@
+"""
+Transparent zstd compression of posts.body and comments.body (SQLite).
+
+With TEXT_COMPRESSION=zstd the write helpers store bodies as zstd frames
+(BLOBs) compressed against the newest dictionary in `text_dictionaries`,
+which `radar db train-dictionary` trains on our own corpus. Short or
+incompressible bodies stay TEXT. Every frame names its dictionary, so rows
+written under older dictionaries stay readable after retraining.
+
+Bodies are decoded lazily, when the storage layer hands a row out. SQL sees
+plain text through radar_text(); the FTS indexes read their content through
+the posts_text / comments_text views built on it (migration 12), whether or
+not compression is on. That makes radar_text() a hard dependency of the
+schema: every connection that reads the FTS tables or the views, or
+rebuilds the index, must call register_text_functions() first. The
+connection manager does it for every pooled and writer connection, and
+radar.storage.backup for its own. Outside radar (the sqlite3 shell), search
+and the *_text views fail with "no such function: radar_text".
+"""
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Union
+
+from radar.config import TEXT_COMPRESSION
+from radar.storage.codecs import HAS_ZSTD
+
+if HAS_ZSTD:
+    import zstandard
+
+TEXT_COMPRESS_MIN_BYTES = 64
+TEXT_COMPRESS_LEVEL = 3
+# zstd's recommended dictionary size: ~100x smaller than the samples it is trained on
+TEXT_DICT_SIZE = 112640
+
+_lock = threading.Lock()
+_local = threading.local()
+# database path -> {dict_id: ZstdCompressionDict}; and the newest dict_id (0 = none)
+_dictionaries: Dict[str, Dict[int, Any]] = {}
+_active: Dict[str, int] = {}
+
+
+def database_path(conn: sqlite3.Connection) -> str:
+    """File behind a connection's main database."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def _load_dictionaries(path: str, conn: sqlite3.Connection = None):
+    """(Re)load every stored dictionary of a database into the cache."""
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+    try:
+        rows = conn.execute("SELECT dict_id, data FROM text_dictionaries ORDER BY dict_id").fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # not migrated yet
+    finally:
+        if own:
+            conn.close()
+    loaded = {}
+    if HAS_ZSTD:
+        for dict_id, data in rows:
+            loaded[dict_id] = zstandard.ZstdCompressionDict(bytes(data))
+    with _lock:
+        _dictionaries[path] = loaded
+        _active[path] = max(loaded) if loaded else 0
+
+
+def _dictionary(path: str, dict_id: int):
+    if dict_id not in _dictionaries.get(path, {}):
+        _load_dictionaries(path)
+    try:
+        return _dictionaries[path][dict_id]
+    except KeyError:
+        raise RuntimeError(f"zstd dictionary {dict_id} is missing from {path}")
+
+
+def _codec(kind: str, path: str, dict_id: int):
+    """Per-thread (de)compressor for a dictionary (zstandard objects are not thread-safe)."""
+    cache = _local.__dict__.setdefault(kind, {})
+    key = (path, dict_id)
+    if key not in cache:
+        dictionary = _dictionary(path, dict_id) if dict_id else None
+        if kind == "compressor":
+            cache[key] = zstandard.ZstdCompressor(level=TEXT_COMPRESS_LEVEL, dict_data=dictionary)
+        else:
+            cache[key] = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return cache[key]
+
+
+def encode_text(text: Optional[str], path: str) -> Union[str, bytes, None]:
+    """Storage form of a body: a zstd frame when compression is on and pays off, else the text."""
+    if text is None or TEXT_COMPRESSION != "zstd" or not HAS_ZSTD:
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < TEXT_COMPRESS_MIN_BYTES:
+        return text
+    if path not in _active:
+        _load_dictionaries(path)
+    packed = _codec("compressor", path, _active[path]).compress(raw)
+    return packed if len(packed) < len(raw) else text
+
+
+def decode_text(value: Union[str, bytes, None], path: str) -> Optional[str]:
+    """Inverse of encode_text."""
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+    if not HAS_ZSTD:
+        raise RuntimeError("body is zstd-compressed; install radar[compression] to read it")
+    data = bytes(value)
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    return _codec("decompressor", path, dict_id).decompress(data).decode("utf-8")
+
+
+def register_text_functions(conn: sqlite3.Connection):
+    """
+    Make radar_text(body) available on a connection. Required before
+    touching posts_fts / comments_fts or the posts_text / comments_text views.
+    """
+    path = database_path(conn)
+    conn.create_function("radar_text", 1, lambda value: decode_text(value, path), deterministic=True)
+
+
+def train_dictionary(conn: sqlite3.Connection, samples: int = 5000, size: int = TEXT_DICT_SIZE) -> Optional[int]:
+    """
+    Train a dictionary on a random sample of post and comment bodies and
+    store it (call inside a write transaction, and reload_dictionaries()
+    once committed). Returns its dict_id, or None when there are too few
+    bodies to train on.
+    """
+    if not HAS_ZSTD:
+        raise RuntimeError("training a dictionary needs zstandard: pip install radar[compression]")
+    rows = conn.execute("""
+        SELECT body FROM (
+            SELECT body FROM posts_text WHERE body IS NOT NULL
+            UNION ALL SELECT body FROM comments_text WHERE body IS NOT NULL
+        ) ORDER BY random() LIMIT ?
+    """, (samples,)).fetchall()
+    corpus = [body.encode("utf-8") for (body,) in rows if body]
+    if len(corpus) < 10:
+        return None
+    dict_id = (conn.execute("SELECT MAX(dict_id) FROM text_dictionaries").fetchone()[0] or 0) + 1
+    try:
+        trained = zstandard.train_dictionary(size, corpus, dict_id=dict_id, level=TEXT_COMPRESS_LEVEL)
+    except zstandard.ZstdError as e:
+        print(f"DEBUG: dictionary training failed ({e})")
+        return None
+    conn.execute(
+        "INSERT INTO text_dictionaries (dict_id, data, samples) VALUES (?, ?, ?)",
+        (dict_id, trained.as_bytes(), len(corpus))
+    )
+    return dict_id
+
+
+def reload_dictionaries(path: str):
+    """Pick up dictionaries stored since this process loaded them; the newest becomes active."""
+    _load_dictionaries(path)
@@ -1,498 +1,989 @@
 import sqlite3
+import sys
 import json
-import os
+import re
 import threading
+import time
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
-from radar.config import DATABASE_PATH
+from radar.config import (
+    DATABASE_PATH, DATABASE_URL, DB_WRITE_BATCHING, DB_WRITE_BATCH_SIZE, DB_WRITE_WINDOW_MS,
+    BLOB_COMPRESSION, ANALYSIS_STORAGE_FLOOR,
+)
+import numpy as np
+from radar.storage.pool import ConnectionManager
+from radar.storage.writer import WriteActor, register_shutdown
+from radar.storage.codecs import pack_vector, unpack_vector, blob_hash, encode_blob, decode_blob, to_epoch
+from radar.storage.compression import encode_text, decode_text, register_text_functions
+from radar.storage.querylog import connection_factory
+
+# Shared connection manager. The lambda resolves DATABASE_PATH on every call
+# so patched paths (tests, scripts) are honoured.
+# register_text_functions is not optional: search and the FTS index read
+# bodies through radar_text() views (radar.storage.compression).
+_manager = ConnectionManager(lambda: DATABASE_PATH, on_connect=register_text_functions, factory=connection_factory)
 
-# Lock for thread-safe database access
-_db_lock = threading.Lock()
 
 def get_connection():
     """
-    Get a SQLite connection.
-    NOTE: Each call returns a new connection. The caller should NOT close it
-    if they want to keep using it within the same function.
+    Open a dedicated SQLite connection (PRAGMAs already applied).
+    NOTE: The caller owns it and must close it. The helpers in this module
+    use the pooled connections below instead.
     """
-    # Ensure directory exists
-    db_dir = os.path.dirname(DATABASE_PATH)
-    if db_dir and not os.path.exists(db_dir):
-        os.makedirs(db_dir, exist_ok=True)
-    
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30, check_same_thread=False)
-    # Enable Write-Ahead Logging for better concurrency
-    try:
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA busy_timeout=30000")  # 30 second busy timeout
-    except:
-        pass
-    
-    return conn
+    return _manager.open_connection()
+
+
+def write_connection():
+    """Context manager over this thread's reusable writer connection. Commits on exit."""
+    return _manager.connection()
+
+
+def read_connection():
+    """Context manager over a pooled read-only connection (used by API reads)."""
+    return _manager.read_connection()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool counters (opened, checkouts, waits, idle readers) plus writer actor stats."""
+    stats = _manager.stats()
+    if DB_WRITE_BATCHING:
+        stats["writer"] = _writer.stats()
+    return stats
 
 
 def close_thread_connection():
-    """Legacy function - no longer needed but kept for compatibility."""
-    pass
+    """Close the calling thread's writer connection (e.g. at the end of a Celery task)."""
+    _manager.close_thread_connection()
+
+
+def close_all_connections():
+    """Close every pooled connection (the writer actor is drained and stopped first)."""
+    _writer.close()
+    _manager.close_all()
+
+
+# All helper writes go through one writer thread that group-commits them
+# (see radar.storage.writer). DB_WRITE_BATCHING=0 restores per-call transactions.
+_writer = WriteActor(
+    lambda: _manager.open_connection(),
+    lambda: DATABASE_PATH,
+    max_batch=DB_WRITE_BATCH_SIZE,
+    window=DB_WRITE_WINDOW_MS / 1000,
+)
+register_shutdown(_writer)
+_deferred = threading.local()
 
-def init_db():
-    from radar.config import DATABASE_PATH
-    print(f"DEBUG: Initializing database at {DATABASE_PATH}")
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Posts table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS posts (
-        id TEXT PRIMARY KEY,
-        platform TEXT NOT NULL,
-        source TEXT NOT NULL,
-        url TEXT,
-        title TEXT,
-        body TEXT,
-        author TEXT,
-        score INTEGER DEFAULT 0,
-        num_comments INTEGER DEFAULT 0,
-        created_at TIMESTAMP,
-        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        ingestion_method TEXT,
-        embedding_id TEXT,
-        pain_signals TEXT,
-        intent TEXT,
-        relevance_score REAL DEFAULT 0,
-        ai_analysis TEXT,
-        semantic_similarity REAL DEFAULT 0,
-        community_score REAL DEFAULT 0,
-        last_processed_score INTEGER DEFAULT -1,
-        last_processed_comments INTEGER DEFAULT -1
-    )
-    """)
-    
-    # Comments table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS comments (
-        id TEXT PRIMARY KEY,
-        post_id TEXT NOT NULL,
-        parent_id TEXT,
-        body TEXT,
-        author TEXT,
-        score INTEGER DEFAULT 0,
-        created_at TIMESTAMP,
-        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        depth INTEGER DEFAULT 0,
-        embedding_id TEXT,
-        pain_signals TEXT,
-        is_solution BOOLEAN DEFAULT FALSE,
-        FOREIGN KEY (post_id) REFERENCES posts(id)
-    )
-    """)
-    
-    # Post Analysis table (per-product, per-user)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS post_analysis (
-        post_id TEXT,
-        product_id TEXT,
-        user_id TEXT DEFAULT 'default_user',
-        relevance_score REAL DEFAULT 0,
-        semantic_similarity REAL DEFAULT 0,
-        community_score REAL DEFAULT 0,
-        ai_analysis TEXT,
-        signals_json TEXT,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        PRIMARY KEY (post_id, product_id, user_id),
-        FOREIGN KEY (post_id) REFERENCES posts(id)
-    )
-    """)
-
-    # Products table (per-user)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS products (
-        id TEXT,
-        user_id TEXT NOT NULL,
-        name TEXT NOT NULL,
-        description TEXT NOT NULL,
-        pain_signals TEXT NOT NULL,
-        intent_signals TEXT NOT NULL,
-        target_subreddits TEXT NOT NULL,
-        embedding_context TEXT,
-        embedding_id TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        website_url TEXT,
-        default_response_style TEXT DEFAULT 'empathetic',
-        PRIMARY KEY (id, user_id)
-    )
-    """)
-
-    # Sync runs history (per-user)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS sync_runs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        product TEXT,
-        subreddits TEXT,
-        days INTEGER,
-        status TEXT,
-        progress INTEGER DEFAULT 0
-    )
-    """)
-    
-    # Generated responses (per-user)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS generated_responses (
-        id TEXT PRIMARY KEY,
-        user_id TEXT NOT NULL,
-        post_id TEXT NOT NULL,
-        product_id TEXT NOT NULL,
-        style TEXT NOT NULL DEFAULT 'empathetic',
-        response_text TEXT NOT NULL,
-        tokens_used INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        feedback TEXT,
-        FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE
-    )
-    """)
-    conn.commit()
-    
-    # Migration: add new columns if missing to post_analysis
-    columns = [
-        ("ai_analysis", "TEXT"),
-        ("semantic_similarity", "REAL DEFAULT 0"),
-        ("community_score", "REAL DEFAULT 0"),
-        ("last_processed_score", "INTEGER DEFAULT -1"),
-        ("last_processed_comments", "INTEGER DEFAULT -1"),
-        ("triage_status", "TEXT"), # 'agree', 'disagree', NULL
-        ("triage_at", "TIMESTAMP"),
-        ("triage_relevance_snapshot", "REAL"),
-        ("triage_semantic_snapshot", "REAL"),
-        ("updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-    ]
-    for col_name, col_type in columns:
-        try:
-            cursor.execute(f"ALTER TABLE post_analysis ADD COLUMN {col_name} {col_type}")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass # Already exists
-
-    # Triage History (per-user/product/post feedback log)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS triage_history (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        post_id TEXT NOT NULL,
-        product_id TEXT NOT NULL,
-        user_id TEXT NOT NULL,
-        status TEXT NOT NULL,
-        relevance_score REAL,
-        semantic_similarity REAL,
-        community_score REAL,
-        ai_analysis_snapshot TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (post_id) REFERENCES posts(id)
-    )
-    """)
-    conn.commit()
-    # User Settings table (per-user)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS user_settings (
-        user_id TEXT NOT NULL,
-        key TEXT NOT NULL,
-        value TEXT,
-        PRIMARY KEY (user_id, key)
-    )
-    """)
-    
-    # Migration: add user_id columns to existing tables
-    user_id_migrations = [
-        ("products", "user_id", "TEXT"),
-        ("post_analysis", "user_id", "TEXT"),
-        ("generated_responses", "user_id", "TEXT"),
-        ("sync_runs", "user_id", "TEXT"),
-    ]
-    for table, col_name, col_type in user_id_migrations:
-        try:
-            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
-            conn.commit()
-            print(f"DEBUG: Added {col_name} column to {table}")
-        except sqlite3.OperationalError:
-            pass  # Already exists
 
-    # Migration: add website_url to products
+def _write(fn):
+    """Run `fn(conn)` as one write command and return its result once committed."""
+    if not DB_WRITE_BATCHING:
+        with write_connection() as conn:
+            return fn(conn)
+    pending = getattr(_deferred, "futures", None)
+    if pending is not None:
+        pending.append(_writer.submit(fn))
+        return None
+    return _writer.execute(fn)
+
+
+@contextmanager
+def deferred_writes():
+    """
+    Within this block the calling thread's helper writes are queued without
+    waiting for their commit (return values are None). On exit every queued
+    write is awaited and the first failure is raised. Use it for write-only
+    loops that do not read back what they wrote.
+    """
+    if getattr(_deferred, "futures", None) is not None:
+        yield  # nested: the outermost block waits
+        return
+    _deferred.futures = []
     try:
-        cursor.execute("ALTER TABLE products ADD COLUMN website_url TEXT")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass
+        yield
+    finally:
+        futures, _deferred.futures = _deferred.futures, None
+        errors = [error for error in (f.exception() for f in futures) if error is not None]
+    if errors:
+        raise errors[0]
 
-    # Migration: add default_response_style to products
+
+def flush_writes(durable: bool = False):
+    """Wait until all queued writes are committed; durable=True also checkpoints the WAL."""
+    if DB_WRITE_BATCHING:
+        _writer.flush(durable=durable)
+
+
+def add_commit_hook(hook):
+    """Register `hook(ops_in_batch)`, called on the writer thread after every group commit."""
+    _writer.add_commit_hook(hook)
+
+
+# Database paths already verified as migrated by this process
+_initialized_paths = set()
+
+def init_db():
+    """
+    Bring the schema up to date. After the first call per process (and on an
+    already-migrated database) this is a single schema_version lookup.
+    """
+    from radar.storage.migrations import migrate, get_schema_version, LATEST_VERSION
+    if DATABASE_PATH in _initialized_paths:
+        return
+    with write_connection() as conn:
+        if get_schema_version(conn) < LATEST_VERSION:
+            migrate(conn)
+    _initialized_paths.add(DATABASE_PATH)
+
+
+def migrate_schema(dry_run: bool = False):
+    """
+    Apply pending migrations on a dedicated connection.
+    Returns (version_before, latest_version, [(version, description), ...]).
+    """
+    from radar.storage.migrations import migrate, get_schema_version, LATEST_VERSION
+    conn = get_connection()
     try:
-        cursor.execute("ALTER TABLE products ADD COLUMN default_response_style TEXT DEFAULT 'empathetic'")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass
+        current = get_schema_version(conn)
+        migrations = migrate(conn, dry_run=dry_run)
+    finally:
+        conn.close()
+    if not dry_run:
+        _initialized_paths.discard(DATABASE_PATH)
+    return current, LATEST_VERSION, migrations
+
+
+def ping() -> bool:
+    """Cheap round-trip used by health checks. Raises if the database is unreachable."""
+    with read_connection() as conn:
+        conn.execute("SELECT 1")
+    return True
+
 
-    # Migration: add embedding_vector to products (cached embedding as JSON)
+# Only the listing columns are overwritten: a re-saved post keeps its
+# embedding, processing and comment fetch state (migration 13).
+_POST_UPSERT_SQL = """
+INSERT INTO posts (
+    id, platform, source, url, title, body, author, 
+    score, num_comments, created_at, ingestion_method, created_utc, scraped_utc
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    platform = excluded.platform, source = excluded.source, url = excluded.url,
+    title = excluded.title, body = excluded.body, author = excluded.author,
+    score = excluded.score, num_comments = excluded.num_comments,
+    created_at = excluded.created_at, ingestion_method = excluded.ingestion_method,
+    created_utc = excluded.created_utc, scraped_utc = excluded.scraped_utc,
+    scraped_at = CURRENT_TIMESTAMP
+"""
+
+_COMMENT_UPSERT_SQL = """
+INSERT OR REPLACE INTO comments (
+    id, post_id, parent_id, body, author, 
+    score, created_at, depth, created_utc, scraped_utc
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _created_utc(data: Dict[str, Any]) -> Optional[int]:
+    """Epoch creation time: the scrapers' created_utc, else parsed from created_at."""
+    if data.get('created_utc') is not None:
+        return int(data['created_utc'])
     try:
-        cursor.execute("ALTER TABLE products ADD COLUMN embedding_vector TEXT")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass
+        return to_epoch(data.get('created_at'))
+    except ValueError:
+        return None
 
-    conn.close()
+def _text_row(row) -> Dict[str, Any]:
+    """Row as a dict with its body decompressed (bodies are decoded only when handed out)."""
+    row = dict(row)
+    if 'body' in row:
+        row['body'] = decode_text(row['body'], DATABASE_PATH)
+    return row
 
-def save_post(post_data: Dict[str, Any]):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    INSERT OR REPLACE INTO posts (
-        id, platform, source, url, title, body, author, 
-        score, num_comments, created_at, ingestion_method
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+def _stored_body(params: tuple, index: int) -> tuple:
+    """Write params with the body at `index` in its storage form (see radar.storage.compression)."""
+    return params[:index] + (encode_text(params[index], DATABASE_PATH),) + params[index + 1:]
+
+def _post_params(post_data: Dict[str, Any]) -> tuple:
+    return (
         post_data['id'], post_data['platform'], post_data['source'],
         post_data.get('url'), post_data.get('title'), post_data.get('body'),
         post_data.get('author'), post_data.get('score', 0), 
         post_data.get('num_comments', 0), post_data.get('created_at'),
-        post_data.get('ingestion_method')
-    ))
-    
-    conn.commit()
-    conn.close()
+        post_data.get('ingestion_method'), _created_utc(post_data), int(time.time())
+    )
+
+def _comment_params(comment_data: Dict[str, Any]) -> tuple:
+    return (
+        comment_data['id'], comment_data['post_id'], comment_data.get('parent_id'),
+        comment_data.get('body'), comment_data.get('author'),
+        comment_data.get('score', 0), comment_data.get('created_at'),
+        comment_data.get('depth', 0), _created_utc(comment_data), int(time.time())
+    )
+
+# FTS5 external-content index per table: (index table, content view, indexed columns).
+# The views (migration 12) expose bodies decompressed, see radar.storage.compression.
+_FTS_INDEXES = {
+    "posts": ("posts_fts", "posts_text", ("title", "body")),
+    "comments": ("comments_fts", "comments_text", ("body",)),
+}
+
+def _fts_delete(conn, table: str, where: str, params) -> None:
+    """Remove the FTS entries of the `table` rows matching `where` (call before deleting them)."""
+    fts, content, columns = _FTS_INDEXES[table]
+    column_list = ", ".join(columns)
+    values = ", ".join(["?"] * len(columns))
+    old_rows = conn.execute(f"SELECT rowid, {column_list} FROM {content} WHERE {where}", params).fetchall()
+    conn.executemany(
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', ?, {values})", old_rows
+    )
+
+def _fts_sync(conn, table: str, ids: List[str], upsert):
+    """
+    Run `upsert()` and keep the table's FTS index in step, in the same
+    transaction. The old entries are removed first (FTS5 'delete' needs the
+    old text; INSERT OR REPLACE also gives replaced rows a new rowid) and
+    the written rows are indexed afresh.
+    """
+    fts, content, columns = _FTS_INDEXES[table]
+    column_list = ", ".join(columns)
+    ids = list(dict.fromkeys(ids))
+    chunks = [ids[i:i + 500] for i in range(0, len(ids), 500)]
+    for chunk in chunks:
+        _fts_delete(conn, table, f"id IN ({', '.join(['?'] * len(chunk))})", chunk)
+    upsert()
+    for chunk in chunks:
+        placeholders = ", ".join(["?"] * len(chunk))
+        conn.execute(
+            f"INSERT INTO {fts}(rowid, {column_list}) SELECT rowid, {column_list} FROM {content} WHERE id IN ({placeholders})",
+            chunk
+        )
+
+def rebuild_search_index():
+    """Re-index posts_fts/comments_fts from scratch (after writes that bypassed the helpers)."""
+    def _apply(conn):
+        for fts, _, _ in _FTS_INDEXES.values():
+            conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    _write(_apply)
+
+def train_text_dictionary(samples: int = 5000) -> Optional[int]:
+    """
+    Train a zstd dictionary on the stored post/comment bodies; new writes
+    compress against it (with TEXT_COMPRESSION=zstd). Returns its dict_id,
+    or None when there is too little text to train on.
+    """
+    from radar.storage.compression import train_dictionary, reload_dictionaries
+    dict_id = _write(lambda conn: train_dictionary(conn, samples))
+    reload_dictionaries(DATABASE_PATH)
+    return dict_id
+
+def recompress_text(batch_size: int = 500) -> int:
+    """
+    Rewrite stored bodies in their current storage form: compressed against
+    the newest dictionary with TEXT_COMPRESSION=zstd, plain text otherwise.
+    Walks rowids in batches; returns the number of bodies rewritten.
+    """
+    rewritten = 0
+    for table in ("posts", "comments"):
+        last_rowid = 0
+        while True:
+            with read_connection() as conn:
+                rows = conn.execute(
+                    f"SELECT rowid, body FROM {table} WHERE rowid > ? AND body IS NOT NULL ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            updates = []
+            for rowid, body in rows:
+                stored = encode_text(decode_text(body, DATABASE_PATH), DATABASE_PATH)
+                if stored != body:
+                    updates.append((stored, rowid, body))
+            if updates:
+                # The decoded text is unchanged, so the FTS index needs no update;
+                # `body IS ?` skips rows rewritten by a scraper in the meantime
+                _write(lambda conn, updates=updates: conn.executemany(
+                    f"UPDATE {table} SET body = ? WHERE rowid = ? AND body IS ?", updates
+                ))
+                rewritten += len(updates)
+    return rewritten
+
+# Large repeated text (triage AI snapshots) is stored once in `blobs`
+# (migration 7) and referenced by its SHA-256; see radar.storage.codecs.
+_BLOB_INSERT_SQL = "INSERT INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?) ON CONFLICT (hash) DO NOTHING"
+
+_BLOB_PRUNE_SQL = """
+DELETE FROM blobs
+WHERE hash NOT IN (SELECT ai_analysis_hash FROM triage_history WHERE ai_analysis_hash IS NOT NULL)
+"""
+
+def _text_hash(text: Optional[str]) -> Optional[str]:
+    return blob_hash(text) if text is not None else None
+
+def _blob_rows(texts: List[Optional[str]]) -> List[tuple]:
+    """Encoded (hash, codec, size, data) rows for the distinct non-NULL texts."""
+    rows = []
+    for text in dict.fromkeys(t for t in texts if t is not None):
+        digest, codec, data = encode_blob(text, BLOB_COMPRESSION)
+        rows.append((digest, codec, len(text.encode("utf-8")), data))
+    return rows
+
+def _put_blobs(cursor, texts: List[Optional[str]]):
+    """Store texts in `blobs` (existing hashes are left alone)."""
+    rows = _blob_rows(texts)
+    if rows:
+        cursor.executemany(_BLOB_INSERT_SQL, rows)
+
+# detect_signals output is normalized (migration 8): the general intents of a post
+# live once in post_signals, and each analysis row keeps only its own product's
+# matched keywords (pain_matches / intent_matches, JSON arrays or NULL).
+_POST_SIGNALS_DELETE_SQL = "DELETE FROM post_signals WHERE post_id = ?"
+_POST_SIGNALS_INSERT_SQL = "INSERT INTO post_signals (post_id, intent) VALUES (?, ?) ON CONFLICT DO NOTHING"
+
+def _signals_of(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The detect_signals dict of an analysis, given as `signals` or legacy `signals_json`."""
+    if data.get('signals') is not None:
+        return data['signals']
+    if data.get('signals_json'):
+        return json.loads(data['signals_json'])
+    return None
+
+def _signal_matches(data: Dict[str, Any], product_id: str) -> tuple:
+    """(pain_matches, intent_matches) columns for one product's analysis row."""
+    signals = _signals_of(data) or {}
+    matches = signals.get('product_matches', {}).get(product_id) or {}
+    pain, intents = matches.get('pain_points'), matches.get('intents')
+    return (json.dumps(pain) if pain else None, json.dumps(intents) if intents else None)
+
+def _same_sql(query: str) -> str:
+    return query
+
+def _save_post_intents(cursor, analyses: List[Dict[str, Any]], sql=_same_sql):
+    """
+    Replace post_signals for every post whose analysis carries signals (once
+    per post). `sql` translates placeholders for other backends.
+    """
+    intents = {}
+    for a in analyses:
+        signals = _signals_of(a)
+        if signals is not None and a['post_id'] not in intents:
+            intents[a['post_id']] = signals.get('intents', [])
+    if not intents:
+        return
+    cursor.executemany(sql(_POST_SIGNALS_DELETE_SQL), [(post_id,) for post_id in intents])
+    cursor.executemany(sql(_POST_SIGNALS_INSERT_SQL), [
+        (post_id, intent) for post_id, post_intents in intents.items() for intent in post_intents
+    ])
+
+def _load_post_intents(conn, post_ids: List[str]) -> Dict[str, List[str]]:
+    post_ids = list(dict.fromkeys(post_ids))
+    if not post_ids:
+        return {}
+    placeholders = ", ".join(["?"] * len(post_ids))
+    rows = conn.execute(f"SELECT post_id, intent FROM post_signals WHERE post_id IN ({placeholders})", post_ids).fetchall()
+    intents = {}
+    for post_id, intent in rows:
+        intents.setdefault(post_id, []).append(intent)
+    return intents
+
+def _with_signals(rows: List[Dict[str, Any]], intents: Dict[str, List[str]], post_key: str = 'post_id') -> List[Dict[str, Any]]:
+    """Rebuild each row's signals_json (as detect_signals shaped it) from the normalized columns."""
+    for row in rows:
+        row.pop('signals_hash', None)
+        pain, matched = row.pop('pain_matches', None), row.pop('intent_matches', None)
+        post_intents = intents.get(row[post_key], [])
+        product_matches = {}
+        if pain or matched:
+            product_matches[row['product_id']] = {
+                "pain_points": json.loads(pain) if pain else [],
+                "intents": json.loads(matched) if matched else [],
+            }
+        if post_intents or product_matches:
+            row['signals_json'] = json.dumps({"intents": post_intents, "product_matches": product_matches})
+        else:
+            row['signals_json'] = None
+    return rows
+
+def prune_blobs() -> int:
+    """Delete blobs no row references any more. Returns the number removed."""
+    def _apply(conn):
+        return conn.execute(_BLOB_PRUNE_SQL).rowcount
+    return _write(_apply)
+
+# Triage history with each AI snapshot resolved through `blobs`; rows never
+# moved by migration 7 still carry the text in ai_analysis_snapshot
+_TRIAGE_HISTORY_SQL = """
+SELECT t.id, t.post_id, t.product_id, t.user_id, t.status, t.relevance_score,
+       t.semantic_similarity, t.community_score, t.created_at, t.ai_analysis_snapshot,
+       b.codec AS snapshot_codec, b.data AS snapshot_data
+FROM triage_history t
+LEFT JOIN blobs b ON b.hash = t.ai_analysis_hash
+"""
+
+def _triage_history_query(user_id: str = None, product_id: str = None, post_id: str = None, limit: int = None):
+    conditions, params = [], []
+    for column, value in (("t.user_id", user_id), ("t.product_id", product_id), ("t.post_id", post_id)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    query = _TRIAGE_HISTORY_SQL + (" WHERE " + " AND ".join(conditions) if conditions else "") + " ORDER BY t.id"
+    if limit:
+        query, params = f"{query} LIMIT ?", params + [limit]
+    return query, params
+
+def _triage_row(row) -> Dict[str, Any]:
+    row = dict(row)
+    codec, data = row.pop('snapshot_codec'), row.pop('snapshot_data')
+    if data is not None:
+        row['ai_analysis_snapshot'] = decode_blob(codec, data)
+    return row
+
+def get_triage_history(user_id: str = None, product_id: str = None, post_id: str = None, limit: int = None) -> List[Dict[str, Any]]:
+    """Triage log entries, oldest first, with ai_analysis_snapshot decoded back to text."""
+    query, params = _triage_history_query(user_id, product_id, post_id, limit)
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.execute(query, params).fetchall()
+    return [_triage_row(row) for row in rows]
+
+# lead_index (migration 6) materializes the /api/threads leaderboard. Its rows are
+# rebuilt from post_analysis for the keys a write touched, so every helper that
+# changes analysis, triage, responses or post summary columns refreshes them.
+_LEAD_COLUMNS = """
+    user_id, product_id, post_id, relevance_score, semantic_similarity, community_score,
+    ai_analysis, pain_matches, intent_matches, triage_status, triage_relevance_snapshot,
+    platform, source, url, title, author, score, num_comments, created_at, created_utc, latest_response_id
+"""
+
+_LEAD_DELETE_SQL = "DELETE FROM lead_index WHERE user_id = ? AND product_id = ? AND post_id = ?"
+
+_LEAD_INSERT_SQL = f"""
+INSERT INTO lead_index ({_LEAD_COLUMNS})
+SELECT pa.user_id, pa.product_id, pa.post_id, pa.relevance_score, pa.semantic_similarity,
+       pa.community_score, pa.ai_analysis, pa.pain_matches, pa.intent_matches, pa.triage_status, pa.triage_relevance_snapshot,
+       p.platform, p.source, p.url, p.title, p.author, p.score, p.num_comments, p.created_at, p.created_utc,
+       (SELECT gr.id FROM generated_responses gr
+        WHERE gr.user_id = pa.user_id AND gr.post_id = pa.post_id AND gr.product_id = pa.product_id
+        ORDER BY gr.created_at DESC LIMIT 1)
+FROM post_analysis pa
+JOIN posts p ON p.id = pa.post_id
+WHERE pa.user_id = ? AND pa.product_id = ? AND pa.post_id = ? AND pa.relevance_score > 0
+"""
+
+_LEAD_POST_REFRESH_SQL = """
+UPDATE lead_index
+SET (platform, source, url, title, author, score, num_comments, created_at, created_utc) = (
+    SELECT platform, source, url, title, author, score, num_comments, created_at, created_utc
+    FROM posts WHERE posts.id = lead_index.post_id
+)
+WHERE post_id = ?
+"""
+
+_LEAD_RESPONSE_SQL = "UPDATE lead_index SET latest_response_id = ? WHERE user_id = ? AND product_id = ? AND post_id = ?"
+
+def _refresh_leads(cursor, keys: List[tuple], sql=_same_sql):
+    """Rebuild the lead_index rows for (user_id, product_id, post_id) keys from post_analysis."""
+    keys = list(dict.fromkeys(keys))
+    if keys:
+        cursor.executemany(sql(_LEAD_DELETE_SQL), keys)
+        cursor.executemany(sql(_LEAD_INSERT_SQL), keys)
+
+def _refresh_lead_posts(cursor, post_ids: List[str], sql=_same_sql):
+    """Copy the current post summary columns into the lead_index rows of these posts."""
+    cursor.executemany(sql(_LEAD_POST_REFRESH_SQL), [(post_id,) for post_id in dict.fromkeys(post_ids)])
+
+def save_post(post_data: Dict[str, Any]):
+    save_posts_bulk([post_data])
+
+def save_posts_bulk(posts: List[Dict[str, Any]]) -> int:
+    """Upsert many posts (and their search index entries) in a single transaction. Returns the number of rows written."""
+    if not posts:
+        return 0
+    def _apply(conn):
+        _fts_sync(conn, "posts", [p['id'] for p in posts], lambda: conn.executemany(
+            _POST_UPSERT_SQL, [_stored_body(_post_params(p), 5) for p in posts]
+        ))
+        _refresh_lead_posts(conn, [p['id'] for p in posts])
+    _write(_apply)
+    return len(posts)
 
 def update_post_stats(post_id: str, score: int, num_comments: int):
     """Surgical update for post metrics without overwriting body/content."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE posts 
-        SET score = ?, num_comments = ?, scraped_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    """, (score, num_comments, post_id))
-    conn.commit()
-    conn.close()
+    update_post_stats_bulk([(post_id, score, num_comments)])
+
+def update_post_stats_bulk(stats: List[tuple]):
+    """Update (post_id, score, num_comments) tuples in a single transaction."""
+    if not stats:
+        return
+    def _apply(conn):
+        conn.executemany("""
+            UPDATE posts 
+            SET score = ?, num_comments = ?, scraped_at = CURRENT_TIMESTAMP, scraped_utc = ?
+            WHERE id = ?
+        """, [(score, num_comments, int(time.time()), post_id) for post_id, score, num_comments in stats])
+        _refresh_lead_posts(conn, [post_id for post_id, _, _ in stats])
+    _write(_apply)
 
 def save_comment(comment_data: Dict[str, Any]):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    INSERT OR REPLACE INTO comments (
-        id, post_id, parent_id, body, author, 
-        score, created_at, depth
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        comment_data['id'], comment_data['post_id'], comment_data.get('parent_id'),
-        comment_data.get('body'), comment_data.get('author'),
-        comment_data.get('score', 0), comment_data.get('created_at'),
-        comment_data.get('depth', 0)
-    ))
-    
-    conn.commit()
-    conn.close()
+    save_comments_bulk([comment_data])
 
-def save_analysis(post_id: str, product_id: str, user_id: str, data: Dict[str, Any], cursor=None):
-    """Save post analysis for a specific user's product. Preserves triage status and existing AI on update."""
-    # Use COALESCE to preserve existing ai_analysis when new value is NULL
-    query = """
-    INSERT INTO post_analysis (
-        post_id, product_id, user_id, relevance_score, semantic_similarity, 
-        community_score, ai_analysis, signals_json, updated_at,
-        last_processed_score, last_processed_comments
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
-    ON CONFLICT(post_id, product_id, user_id) DO UPDATE SET
-        relevance_score = excluded.relevance_score,
-        semantic_similarity = excluded.semantic_similarity,
-        community_score = excluded.community_score,
-        ai_analysis = COALESCE(excluded.ai_analysis, post_analysis.ai_analysis),
-        signals_json = excluded.signals_json,
-        last_processed_score = excluded.last_processed_score,
-        last_processed_comments = excluded.last_processed_comments,
-        updated_at = CURRENT_TIMESTAMP
-    """
-    params = (
+def save_comments_bulk(comments: List[Dict[str, Any]]) -> int:
+    """Upsert many comments (e.g. a whole thread) and their search index entries in a single transaction."""
+    if not comments:
+        return 0
+    def _apply(conn):
+        _fts_sync(conn, "comments", [c['id'] for c in comments], lambda: conn.executemany(
+            _COMMENT_UPSERT_SQL, [_stored_body(_comment_params(c), 3) for c in comments]
+        ))
+    _write(_apply)
+    return len(comments)
+
+def save_thread_comments(post_id: str, comments: List[Dict[str, Any]], num_comments: int) -> int:
+    """
+    Store a downloaded comment thread incrementally, in one transaction:
+    only comment IDs not stored yet are inserted, the post is marked as
+    fetched at `num_comments` (migration 13), and a refresh that brought new
+    comments requeues the post for scoring. Returns the number of new comments.
+    """
+    def _apply(conn):
+        known = {row[0] for row in conn.execute("SELECT id FROM comments WHERE post_id = ?", (post_id,))}
+        new = [c for c in {c['id']: c for c in comments}.values() if c['id'] not in known]
+        if new:
+            _fts_sync(conn, "comments", [c['id'] for c in new], lambda: conn.executemany(
+                _COMMENT_UPSERT_SQL, [_stored_body(_comment_params(c), 3) for c in new]
+            ))
+        conn.execute(
+            "UPDATE posts SET comments_fetched_count = ?, last_comment_fetch_utc = ? WHERE id = ?",
+            (num_comments, int(time.time()), post_id)
+        )
+        if new and known:
+            _requeue(conn, [post_id])
+        return len(new)
+    return _write(_apply) or 0
+
+_ANALYSIS_UPSERT_SQL = """
+INSERT INTO post_analysis (
+    post_id, product_id, user_id, relevance_score, semantic_similarity, 
+    community_score, ai_analysis, pain_matches, intent_matches, updated_at,
+    last_processed_score, last_processed_comments
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+ON CONFLICT(post_id, product_id, user_id) DO UPDATE SET
+    relevance_score = excluded.relevance_score,
+    semantic_similarity = excluded.semantic_similarity,
+    community_score = excluded.community_score,
+    ai_analysis = COALESCE(excluded.ai_analysis, post_analysis.ai_analysis),
+    pain_matches = excluded.pain_matches,
+    intent_matches = excluded.intent_matches,
+    last_processed_score = excluded.last_processed_score,
+    last_processed_comments = excluded.last_processed_comments,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+# Below-floor pairs (migration 9): refresh a row that must be kept (triaged or
+# AI-analyzed), drop any other, and record the compact marker.
+_ANALYSIS_UPDATE_SQL = """
+UPDATE post_analysis SET
+    relevance_score = ?, semantic_similarity = ?, community_score = ?,
+    ai_analysis = COALESCE(?, ai_analysis), pain_matches = ?, intent_matches = ?,
+    last_processed_score = ?, last_processed_comments = ?, updated_at = CURRENT_TIMESTAMP
+WHERE post_id = ? AND product_id = ? AND user_id = ?
+"""
+
+_ANALYSIS_PRUNE_SQL = """
+DELETE FROM post_analysis
+WHERE post_id = ? AND product_id = ? AND user_id = ? AND triage_status IS NULL AND ai_analysis IS NULL
+"""
+
+_MARKER_UPSERT_SQL = """
+INSERT INTO analysis_markers (user_id, product_id, post_id, processed_score, processed_comments)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user_id, product_id, post_id) DO UPDATE SET
+    processed_score = excluded.processed_score,
+    processed_comments = excluded.processed_comments
+"""
+
+_MARKER_DELETE_SQL = "DELETE FROM analysis_markers WHERE user_id = ? AND product_id = ? AND post_id = ?"
+
+_MARK_PROCESSED_SQL = """
+UPDATE posts 
+SET last_processed_score = ?, last_processed_comments = ?, embedding_id = ?
+WHERE id = ?
+"""
+
+def _analysis_params(post_id: str, product_id: str, user_id: str, data: Dict[str, Any]) -> tuple:
+    return (
         post_id, product_id, user_id, data.get('relevance_score', 0),
         data.get('semantic_similarity', 0), data.get('community_score', 0),
-        data.get('ai_analysis'), data.get('signals_json'),
+        data.get('ai_analysis'), *_signal_matches(data, product_id),
         data.get('last_processed_score', -1), data.get('last_processed_comments', -1)
     )
-    
+
+def _below_floor(data: Dict[str, Any], floor: float) -> bool:
+    return data.get('relevance_score', 0) < floor and not data.get('ai_analysis')
+
+def _store_analyses(cursor, analyses: List[Dict[str, Any]], floor: float = None, sql=_same_sql,
+                    upsert_sql: str = _ANALYSIS_UPSERT_SQL, update_sql: str = _ANALYSIS_UPDATE_SQL):
+    """
+    Write analysis dicts (post_id, product_id, user_id plus fields): rows at or
+    above the storage floor are upserted into post_analysis; the rest become
+    analysis_markers. Also refreshes post_signals and lead_index. Backends
+    with their own timestamp SQL pass upsert_sql/update_sql.
+    """
+    floor = ANALYSIS_STORAGE_FLOOR if floor is None else floor
+    kept, sparse = [], []
+    for a in analyses:
+        (sparse if _below_floor(a, floor) else kept).append(a)
+
+    _save_post_intents(cursor, analyses, sql)
+    if kept:
+        # COALESCE in the upsert preserves existing ai_analysis when the new value is NULL
+        cursor.executemany(upsert_sql, [
+            _analysis_params(a['post_id'], a['product_id'], a['user_id'], a) for a in kept
+        ])
+        cursor.executemany(sql(_MARKER_DELETE_SQL), [(a['user_id'], a['product_id'], a['post_id']) for a in kept])
+    if sparse:
+        keys = [(a['post_id'], a['product_id'], a['user_id']) for a in sparse]
+        cursor.executemany(sql(_ANALYSIS_PRUNE_SQL), keys)
+        cursor.executemany(update_sql, [
+            _analysis_params(*key, a)[3:] + key for key, a in zip(keys, sparse)
+        ])
+        cursor.executemany(sql(_MARKER_UPSERT_SQL), [
+            (a['user_id'], a['product_id'], a['post_id'],
+             a.get('last_processed_score', -1), a.get('last_processed_comments', -1)) for a in sparse
+        ])
+    _refresh_leads(cursor, [(a['user_id'], a['product_id'], a['post_id']) for a in analyses], sql)
+
+def save_analysis(post_id: str, product_id: str, user_id: str, data: Dict[str, Any], cursor=None):
+    """Save post analysis for a specific user's product. Preserves triage status and existing AI on update."""
+    analysis = dict(data, post_id=post_id, product_id=product_id, user_id=user_id)
+    def _apply(cursor):
+        _store_analyses(cursor, [analysis])
     if cursor:
-        cursor.execute(query, params)
+        _apply(cursor)
     else:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(query, params)
-        conn.commit()
-        conn.close()
+        _write(_apply)
+
+def save_processed_batch(analyses: List[Dict[str, Any]], processed_posts: List[Dict[str, Any]]):
+    """
+    Persist one `process` batch in a single transaction: the analysis rows
+    (dicts with post_id, product_id, user_id plus save_analysis fields) and
+    the processed score/comment counts of each post.
+    """
+    def _apply(conn):
+        if analyses:
+            _store_analyses(conn, analyses)
+        if processed_posts:
+            conn.executemany(_MARK_PROCESSED_SQL, [
+                (p['score'], p['num_comments'], p['id'], p['id']) for p in processed_posts
+            ])
+    _write(_apply)
+
+
+# Existing rows below the floor (not triaged, no AI) -> markers; their lead_index rows go too
+_COMPACT_SPARSE = "relevance_score < ? AND ai_analysis IS NULL AND triage_status IS NULL"
+
+_MARKERS_FROM_ANALYSIS_SQL = """
+INSERT INTO analysis_markers (user_id, product_id, post_id, processed_score, processed_comments)
+SELECT user_id, product_id, post_id, last_processed_score, last_processed_comments
+FROM post_analysis WHERE {where}
+ON CONFLICT (user_id, product_id, post_id) DO UPDATE SET
+    processed_score = excluded.processed_score,
+    processed_comments = excluded.processed_comments
+"""
 
+def compact_post_analysis(floor: float = None) -> int:
+    """
+    Replace existing below-floor post_analysis rows with analysis_markers
+    (data written before the floor existed, or after raising it). Returns
+    the number of rows compacted.
+    """
+    floor = ANALYSIS_STORAGE_FLOOR if floor is None else floor
+    def _apply(conn):
+        conn.execute(_MARKERS_FROM_ANALYSIS_SQL.format(where=_COMPACT_SPARSE), (floor,))
+        conn.execute(f"DELETE FROM lead_index WHERE {_COMPACT_SPARSE}", (floor,))
+        return conn.execute(f"DELETE FROM post_analysis WHERE {_COMPACT_SPARSE}", (floor,)).rowcount
+    return _write(_apply)
 
 def get_existing_analysis(post_id: str, product_id: str, user_id: str):
     """Get existing analysis for a post/product/user combo. Returns dict or None."""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ai_analysis, relevance_score, semantic_similarity 
-        FROM post_analysis 
-        WHERE post_id = ? AND product_id = ? AND user_id = ?
-    """, (post_id, product_id, user_id))
-    row = cursor.fetchone()
-    conn.close()
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute("""
+            SELECT ai_analysis, relevance_score, semantic_similarity 
+            FROM post_analysis 
+            WHERE post_id = ? AND product_id = ? AND user_id = ?
+        """, (post_id, product_id, user_id))
+        row = cursor.fetchone()
     if row:
         return dict(row)
     return None
 
 def update_triage_status(user_id: str, product_id: str, post_id: str, status: str):
     """Update triage status and record snapshots/history."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # 1. Fetch current metrics and AI analysis for snapshot
-    cursor.execute("""
-        SELECT relevance_score, semantic_similarity, community_score, ai_analysis
-        FROM post_analysis
-        WHERE post_id = ? AND product_id = ? AND user_id = ?
-    """, (post_id, product_id, user_id))
-    current = cursor.fetchone()
-    
-    if current:
-        rel, sem, com, ai = current
-        # 2. Update post_analysis with status and snapshots
-        cursor.execute("""
-            UPDATE post_analysis 
-            SET triage_status = ?, 
-                triage_at = CURRENT_TIMESTAMP, 
-                updated_at = CURRENT_TIMESTAMP,
-                triage_relevance_snapshot = ?,
-                triage_semantic_snapshot = ?
-            WHERE post_id = ? AND product_id = ? AND user_id = ?
-        """, (status, rel, sem, post_id, product_id, user_id))
+    def _apply(conn):
+        cursor = conn.cursor()
         
-        # 3. Log into triage_history for future AI training
-        # Map None to 'null' for history because of NOT NULL constraint
-        history_status = status if status is not None else "null"
+        # 1. Fetch current metrics and AI analysis for snapshot
         cursor.execute("""
-            INSERT INTO triage_history (
-                post_id, product_id, user_id, status, 
-                relevance_score, semantic_similarity, community_score, ai_analysis_snapshot
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (post_id, product_id, user_id, history_status, rel, sem, com, ai))
+            SELECT relevance_score, semantic_similarity, community_score, ai_analysis
+            FROM post_analysis
+            WHERE post_id = ? AND product_id = ? AND user_id = ?
+        """, (post_id, product_id, user_id))
+        current = cursor.fetchone()
         
-    conn.commit()
-    conn.close()
+        if current:
+            rel, sem, com, ai = current
+            # 2. Update post_analysis with status and snapshots
+            cursor.execute("""
+                UPDATE post_analysis 
+                SET triage_status = ?, 
+                    triage_at = CURRENT_TIMESTAMP, 
+                    updated_at = CURRENT_TIMESTAMP,
+                    triage_relevance_snapshot = ?,
+                    triage_semantic_snapshot = ?
+                WHERE post_id = ? AND product_id = ? AND user_id = ?
+            """, (status, rel, sem, post_id, product_id, user_id))
+            
+            # 3. Log into triage_history for future AI training
+            # Map None to 'null' for history because of NOT NULL constraint
+            history_status = status if status is not None else "null"
+            # Toggling triage back and forth re-references the same snapshot blob
+            _put_blobs(cursor, [ai])
+            cursor.execute("""
+                INSERT INTO triage_history (
+                    post_id, product_id, user_id, status, 
+                    relevance_score, semantic_similarity, community_score, ai_analysis_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (post_id, product_id, user_id, history_status, rel, sem, com, _text_hash(ai)))
+            _refresh_leads(cursor, [(user_id, product_id, post_id)])
+    _write(_apply)
 
 def get_post(post_id: str):
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM posts WHERE id = ?", (post_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute("SELECT * FROM posts WHERE id = ?", (post_id,))
+        row = cursor.fetchone()
+    return _text_row(row) if row else None
 
 def get_analysis(post_id: str, product_id: str, user_id: str = None):
     """Get analysis for a post. If user_id provided, filter by user."""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    if user_id:
-        cursor.execute("SELECT * FROM post_analysis WHERE post_id = ? AND product_id = ? AND user_id = ?", (post_id, product_id, user_id))
-    else:
-        cursor.execute("SELECT * FROM post_analysis WHERE post_id = ? AND product_id = ?", (post_id, product_id))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        if user_id:
+            cursor.execute("SELECT * FROM post_analysis WHERE post_id = ? AND product_id = ? AND user_id = ?", (post_id, product_id, user_id))
+        else:
+            cursor.execute("SELECT * FROM post_analysis WHERE post_id = ? AND product_id = ?", (post_id, product_id))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        row = dict(row)
+        return _with_signals([row], _load_post_intents(conn, [row['post_id']]))[0]
 
-def get_unprocessed_posts(subreddit_filter: List[str] = None, limit: int = None, force: bool = False, user_id: str = None, product_id: str = None):
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+def work_consumer(user_id: str = None, product_id: str = None, subreddit_filter: List[str] = None) -> str:
+    """Key identifying one `process` workload in work_cursors."""
+    subs = ",".join(sorted(subreddit_filter)) if subreddit_filter else "*"
+    return f"{user_id or '*'}|{product_id or 'all'}|{subs}"
+
+def get_work_high_water() -> int:
+    """Latest change sequence number handed out (0 before the first)."""
+    with read_connection() as conn:
+        row = conn.execute("SELECT value FROM work_seq WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def get_work_cursor(user_id: str = None, product_id: str = None, subreddit_filter: List[str] = None) -> Optional[int]:
+    """Last change sequence consumed by this workload, or None if it has never run."""
+    with read_connection() as conn:
+        row = conn.execute(
+            "SELECT last_seq FROM work_cursors WHERE consumer = ?",
+            (work_consumer(user_id, product_id, subreddit_filter),)
+        ).fetchone()
+    return row[0] if row else None
+
+def advance_work_cursor(user_id: str = None, product_id: str = None, subreddit_filter: List[str] = None, seq: int = 0):
+    """Mark every change up to `seq` as consumed by this workload."""
+    def _apply(conn):
+        conn.execute("""
+            INSERT INTO work_cursors (consumer, last_seq, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(consumer) DO UPDATE SET
+                last_seq = MAX(work_cursors.last_seq, excluded.last_seq),
+                updated_at = CURRENT_TIMESTAMP
+        """, (work_consumer(user_id, product_id, subreddit_filter), seq))
+    _write(_apply)
+
+# Sequence numbers come from the work_seq counter (migration 3), which deletes
+# from pending_work cannot rewind
+_NEXT_SEQ_SQL = "UPDATE work_seq SET value = value + 1 WHERE id = 1"
+
+_REQUEUE_SQL = """
+INSERT INTO pending_work (post_id, seq)
+VALUES (?, (SELECT value FROM work_seq WHERE id = 1))
+ON CONFLICT(post_id) DO UPDATE SET seq = excluded.seq, queued_at = CURRENT_TIMESTAMP
+"""
+
+def _requeue(conn, post_ids: List[str]):
+    for post_id in post_ids:
+        conn.execute(_NEXT_SEQ_SQL)
+        conn.execute(_REQUEUE_SQL, (post_id,))
+
+def requeue_posts(post_ids: List[str]):
+    """Give posts a fresh change sequence so every workload picks them up again (e.g. after a failure)."""
+    if not post_ids:
+        return
+    _write(lambda conn: _requeue(conn, post_ids))
+
+def _unprocessed_query(subreddit_filter: List[str] = None, force: bool = False, user_id: str = None, product_id: str = None, last_seq: Optional[int] = None,
+                       since=None, until=None, cursor_condition: str = "w.seq > ?"):
+    """
+    Build the FROM/WHERE parts of the pending-posts query (portable SQL with
+    `?` placeholders). `last_seq` is the workload's work cursor, if any,
+    applied with `cursor_condition` (Postgres cursors are transaction ids);
+    `since`/`until` bound the post creation time (epoch, datetime or ISO).
+    Returns (source, conditions, join_params, where_params, key_column) where
+    key_column is the unique, indexed column used for keyset pagination.
+    """
+    join_params = []
+    where_params = []
+    conditions = []
+    source = "posts p"
+    key_column = "p.id"
     
-    params = []
+    if not force:
+        # Workloads that have run before only look at posts changed since their
+        # cursor (O(pending) via idx_pending_work_seq). First runs scan everything once.
+        if last_seq is not None:
+            source = "pending_work w JOIN posts p ON p.id = w.post_id"
+            conditions.append(cursor_condition)
+            where_params.append(last_seq)
+            key_column = "w.seq"
     
-    if force:
-        query = "SELECT * FROM posts"
-    elif user_id and product_id and product_id != "all":
-        # Multi-tenant logic: Get posts that:
-        # 1. Need global embedding (p.embedding_id IS NULL)
-        # 2. Don't have an analysis for this SPECIFIC product/user (pa.post_id IS NULL)
-        # 3. Metrics changed since THIS user last analyzed it 
-        query = """
-            SELECT p.* FROM posts p
-            LEFT JOIN post_analysis pa ON p.id = pa.post_id 
-                AND pa.product_id = ? AND pa.user_id = ?
-            WHERE (p.embedding_id IS NULL 
-            OR pa.post_id IS NULL 
-            OR p.score != pa.last_processed_score 
-            OR p.num_comments != pa.last_processed_comments)
-        """
-        params.extend([product_id, user_id])
-    else:
-        # Legacy/Global logic: Get posts that need embedding or global score update
-        query = """
-            SELECT * FROM posts 
-            WHERE (embedding_id IS NULL 
-            OR score != last_processed_score 
-            OR num_comments != last_processed_comments)
-        """
+        if user_id and product_id and product_id != "all":
+            # Multi-tenant logic: Get posts that:
+            # 1. Need global embedding (p.embedding_id IS NULL)
+            # 2. Were never scored for this SPECIFIC product/user (no analysis row, no below-floor marker)
+            # 3. Metrics changed since THIS user last analyzed it 
+            source += """
+                LEFT JOIN post_analysis pa ON p.id = pa.post_id 
+                    AND pa.product_id = ? AND pa.user_id = ?
+                LEFT JOIN analysis_markers m ON m.user_id = ? AND m.product_id = ? AND m.post_id = p.id"""
+            join_params.extend([product_id, user_id, user_id, product_id])
+            conditions.append("""(p.embedding_id IS NULL 
+                OR (pa.post_id IS NULL AND m.post_id IS NULL)
+                OR p.score != COALESCE(pa.last_processed_score, m.processed_score) 
+                OR p.num_comments != COALESCE(pa.last_processed_comments, m.processed_comments))""")
+        else:
+            # Legacy/Global logic: Get posts that need embedding or global score update
+            conditions.append("""(p.embedding_id IS NULL 
+                OR p.score != p.last_processed_score 
+                OR p.num_comments != p.last_processed_comments)""")
     
     # Subreddit filter
     if subreddit_filter:
         placeholders = ', '.join(['?'] * len(subreddit_filter))
-        condition = f"source IN ({placeholders})"
-        if "WHERE" in query:
-            query += f" AND p.{condition}" if "p." in query else f" AND {condition}"
-        else:
-            query += f" WHERE p.{condition}" if "p." in query else f" WHERE {condition}"
-        params.extend(subreddit_filter)
+        conditions.append(f"p.source IN ({placeholders})")
+        where_params.extend(subreddit_filter)
+    
+    # Creation window (idx_posts_created_utc)
+    if since is not None:
+        conditions.append("p.created_utc >= ?")
+        where_params.append(to_epoch(since))
+    if until is not None:
+        conditions.append("p.created_utc < ?")
+        where_params.append(to_epoch(until))
+    
+    return source, conditions, join_params, where_params, key_column
+
+def _unprocessed_page(source, conditions, join_params, where_params, key_column, last_key, page_size):
+    """One keyset page of the pending-posts query: (sql, params)."""
+    page_conditions = list(conditions)
+    params = join_params + where_params
+    if last_key is not None:
+        page_conditions.append(f"{key_column} > ?")
+        params = params + [last_key]
+    
+    query = f"SELECT p.*, {key_column} AS _page_key FROM {source}"
+    if page_conditions:
+        query += " WHERE " + " AND ".join(page_conditions)
+    query += f" ORDER BY {key_column} LIMIT ?"
+    return query, params + [page_size]
+
+def iter_unprocessed_posts(subreddit_filter: List[str] = None, limit: int = None, force: bool = False, user_id: str = None, product_id: str = None, batch_size: int = 50,
+                           since=None, until=None):
+    """
+    Yield pending posts in batches of at most `batch_size`, using keyset
+    pagination (`key > ? ORDER BY key LIMIT ?`) so only one batch is held in
+    memory regardless of corpus size. `since`/`until` limit the posts'
+    creation time (advancing the work cursor after a windowed run skips the
+    posts outside the window).
+    """
+    last_seq = None if force else get_work_cursor(user_id, product_id, subreddit_filter)
+    source, conditions, join_params, where_params, key_column = _unprocessed_query(
+        subreddit_filter, force, user_id, product_id, last_seq, since, until
+    )
+    last_key = None
+    remaining = limit
+    
+    while remaining is None or remaining > 0:
+        page_size = batch_size if remaining is None else min(batch_size, remaining)
+        query, params = _unprocessed_page(
+            source, conditions, join_params, where_params, key_column, last_key, page_size
+        )
         
-    # Limit
-    if limit:
-        query += " LIMIT ?"
-        params.append(limit)
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         
-    try:
-        cursor.execute(query, params)
-    except sqlite3.OperationalError as e:
-        # Fallback for older schemas or missing columns
-        print(f"DEBUG: DB Query failed ({e}), falling back...")
-        fallback_query = "SELECT * FROM posts WHERE embedding_id IS NULL"
-        if force: fallback_query = "SELECT * FROM posts"
-        cursor.execute(fallback_query)
-    
-    rows = cursor.fetchall()
-    conn.commit()
-    conn.close()
-    return [dict(row) for row in rows]
+        if not rows:
+            return
+        last_key = rows[-1]['_page_key']
+        batch = []
+        for row in rows:
+            post = _text_row(row)
+            del post['_page_key']
+            batch.append(post)
+        yield batch
+        
+        if remaining is not None:
+            remaining -= len(rows)
+        if len(rows) < page_size:
+            return
+
+def get_unprocessed_posts(subreddit_filter: List[str] = None, limit: int = None, force: bool = False, user_id: str = None, product_id: str = None,
+                          since=None, until=None):
+    posts = []
+    for batch in iter_unprocessed_posts(subreddit_filter, limit, force, user_id, product_id, batch_size=500, since=since, until=until):
+        posts.extend(batch)
+    return posts
 
 def add_sync_run(user_id: str, product: str, subreddits: List[str], days: int):
     """Add a sync run record for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO sync_runs (user_id, product, subreddits, days, status, progress)
-        VALUES (?, ?, ?, ?, 'Running', 0)
-    """, (user_id, product, ', '.join(subreddits), days))
-    run_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return run_id
+    def _apply(conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO sync_runs (user_id, product, subreddits, days, status, progress, started_utc)
+            VALUES (?, ?, ?, ?, 'Running', 0, ?)
+        """, (user_id, product, ', '.join(subreddits), days, int(time.time())))
+        return cursor.lastrowid
+    return _write(_apply)
 
 def update_sync_run_status(run_id: int, status: str, progress: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE sync_runs SET status = ?, progress = ? WHERE id = ?", (status, progress, run_id))
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        conn.execute("UPDATE sync_runs SET status = ?, progress = ? WHERE id = ?", (status, progress, run_id))
+    _write(_apply)
+
+_COMMENTS_SQL = "SELECT * FROM comments WHERE post_id = ? ORDER BY score DESC"
 
 def get_comments(post_id: str):
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM comments WHERE post_id = ? ORDER BY score DESC", (post_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(_COMMENTS_SQL, (post_id,))
+        rows = cursor.fetchall()
+    return [_text_row(row) for row in rows]
 
 
 def get_comments_bulk(post_ids: List[str]) -> Dict[str, List[Dict]]:
@@ -505,74 +996,233 @@ def get_comments_bulk(post_ids: List[str]) -> Dict[str, List[Dict]]:
     if not post_ids:
         return {}
     
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
     placeholders = ', '.join(['?'] * len(post_ids))
-    cursor.execute(f"""
-        SELECT * FROM comments 
-        WHERE post_id IN ({placeholders})
-        ORDER BY post_id, score DESC
-    """, post_ids)
-    
-    rows = cursor.fetchall()
-    conn.close()
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"""
+            SELECT * FROM comments 
+            WHERE post_id IN ({placeholders})
+            ORDER BY post_id, score DESC
+        """, post_ids)
+        rows = cursor.fetchall()
     
     # Group by post_id
     result = {pid: [] for pid in post_ids}
     for row in rows:
-        row_dict = dict(row)
+        row_dict = _text_row(row)
         post_id = row_dict['post_id']
         if post_id in result:
             result[post_id].append(row_dict)
     
     return result
 
+def fts_query(text: str) -> str:
+    """
+    Turn user search text into an FTS5 MATCH expression: every term must
+    match, "quoted phrases" stay phrases and a trailing * keeps prefix search.
+    Punctuation (e.g. IG/TIKTOK) is tokenized the same way as the index.
+    """
+    terms = []
+    for term in re.findall(r'"[^"]*"|\S+', text or ""):
+        prefix = term.endswith("*") and not term.startswith('"')
+        term = term.strip('"').rstrip("*")
+        if not term.strip():
+            continue
+        terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+_SEARCH_POSTS_SQL = """
+    SELECT p.id, p.platform, p.source, p.url, p.title, p.author, p.score, p.num_comments, p.created_at,
+           snippet(posts_fts, -1, '[', ']', '...', 16) AS snippet, bm25(posts_fts) AS rank
+    FROM posts_fts JOIN posts p ON p.rowid = posts_fts.rowid
+    WHERE posts_fts MATCH ? {filters}
+    ORDER BY rank LIMIT ?
+"""
+
+_SEARCH_COMMENTS_SQL = """
+    SELECT p.id, p.platform, p.source, p.url, p.title, p.author, p.score, p.num_comments, p.created_at,
+           snippet(comments_fts, 0, '[', ']', '...', 16) AS snippet, bm25(comments_fts) AS rank
+    FROM comments_fts
+    JOIN comments c ON c.rowid = comments_fts.rowid
+    JOIN posts p ON p.id = c.post_id
+    WHERE comments_fts MATCH ? {filters}
+    ORDER BY rank LIMIT ?
+"""
+
+def _search_filters(subreddit: Optional[str], since) -> tuple:
+    filters, params = [], []
+    if subreddit:
+        filters.append("AND p.source = ?")
+        params.append(subreddit)
+    if since:
+        filters.append("AND p.created_utc >= ?")
+        params.append(to_epoch(since))
+    return " ".join(filters), params
+
+def search_posts(query: str, subreddit: str = None, since=None, limit: int = 50, include_comments: bool = True) -> List[Dict[str, Any]]:
+    """
+    Full-text search over post titles/bodies (and, with include_comments,
+    comment bodies) through the FTS5 indexes. Returns posts best match
+    first, each with a `snippet` and `matched_in` ('post' or 'comment').
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    filters, filter_params = _search_filters(subreddit, since)
+    searches = [("post", _SEARCH_POSTS_SQL)]
+    if include_comments:
+        searches.append(("comment", _SEARCH_COMMENTS_SQL))
+    
+    best = {}
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        for matched_in, sql in searches:
+            cursor.execute(sql.format(filters=filters), [match] + filter_params + [limit])
+            for row in cursor.fetchall():
+                hit = dict(row, matched_in=matched_in)
+                # bm25 is lower-is-better; keep each post's best hit
+                if hit['id'] not in best or hit['rank'] < best[hit['id']]['rank']:
+                    best[hit['id']] = hit
+    return sorted(best.values(), key=lambda hit: hit['rank'])[:limit]
+
+# A range read of idx_lead_index_rank; the body and the latest response are primary-key lookups.
+_THREADS_TEMPLATE = """
+    SELECT li.post_id AS id, li.product_id, li.platform, li.source, li.url, li.title, p.body, li.author,
+           li.score, li.num_comments, li.created_at,
+           li.relevance_score, li.semantic_similarity, li.community_score, li.ai_analysis,
+           li.pain_matches, li.intent_matches,
+           li.triage_status, li.triage_relevance_snapshot,
+           CASE 
+             WHEN li.triage_status IS NOT NULL 
+                  AND ABS(li.relevance_score - COALESCE(li.triage_relevance_snapshot, 0)) > 1.0 
+             THEN 1 ELSE 0 
+           END as is_stale,
+           r.id as res_id, r.response_text as res_text, r.style as res_style, r.tokens_used as res_tokens
+    FROM lead_index li
+    JOIN posts p ON p.id = li.post_id
+    LEFT JOIN generated_responses r ON r.id = li.latest_response_id
+    WHERE li.user_id = ? AND li.product_id = ? {filters}
+    ORDER BY li.relevance_score DESC 
+    LIMIT ?
+"""
+# Intent filter: a post_signals primary-key probe per lead, walked in rank order
+_THREADS_INTENT_FILTER = "AND EXISTS (SELECT 1 FROM post_signals s WHERE s.post_id = li.post_id AND s.intent = ?)"
+
+def _threads_query(user_id: str, product_id: str, limit: int, intent: str = None, since=None, until=None) -> tuple:
+    """(sql, params) for get_lead_threads."""
+    filters, params = [], [user_id, product_id]
+    # Creation window: a range scan of idx_lead_index_created, then sorted by relevance
+    if since is not None:
+        filters.append("AND li.created_utc >= ?")
+        params.append(to_epoch(since))
+    if until is not None:
+        filters.append("AND li.created_utc < ?")
+        params.append(to_epoch(until))
+    if intent:
+        filters.append(_THREADS_INTENT_FILTER)
+        params.append(intent)
+    return _THREADS_TEMPLATE.format(filters=" ".join(filters)), params + [limit]
+
+def get_lead_threads(user_id: str, product_id: str, limit: int = 50, intent: str = None,
+                     since=None, until=None) -> List[Dict[str, Any]]:
+    """
+    Top leads for a user's product, with the latest generated response
+    (res_* columns). `intent` keeps only posts with that detected intent;
+    `since`/`until` (epoch, datetime or ISO) bound the post creation time.
+    """
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(*_threads_query(user_id, product_id, limit, intent, since, until))
+        rows = [_text_row(row) for row in cursor.fetchall()]
+        return _with_signals(rows, _load_post_intents(conn, [row['id'] for row in rows]), post_key='id')
+
+# Discovery modes for `radar report`: (WHERE clause, ORDER BY clause)
+REPORT_MODES = {
+    # Prioritize Semantic Similarity
+    "DIRECT_FIT": ("pa.semantic_similarity >= 0.3", "pa.semantic_similarity DESC, pa.community_score DESC"),
+    # Look for adjacent problems (mid-similarity, high intent)
+    "OPPORTUNITY": ("pa.semantic_similarity BETWEEN 0.15 AND 0.4", "pa.relevance_score DESC"),
+    # Prioritize where most people are talking
+    "INTENSITY": ("pa.community_score >= 0.5", "pa.community_score DESC, pa.semantic_similarity DESC"),
+}
+_DEFAULT_REPORT_MODE = ("pa.relevance_score > 0", "pa.relevance_score DESC")
+
+_REPORT_SQL = """
+    SELECT 
+        p.id, p.title, p.url, p.body, p.source, p.created_at, p.intent,
+        pa.relevance_score, pa.semantic_similarity, pa.community_score, pa.ai_analysis
+    FROM posts p
+    JOIN post_analysis pa ON p.id = pa.post_id
+    WHERE pa.product_id = ? AND {where} 
+    ORDER BY {order_by} 
+    LIMIT ?
+"""
+
+def get_report_rows(product_id: str, mode: str = "DIRECT_FIT", limit: int = 20) -> List[Dict[str, Any]]:
+    """Analyzed posts for a product, filtered and ordered by a discovery mode."""
+    where, order_by = REPORT_MODES.get(mode, _DEFAULT_REPORT_MODE)
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(_REPORT_SQL.format(where=where, order_by=order_by), (product_id, limit))
+        rows = cursor.fetchall()
+    return [_text_row(row) for row in rows]
+
+def explain_query_plan(query: str, params: tuple = ()) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+    with read_connection() as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[3] for row in rows]
+
+_SYNC_HISTORY_SQL = "SELECT * FROM sync_runs WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?"
+
 def get_sync_history(user_id: str = None, limit: int = 10):
     """Get sync history. If user_id provided, filter by user."""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    if user_id:
-        cursor.execute("SELECT * FROM sync_runs WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?", (user_id, limit))
-    else:
-        cursor.execute("SELECT * FROM sync_runs ORDER BY timestamp DESC LIMIT ?", (limit,))
-    rows = cursor.fetchall()
-    conn.close()
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        if user_id:
+            cursor.execute(_SYNC_HISTORY_SQL, (user_id, limit))
+        else:
+            cursor.execute("SELECT * FROM sync_runs ORDER BY timestamp DESC LIMIT ?", (limit,))
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
+def _product_row(row) -> Dict[str, Any]:
+    """Product dict without the binary embedding (use get_product_embedding for that)."""
+    product = dict(row)
+    product.pop('embedding_vector', None)
+    return product
+
 def get_products(user_id: str = None) -> List[Dict[str, Any]]:
     """Get products. If user_id provided, filter by user."""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    if user_id:
-        cursor.execute("SELECT * FROM products WHERE user_id = ? ORDER BY name ASC", (user_id,))
-    else:
-        cursor.execute("SELECT * FROM products ORDER BY name ASC")
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        if user_id:
+            cursor.execute("SELECT * FROM products WHERE user_id = ? ORDER BY name ASC", (user_id,))
+        else:
+            cursor.execute("SELECT * FROM products ORDER BY name ASC")
+        rows = cursor.fetchall()
+    return [_product_row(row) for row in rows]
 
 def get_product(product_id: str, user_id: str = None) -> Optional[Dict[str, Any]]:
     """Get a product by ID. If user_id provided, filter by user."""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    if user_id:
-        cursor.execute("SELECT * FROM products WHERE id = ? AND user_id = ?", (product_id, user_id))
-    else:
-        cursor.execute("SELECT * FROM products WHERE id = ?", (product_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        if user_id:
+            cursor.execute("SELECT * FROM products WHERE id = ? AND user_id = ?", (product_id, user_id))
+        else:
+            cursor.execute("SELECT * FROM products WHERE id = ?", (product_id,))
+        row = cursor.fetchone()
+    return _product_row(row) if row else None
 
 def save_product_record(product_data: Dict[str, Any]):
     """Save a product record. Requires user_id in product_data."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     # Handle array types by converting to JSON strings if they aren't already strings
     pain_signals = product_data['pain_signals']
     if not isinstance(pain_signals, str):
@@ -586,130 +1236,107 @@ def save_product_record(product_data: Dict[str, Any]):
     if not isinstance(target_subreddits, str):
         target_subreddits = json.dumps(target_subreddits)
 
-    cursor.execute("""
-    INSERT OR REPLACE INTO products (
-        id, user_id, name, description, pain_signals, intent_signals, 
-        target_subreddits, embedding_context, embedding_id, updated_at, website_url, default_response_style
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
-    """, (
-        product_data['id'],
-        product_data['user_id'],
-        product_data['name'],
-        product_data['description'],
-        pain_signals,
-        intent_signals,
-        target_subreddits,
-        product_data.get('embedding_context'),
-        product_data.get('embedding_id'),
-        product_data.get('website_url'),
-        product_data.get('default_response_style', 'empathetic')
-    ))
-    
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        conn.execute("""
+        INSERT OR REPLACE INTO products (
+            id, user_id, name, description, pain_signals, intent_signals, 
+            target_subreddits, embedding_context, embedding_id, updated_at, website_url, default_response_style
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+        """, (
+            product_data['id'],
+            product_data['user_id'],
+            product_data['name'],
+            product_data['description'],
+            pain_signals,
+            intent_signals,
+            target_subreddits,
+            product_data.get('embedding_context'),
+            product_data.get('embedding_id'),
+            product_data.get('website_url'),
+            product_data.get('default_response_style', 'empathetic')
+        ))
+    _write(_apply)
 
 def delete_product(product_id: str, user_id: str):
     """Delete a product for a specific user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM products WHERE id = ? AND user_id = ?", (product_id, user_id))
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        conn.execute("DELETE FROM products WHERE id = ? AND user_id = ?", (product_id, user_id))
+    _write(_apply)
 
 
 def update_product_embedding(product_id: str, user_id: str, embedding: List[float], context: str = None):
     """
     Update the cached embedding for a product.
-    Stores the embedding as JSON for portability.
+    Stores the embedding as a packed float32 BLOB (see radar.storage.codecs).
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    embedding_json = json.dumps(embedding)
-    
-    if context:
-        cursor.execute("""
-            UPDATE products 
-            SET embedding_vector = ?, embedding_context = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ? AND user_id = ?
-        """, (embedding_json, context, product_id, user_id))
-    else:
-        cursor.execute("""
-            UPDATE products 
-            SET embedding_vector = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ? AND user_id = ?
-        """, (embedding_json, product_id, user_id))
+    embedding_blob = pack_vector(embedding)
     
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        if context:
+            conn.execute("""
+                UPDATE products 
+                SET embedding_vector = ?, embedding_context = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND user_id = ?
+            """, (embedding_blob, context, product_id, user_id))
+        else:
+            conn.execute("""
+                UPDATE products 
+                SET embedding_vector = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND user_id = ?
+            """, (embedding_blob, product_id, user_id))
+    _write(_apply)
 
 
-def get_product_embedding(product_id: str, user_id: str) -> Optional[List[float]]:
+def get_product_embedding(product_id: str, user_id: str) -> Optional[np.ndarray]:
     """
-    Get the cached embedding for a product.
+    Get the cached embedding for a product as a read-only float32 array.
     Returns None if no cached embedding exists.
     """
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT embedding_vector FROM products 
-        WHERE id = ? AND user_id = ?
-    """, (product_id, user_id))
-    
-    row = cursor.fetchone()
-    conn.close()
+    with read_connection() as conn:
+        row = conn.execute("""
+            SELECT embedding_vector FROM products 
+            WHERE id = ? AND user_id = ?
+        """, (product_id, user_id)).fetchone()
     
-    if row and row['embedding_vector']:
-        try:
-            return json.loads(row['embedding_vector'])
-        except (json.JSONDecodeError, TypeError):
-            return None
-    return None
+    return unpack_vector(row[0]) if row else None
 
 def save_generated_response(user_id: str, post_id: str, product_id: str, style: str, response_text: str, tokens_used: int):
     """Save a generated response for a user."""
     import uuid
-    conn = get_connection()
-    cursor = conn.cursor()
     response_id = str(uuid.uuid4())[:8]
-    cursor.execute("""
-        INSERT INTO generated_responses (id, user_id, post_id, product_id, style, response_text, tokens_used)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (response_id, user_id, post_id, product_id, style, response_text, tokens_used))
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        conn.execute("""
+            INSERT INTO generated_responses (id, user_id, post_id, product_id, style, response_text, tokens_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (response_id, user_id, post_id, product_id, style, response_text, tokens_used))
+        conn.execute(_LEAD_RESPONSE_SQL, (response_id, user_id, product_id, post_id))
+    _write(_apply)
     return response_id
 
+_GENERATED_RESPONSES_SQL = """
+    SELECT * FROM generated_responses 
+    WHERE user_id = ? AND post_id = ? AND product_id = ? 
+    ORDER BY created_at DESC LIMIT ?
+"""
+
 def get_generated_responses(user_id: str, post_id: str, product_id: str, limit: int = 5):
     """Get generated responses for a user's product."""
-    conn = get_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM generated_responses 
-        WHERE user_id = ? AND post_id = ? AND product_id = ? 
-        ORDER BY created_at DESC LIMIT ?
-    """, (user_id, post_id, product_id, limit))
-    rows = cursor.fetchall()
-    conn.close()
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(_GENERATED_RESPONSES_SQL, (user_id, post_id, product_id, limit))
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 def update_response_feedback(response_id: str, feedback: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE generated_responses SET feedback = ? WHERE id = ?", (feedback, response_id))
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        conn.execute("UPDATE generated_responses SET feedback = ? WHERE id = ?", (feedback, response_id))
+    _write(_apply)
 
 def get_user_setting(user_id: str, key: str, default: Any = None) -> Any:
     """Get a user setting by key for a specific user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM user_settings WHERE user_id = ? AND key = ?", (user_id, key))
-    row = cursor.fetchone()
-    conn.close()
+    with read_connection() as conn:
+        row = conn.execute("SELECT value FROM user_settings WHERE user_id = ? AND key = ?", (user_id, key)).fetchone()
     if row:
         try:
             return json.loads(row[0])
@@ -719,9 +1346,130 @@ def get_user_setting(user_id: str, key: str, default: Any = None) -> Any:
 
 def save_user_setting(user_id: str, key: str, value: Any):
     """Save a user setting for a specific user."""
-    conn = get_connection()
-    cursor = conn.cursor()
     val_str = json.dumps(value) if not isinstance(value, str) else value
-    cursor.execute("INSERT OR REPLACE INTO user_settings (user_id, key, value) VALUES (?, ?, ?)", (user_id, key, val_str))
-    conn.commit()
-    conn.close()
+    def _apply(conn):
+        conn.execute("INSERT OR REPLACE INTO user_settings (user_id, key, value) VALUES (?, ?, ?)", (user_id, key, val_str))
+    _write(_apply)
+
+
+# --- Retention ---------------------------------------------------------------
+# radar.storage.retention archives rows older than their table's TTL and deletes
+# them in small batches. Posts a user has triaged or answered never expire.
+def _kept_post(post: str) -> str:
+    return (f"(EXISTS (SELECT 1 FROM triage_history t WHERE t.post_id = {post})"
+            f" OR EXISTS (SELECT 1 FROM generated_responses g WHERE g.post_id = {post}))")
+
+# table -> (source, key, age column, condition). posts/comments age by created_utc
+# (epoch seconds), analyses by updated_at (UTC CURRENT_TIMESTAMP text).
+_EXPIRY_RULES = {
+    "posts": ("posts p", "p.id", "p.created_utc", f"NOT {_kept_post('p.id')}"),
+    "comments": ("comments c", "c.id", "c.created_utc", f"NOT {_kept_post('c.post_id')}"),
+    "post_analysis": (
+        "post_analysis pa", "(pa.post_id, pa.product_id, pa.user_id)", "pa.updated_at",
+        "pa.triage_status IS NULL AND pa.ai_analysis IS NULL"
+    ),
+}
+
+# Rows removed with an expired key, children first: (table, key column, archived?)
+_PURGE_TARGETS = {
+    "posts": [
+        ("lead_index", "post_id", False), ("analysis_markers", "post_id", False),
+        ("pending_work", "post_id", False), ("post_signals", "post_id", True),
+        ("post_analysis", "post_id", True), ("comments", "post_id", True), ("posts", "id", True),
+    ],
+    "comments": [("comments", "id", True)],
+    "post_analysis": [
+        ("lead_index", "(post_id, product_id, user_id)", False),
+        ("post_analysis", "(post_id, product_id, user_id)", True),
+    ],
+}
+
+def _in_keys(column: str, keys: List) -> tuple:
+    """`column IN (...)` clause and params; a parenthesised column list matches tuple keys."""
+    if column.startswith("("):
+        row = "(" + ", ".join(["?"] * len(keys[0])) + ")"
+        return f"{column} IN (VALUES {', '.join([row] * len(keys))})", [v for key in keys for v in key]
+    return f"{column} IN ({', '.join(['?'] * len(keys))})", list(keys)
+
+def _expired_keys(cursor, table: str, cutoff, limit: int = None, keys: List = None, sql=_same_sql) -> List:
+    """Keys of `table` rows past `cutoff` (oldest first), optionally restricted to `keys`."""
+    source, key, age, condition = _EXPIRY_RULES[table]
+    query, params = f"SELECT {key.strip('()')} FROM {source} WHERE {age} < ? AND {condition}", [cutoff]
+    if keys is not None:
+        clause, key_params = _in_keys(key, keys)
+        query, params = f"{query} AND {clause}", params + key_params
+    else:
+        query += f" ORDER BY {age}"
+    if limit:
+        query, params = f"{query} LIMIT ?", params + [limit]
+    rows = [tuple(row.values()) if isinstance(row, dict) else tuple(row)
+            for row in cursor.execute(sql(query), params).fetchall()]
+    return rows if key.startswith("(") else [row[0] for row in rows]
+
+def _export_rows(cursor, table: str, keys: List, sql=_same_sql) -> Dict[str, List[Dict[str, Any]]]:
+    """The rows purging `keys` would remove from archived tables, by table."""
+    exported = {}
+    for target, column, archived in _PURGE_TARGETS[table]:
+        if not archived:
+            continue
+        clause, params = _in_keys(column, keys)
+        result = cursor.execute(sql(f"SELECT * FROM {target} WHERE {clause}"), params)
+        rows = result.fetchall()
+        if rows and not isinstance(rows[0], dict):
+            columns = [d[0] for d in result.description]
+            rows = [dict(zip(columns, row)) for row in rows]
+        exported[target] = [_text_row(row) for row in rows]
+    return exported
+
+def _purge_rows(cursor, table: str, cutoff, keys: List, sql=_same_sql, search_index: bool = False) -> List:
+    """
+    Delete the rows of `keys` that are still expired (a post triaged since it
+    was selected is spared) with everything derived from them. Expired
+    analyses leave a marker so the pair is not re-scored. Returns the keys
+    purged.
+    """
+    keys = _expired_keys(cursor, table, cutoff, keys=keys, sql=sql) if keys else []
+    if not keys:
+        return []
+    if table == "post_analysis":
+        clause, params = _in_keys("(post_id, product_id, user_id)", keys)
+        cursor.execute(sql(_MARKERS_FROM_ANALYSIS_SQL.format(where=clause)), params)
+    for target, column, _ in _PURGE_TARGETS[table]:
+        clause, params = _in_keys(column, keys)
+        if search_index and target in _FTS_INDEXES:
+            _fts_delete(cursor, target, clause, params)
+        cursor.execute(sql(f"DELETE FROM {target} WHERE {clause}"), params)
+    return keys
+
+def find_expired_rows(table: str, cutoff, limit: int = None) -> List:
+    """Keys of posts / comments / post_analysis rows older than `cutoff` that may be expired."""
+    with read_connection() as conn:
+        return _expired_keys(conn, table, cutoff, limit)
+
+def export_expired_rows(table: str, keys: List) -> Dict[str, List[Dict[str, Any]]]:
+    """Rows (as dicts, by table) that purge_expired_rows(table, ..., keys) would delete."""
+    with read_connection() as conn:
+        return _export_rows(conn, table, keys)
+
+def purge_expired_rows(table: str, cutoff, keys: List) -> List:
+    """Delete expired `keys` and their dependent rows in one write. Returns the keys purged."""
+    def _apply(conn):
+        return _purge_rows(conn, table, cutoff, keys, search_index=True)
+    return _write(_apply)
+
+
+# --- Backend selection -------------------------------------------------------
+# Everything above is the SQLite implementation. When DATABASE_URL names a
+# server database, the public functions are rebound to that backend so callers
+# keep importing from radar.storage.db.
+from radar.storage.backends import create_backend, SQLiteBackend
+
+_sqlite_backend = SQLiteBackend(module=sys.modules[__name__])
+_backend = create_backend(DATABASE_URL) if DATABASE_URL else _sqlite_backend
+if _backend is not _sqlite_backend:
+    globals().update(_backend.api())
+
+
+def get_backend():
+    """The active storage backend (SQLiteBackend unless DATABASE_URL is set)."""
+    return _backend
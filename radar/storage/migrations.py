@@ -0,0 +1,692 @@
+"""
+Versioned schema migrations for the SQLite store.
+
+Each migration runs exactly once, in order, inside its own transaction and
+records itself in `schema_version`. Migrations must be idempotent so that
+databases created by the old ALTER-on-startup code upgrade cleanly.
+
+To change the schema, append a new (version, description, function) entry
+to MIGRATIONS. Never edit a migration that has already shipped.
+"""
+import json
+import sqlite3
+from typing import Callable, List, Tuple
+
+
+def _column_names(cursor, table: str) -> set:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _add_column_if_missing(cursor, table: str, column: str, decl: str):
+    if column not in _column_names(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _baseline_schema(cursor):
+    """Tables and columns that init_db() used to (re)create on every start."""
+    # Posts table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS posts (
+        id TEXT PRIMARY KEY,
+        platform TEXT NOT NULL,
+        source TEXT NOT NULL,
+        url TEXT,
+        title TEXT,
+        body TEXT,
+        author TEXT,
+        score INTEGER DEFAULT 0,
+        num_comments INTEGER DEFAULT 0,
+        created_at TIMESTAMP,
+        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ingestion_method TEXT,
+        embedding_id TEXT,
+        pain_signals TEXT,
+        intent TEXT,
+        relevance_score REAL DEFAULT 0,
+        ai_analysis TEXT,
+        semantic_similarity REAL DEFAULT 0,
+        community_score REAL DEFAULT 0,
+        last_processed_score INTEGER DEFAULT -1,
+        last_processed_comments INTEGER DEFAULT -1
+    )
+    """)
+
+    # Comments table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS comments (
+        id TEXT PRIMARY KEY,
+        post_id TEXT NOT NULL,
+        parent_id TEXT,
+        body TEXT,
+        author TEXT,
+        score INTEGER DEFAULT 0,
+        created_at TIMESTAMP,
+        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        depth INTEGER DEFAULT 0,
+        embedding_id TEXT,
+        pain_signals TEXT,
+        is_solution BOOLEAN DEFAULT FALSE,
+        FOREIGN KEY (post_id) REFERENCES posts(id)
+    )
+    """)
+
+    # Post Analysis table (per-product, per-user)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS post_analysis (
+        post_id TEXT,
+        product_id TEXT,
+        user_id TEXT DEFAULT 'default_user',
+        relevance_score REAL DEFAULT 0,
+        semantic_similarity REAL DEFAULT 0,
+        community_score REAL DEFAULT 0,
+        ai_analysis TEXT,
+        signals_json TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (post_id, product_id, user_id),
+        FOREIGN KEY (post_id) REFERENCES posts(id)
+    )
+    """)
+
+    # Products table (per-user)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id TEXT,
+        user_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT NOT NULL,
+        pain_signals TEXT NOT NULL,
+        intent_signals TEXT NOT NULL,
+        target_subreddits TEXT NOT NULL,
+        embedding_context TEXT,
+        embedding_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        website_url TEXT,
+        default_response_style TEXT DEFAULT 'empathetic',
+        PRIMARY KEY (id, user_id)
+    )
+    """)
+
+    # Sync runs history (per-user)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        product TEXT,
+        subreddits TEXT,
+        days INTEGER,
+        status TEXT,
+        progress INTEGER DEFAULT 0
+    )
+    """)
+
+    # Generated responses (per-user)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS generated_responses (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        style TEXT NOT NULL DEFAULT 'empathetic',
+        response_text TEXT NOT NULL,
+        tokens_used INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        feedback TEXT,
+        FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Triage History (per-user/product/post feedback log)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS triage_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        post_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        relevance_score REAL,
+        semantic_similarity REAL,
+        community_score REAL,
+        ai_analysis_snapshot TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (post_id) REFERENCES posts(id)
+    )
+    """)
+
+    # User Settings table (per-user)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user_settings (
+        user_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT,
+        PRIMARY KEY (user_id, key)
+    )
+    """)
+
+    # Columns added over time to databases created by older versions
+    legacy_columns = [
+        ("post_analysis", "ai_analysis", "TEXT"),
+        ("post_analysis", "semantic_similarity", "REAL DEFAULT 0"),
+        ("post_analysis", "community_score", "REAL DEFAULT 0"),
+        ("post_analysis", "last_processed_score", "INTEGER DEFAULT -1"),
+        ("post_analysis", "last_processed_comments", "INTEGER DEFAULT -1"),
+        ("post_analysis", "triage_status", "TEXT"),  # 'agree', 'disagree', NULL
+        ("post_analysis", "triage_at", "TIMESTAMP"),
+        ("post_analysis", "triage_relevance_snapshot", "REAL"),
+        ("post_analysis", "triage_semantic_snapshot", "REAL"),
+        ("post_analysis", "updated_at", "TIMESTAMP"),  # ALTER cannot add a CURRENT_TIMESTAMP default
+        ("post_analysis", "user_id", "TEXT"),
+        ("products", "user_id", "TEXT"),
+        ("products", "website_url", "TEXT"),
+        ("products", "default_response_style", "TEXT DEFAULT 'empathetic'"),
+        ("products", "embedding_vector", "TEXT"),  # cached embedding (float32 BLOB since v4)
+        ("generated_responses", "user_id", "TEXT"),
+        ("sync_runs", "user_id", "TEXT"),
+    ]
+    for table, column, decl in legacy_columns:
+        _add_column_if_missing(cursor, table, column, decl)
+
+
+def _hot_path_indexes(cursor):
+    """Indexes backing /api/threads, comments, sync history and response lookups."""
+    # /api/threads: filter on tenant, ordered by relevance
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_post_analysis_tenant_relevance
+    ON post_analysis (user_id, product_id, relevance_score DESC)
+    """)
+    # get_comments / get_comments_bulk
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_comments_post_score
+    ON comments (post_id, score DESC)
+    """)
+    # get_sync_history / stuck-sync detection
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sync_runs_user_timestamp
+    ON sync_runs (user_id, timestamp DESC)
+    """)
+    # Latest generated response per (user, post, product)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_generated_responses_tenant_created
+    ON generated_responses (user_id, post_id, product_id, created_at DESC)
+    """)
+
+
+def _pending_work_queue(cursor):
+    """
+    Change log of posts that need (re)processing.
+
+    Every insert or score/comment-count change stamps the post with the next
+    sequence number. Each `process` workload remembers the last sequence it
+    consumed in work_cursors, so finding work is a range read on seq.
+    Numbers come from the one-row work_seq counter, never MAX(seq): deleting
+    drained rows (retention) must not hand out numbers below a cursor.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS pending_work (
+        post_id TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pending_work_seq ON pending_work (seq)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS work_cursors (
+        consumer TEXT PRIMARY KEY,
+        last_seq INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS work_seq (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        value INTEGER NOT NULL
+    )
+    """)
+
+    enqueue = """
+        UPDATE work_seq SET value = value + 1 WHERE id = 1;
+        INSERT INTO pending_work (post_id, seq)
+        VALUES (NEW.id, (SELECT value FROM work_seq WHERE id = 1))
+        ON CONFLICT(post_id) DO UPDATE SET seq = excluded.seq, queued_at = CURRENT_TIMESTAMP;
+    """
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_enqueue_insert
+    AFTER INSERT ON posts
+    BEGIN {enqueue} END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_enqueue_stats
+    AFTER UPDATE OF score, num_comments ON posts
+    WHEN NEW.score IS NOT OLD.score OR NEW.num_comments IS NOT OLD.num_comments
+    BEGIN {enqueue} END
+    """)
+
+    # Seed the log with the existing corpus
+    cursor.execute("""
+    INSERT OR IGNORE INTO pending_work (post_id, seq)
+    SELECT id, ROW_NUMBER() OVER (ORDER BY rowid) FROM posts
+    """)
+    cursor.execute("INSERT OR IGNORE INTO work_seq (id, value) SELECT 1, IFNULL(MAX(seq), 0) FROM pending_work")
+
+
+def _binary_product_embeddings(cursor):
+    """Convert cached product embeddings from JSON text to packed float32 BLOBs."""
+    from radar.storage.codecs import pack_vector, unpack_vector
+    cursor.execute("""
+    SELECT id, user_id, embedding_vector FROM products
+    WHERE typeof(embedding_vector) = 'text'
+    """)
+    for product_id, user_id, value in cursor.fetchall():
+        vector = unpack_vector(value)
+        cursor.execute(
+            "UPDATE products SET embedding_vector = ? WHERE id = ? AND user_id = ?",
+            (pack_vector(vector) if vector is not None else None, product_id, user_id)
+        )
+
+
+def _full_text_search(cursor):
+    """
+    FTS5 indexes over posts (title, body) and comments (body).
+
+    External-content tables: the text lives only in posts/comments; the
+    index is kept in step by the write helpers in radar.storage.db (see
+    _fts_sync). Rows written outside those helpers need rebuild_search_index().
+    """
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, body,
+        content='posts', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """)
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+        body,
+        content='comments', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """)
+    # Index the existing corpus
+    cursor.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')")
+
+
+def _lead_index(cursor):
+    """
+    Materialized per-tenant lead leaderboard behind /api/threads.
+
+    One row per post_analysis row with relevance_score > 0, carrying the
+    ranking/triage columns, a summary of the post and the id of the latest
+    generated response. Kept current by the write helpers in
+    radar.storage.db (see _refresh_leads).
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_index (
+        user_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        relevance_score REAL NOT NULL,
+        semantic_similarity REAL,
+        community_score REAL,
+        ai_analysis TEXT,
+        signals_json TEXT,
+        triage_status TEXT,
+        triage_relevance_snapshot REAL,
+        platform TEXT,
+        source TEXT,
+        url TEXT,
+        title TEXT,
+        author TEXT,
+        score INTEGER,
+        num_comments INTEGER,
+        created_at TIMESTAMP,
+        latest_response_id TEXT,
+        PRIMARY KEY (user_id, product_id, post_id)
+    )
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_lead_index_rank
+    ON lead_index (user_id, product_id, relevance_score DESC)
+    """)
+    # Post-side refreshes (re-scrapes, stat updates) look leads up by post
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_index_post ON lead_index (post_id)")
+    cursor.execute("""
+    INSERT OR REPLACE INTO lead_index (
+        user_id, product_id, post_id, relevance_score, semantic_similarity, community_score,
+        ai_analysis, signals_json, triage_status, triage_relevance_snapshot,
+        platform, source, url, title, author, score, num_comments, created_at, latest_response_id
+    )
+    SELECT pa.user_id, pa.product_id, pa.post_id, pa.relevance_score, pa.semantic_similarity,
+           pa.community_score, pa.ai_analysis, pa.signals_json, pa.triage_status, pa.triage_relevance_snapshot,
+           p.platform, p.source, p.url, p.title, p.author, p.score, p.num_comments, p.created_at,
+           (SELECT gr.id FROM generated_responses gr
+            WHERE gr.user_id = pa.user_id AND gr.post_id = pa.post_id AND gr.product_id = pa.product_id
+            ORDER BY gr.created_at DESC LIMIT 1)
+    FROM post_analysis pa
+    JOIN posts p ON p.id = pa.post_id
+    WHERE pa.relevance_score > 0
+    """)
+
+
+def _content_addressed_blobs(cursor):
+    """
+    Store shared analysis text once in a hash-keyed `blobs` table.
+
+    post_analysis.signals_json (identical for every product/user of a post)
+    and triage_history.ai_analysis_snapshot (re-copied on every triage click)
+    move to blobs and are referenced by signals_hash / ai_analysis_hash. The
+    legacy text columns are left in place but emptied.
+    """
+    from radar.config import BLOB_COMPRESSION
+    from radar.storage.codecs import encode_blob
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+    """)
+    _add_column_if_missing(cursor, "post_analysis", "signals_hash", "TEXT")
+    _add_column_if_missing(cursor, "triage_history", "ai_analysis_hash", "TEXT")
+    _add_column_if_missing(cursor, "lead_index", "signals_hash", "TEXT")
+
+    hashes = {}
+
+    def put(text):
+        if text not in hashes:
+            digest, codec, data = encode_blob(text, BLOB_COMPRESSION)
+            cursor.execute(
+                "INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                (digest, codec, len(text.encode("utf-8")), data)
+            )
+            hashes[text] = digest
+        return hashes[text]
+
+    for table, column, hash_column in (
+        ("post_analysis", "signals_json", "signals_hash"),
+        ("triage_history", "ai_analysis_snapshot", "ai_analysis_hash"),
+    ):
+        cursor.execute(f"SELECT rowid, {column} FROM {table} WHERE {column} IS NOT NULL")
+        rows = cursor.fetchall()
+        cursor.executemany(
+            f"UPDATE {table} SET {hash_column} = ?, {column} = NULL WHERE rowid = ?",
+            [(put(text), rowid) for rowid, text in rows]
+        )
+    cursor.execute("""
+    UPDATE lead_index SET signals_json = NULL, signals_hash = (
+        SELECT pa.signals_hash FROM post_analysis pa
+        WHERE pa.user_id = lead_index.user_id AND pa.product_id = lead_index.product_id
+          AND pa.post_id = lead_index.post_id
+    )
+    """)
+
+
+def _normalized_signals(cursor):
+    """
+    Split detect_signals output out of post_analysis.
+
+    General intents are stored once per post in post_signals (indexed by
+    intent for filtering); each analysis row keeps only its own product's
+    matched keywords in pain_matches / intent_matches (JSON arrays). The
+    per-row signals blobs from migration 7 are released.
+    """
+    from radar.storage.codecs import decode_blob
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS post_signals (
+        post_id TEXT NOT NULL,
+        intent TEXT NOT NULL,
+        PRIMARY KEY (post_id, intent)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_post_signals_intent ON post_signals (intent, post_id)")
+    for table in ("post_analysis", "lead_index"):
+        _add_column_if_missing(cursor, table, "pain_matches", "TEXT")
+        _add_column_if_missing(cursor, table, "intent_matches", "TEXT")
+
+    decoded = {}
+    cursor.execute("SELECT rowid, post_id, product_id, signals_hash FROM post_analysis WHERE signals_hash IS NOT NULL")
+    for rowid, post_id, product_id, digest in cursor.fetchall():
+        if digest not in decoded:
+            blob = cursor.execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            decoded[digest] = json.loads(decode_blob(*blob)) if blob else {}
+        signals = decoded[digest]
+        cursor.executemany(
+            "INSERT OR IGNORE INTO post_signals (post_id, intent) VALUES (?, ?)",
+            [(post_id, intent) for intent in signals.get("intents", [])]
+        )
+        matches = signals.get("product_matches", {}).get(product_id) or {}
+        pain, intents = matches.get("pain_points"), matches.get("intents")
+        cursor.execute(
+            "UPDATE post_analysis SET pain_matches = ?, intent_matches = ?, signals_hash = NULL WHERE rowid = ?",
+            (json.dumps(pain) if pain else None, json.dumps(intents) if intents else None, rowid)
+        )
+    cursor.execute("""
+    UPDATE lead_index SET signals_hash = NULL, (pain_matches, intent_matches) = (
+        SELECT pa.pain_matches, pa.intent_matches FROM post_analysis pa
+        WHERE pa.user_id = lead_index.user_id AND pa.product_id = lead_index.product_id
+          AND pa.post_id = lead_index.post_id
+    )
+    """)
+    cursor.execute("""
+    DELETE FROM blobs
+    WHERE hash NOT IN (SELECT ai_analysis_hash FROM triage_history WHERE ai_analysis_hash IS NOT NULL)
+    """)
+
+
+def _analysis_markers(cursor):
+    """
+    Compact "scored, not relevant" markers for (post, product, user) pairs
+    below ANALYSIS_STORAGE_FLOOR: just the post metrics they were scored at,
+    so the pending-work query knows they are done until the post changes.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS analysis_markers (
+        user_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        processed_score INTEGER NOT NULL,
+        processed_comments INTEGER NOT NULL,
+        PRIMARY KEY (user_id, product_id, post_id)
+    ) WITHOUT ROWID
+    """)
+
+
+def _retention_indexes(cursor):
+    """
+    Indexes for the retention engine: oldest analyses first, and the "kept
+    post" checks. Posts and comments age by created_utc (migration 11).
+    Legacy analyses without updated_at take their post's creation time
+    (else now), so the expiry rule can match them.
+    """
+    cursor.execute("""
+    UPDATE post_analysis SET updated_at = COALESCE(
+        (SELECT replace(substr(p.created_at, 1, 19), 'T', ' ') FROM posts p WHERE p.id = post_analysis.post_id),
+        CURRENT_TIMESTAMP
+    ) WHERE updated_at IS NULL
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_post_analysis_updated_at ON post_analysis (updated_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_triage_history_post ON triage_history (post_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_generated_responses_post ON generated_responses (post_id)")
+
+
+def _created_epochs(rows) -> List[Tuple[int, str]]:
+    """(created_utc, id) pairs for (id, created_at) rows whose text parses."""
+    from radar.storage.codecs import to_epoch
+
+    pairs = []
+    for row_id, created_at in rows:
+        try:
+            pairs.append((to_epoch(created_at), row_id))
+        except ValueError:
+            continue
+    return pairs
+
+
+def _epoch_timestamps(cursor):
+    """
+    Integer Unix-time twins of the text timestamps, so time windows are
+    indexed range scans instead of string comparisons: created_utc /
+    scraped_utc on posts and comments, created_utc on lead_index and
+    started_utc on sync_runs, with the indexes retention and the time
+    window filters scan.
+    """
+    for table, column in (
+        ("posts", "created_utc"), ("posts", "scraped_utc"),
+        ("comments", "created_utc"), ("comments", "scraped_utc"),
+        ("lead_index", "created_utc"), ("sync_runs", "started_utc"),
+    ):
+        _add_column_if_missing(cursor, table, column, "INTEGER")
+
+    # created_at is naive local time from datetime.fromtimestamp(...).isoformat()
+    for table in ("posts", "comments"):
+        cursor.execute(f"SELECT id, created_at FROM {table} WHERE created_at IS NOT NULL")
+        cursor.executemany(f"UPDATE {table} SET created_utc = ? WHERE id = ?", _created_epochs(cursor.fetchall()))
+        cursor.execute(f"UPDATE {table} SET scraped_utc = CAST(strftime('%s', scraped_at) AS INTEGER) WHERE scraped_at IS NOT NULL")
+    cursor.execute("UPDATE lead_index SET created_utc = (SELECT created_utc FROM posts WHERE posts.id = lead_index.post_id)")
+    cursor.execute("UPDATE sync_runs SET started_utc = CAST(strftime('%s', timestamp) AS INTEGER) WHERE timestamp IS NOT NULL")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_created_utc ON posts (created_utc)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_comments_created_utc ON comments (created_utc)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_index_created ON lead_index (user_id, product_id, created_utc)")
+
+
+def _compressed_text(cursor):
+    """
+    Room for zstd-compressed bodies (radar.storage.compression): the
+    text_dictionaries table, and posts_text / comments_text views that
+    decode bodies through radar_text(). The FTS indexes are rebuilt over
+    those views, since they can no longer read posts/comments directly.
+    """
+    from radar.storage.compression import register_text_functions
+    register_text_functions(cursor.connection)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS text_dictionaries (
+        dict_id INTEGER PRIMARY KEY,
+        data BLOB NOT NULL,
+        samples INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("CREATE VIEW IF NOT EXISTS posts_text AS SELECT rowid, id, title, radar_text(body) AS body FROM posts")
+    cursor.execute("CREATE VIEW IF NOT EXISTS comments_text AS SELECT rowid, id, post_id, radar_text(body) AS body FROM comments")
+
+    cursor.execute("DROP TABLE IF EXISTS posts_fts")
+    cursor.execute("DROP TABLE IF EXISTS comments_fts")
+    cursor.execute("""
+    CREATE VIRTUAL TABLE posts_fts USING fts5(
+        title, body,
+        content='posts_text', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """)
+    cursor.execute("""
+    CREATE VIRTUAL TABLE comments_fts USING fts5(
+        body,
+        content='comments_text', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """)
+    cursor.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')")
+
+
+def _comment_sync_state(cursor):
+    """
+    Per-post comment fetch state for incremental thread refreshes:
+    comments_fetched_count is the post's num_comments when its thread was
+    last downloaded, last_comment_fetch_utc when. Posts that already have
+    comments are backfilled as fetched at their current count.
+    """
+    _add_column_if_missing(cursor, "posts", "comments_fetched_count", "INTEGER")
+    _add_column_if_missing(cursor, "posts", "last_comment_fetch_utc", "INTEGER")
+    cursor.execute("""
+    UPDATE posts SET
+        comments_fetched_count = num_comments,
+        last_comment_fetch_utc = (SELECT MAX(c.scraped_utc) FROM comments c WHERE c.post_id = posts.id)
+    WHERE EXISTS (SELECT 1 FROM comments c WHERE c.post_id = posts.id)
+    """)
+
+
+# (version, description, function(cursor)) in ascending version order
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "baseline schema", _baseline_schema),
+    (2, "hot path indexes", _hot_path_indexes),
+    (3, "pending work queue", _pending_work_queue),
+    (4, "binary product embeddings", _binary_product_embeddings),
+    (5, "full-text search", _full_text_search),
+    (6, "lead index", _lead_index),
+    (7, "content-addressed blobs", _content_addressed_blobs),
+    (8, "normalized signals", _normalized_signals),
+    (9, "analysis markers", _analysis_markers),
+    (10, "retention indexes", _retention_indexes),
+    (11, "epoch timestamps", _epoch_timestamps),
+    (12, "compressed text", _compressed_text),
+    (13, "comment sync state", _comment_sync_state),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the applied schema version (0 for a fresh or pre-migration database)."""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Tuple[int, str, Callable]]:
+    """Migrations that have not been applied to this database yet."""
+    current = get_schema_version(conn)
+    return [m for m in MIGRATIONS if m[0] > current]
+
+
+def migrate(conn: sqlite3.Connection, dry_run: bool = False) -> List[Tuple[int, str]]:
+    """
+    Apply pending migrations in order, one transaction each.
+    Returns the (version, description) pairs that were applied (or would be, with dry_run).
+    """
+    pending = pending_migrations(conn)
+    if dry_run or not pending:
+        return [(version, description) for version, description, _ in pending]
+
+    if conn.in_transaction:
+        conn.commit()
+    _ensure_version_table(conn)
+
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        # Take the write lock before re-checking, so concurrent starters
+        # (API workers, Celery, CLI) apply each migration exactly once.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            fn(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+    return applied
@@ -0,0 +1,237 @@
+"""
+SQLite connection management.
+
+Write helpers share one long-lived connection per thread, so the scraper and
+processor no longer pay a connect/PRAGMA round-trip per row. API reads are
+served from a small pool of read-only connections that never take the writer
+lock.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Any
+
+# PRAGMAs applied exactly once, when a connection is opened
+WRITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # Readers never block the writer
+    "PRAGMA busy_timeout=30000",    # 30 second busy timeout
+    "PRAGMA synchronous=NORMAL",    # Durable with WAL, without an fsync per commit
+)
+READ_PRAGMAS = (
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA query_only=ON",
+)
+
+
+class ConnectionManager:
+    """Thread-local writer connections plus a bounded read-only pool."""
+
+    def __init__(self, path_getter: Callable[[], str], read_pool_size: int = 8, read_timeout: float = 30.0,
+                 on_connect: Callable[[sqlite3.Connection], None] = None,
+                 factory: Callable[[], type] = None):
+        # The path is resolved lazily so tests can patch DATABASE_PATH
+        self._path_getter = path_getter
+        self._on_connect = on_connect
+        # Returns the sqlite3.Connection subclass for each new connection (see radar.storage.querylog)
+        self._factory = factory or (lambda: sqlite3.Connection)
+        self.read_pool_size = read_pool_size
+        self.read_timeout = read_timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writers = {}  # thread ident -> connection, for close_all()
+        self._read_pool = queue.LifoQueue()
+        self._read_path = None
+        self._read_open = 0
+        self._pid = os.getpid()
+        self._prepared_dirs = set()
+        self._stats = {
+            "connections_opened": 0,
+            "writer_checkouts": 0,
+            "reader_checkouts": 0,
+            "reader_waits": 0,
+            "commits": 0,
+            "rollbacks": 0,
+        }
+
+    # --- connection factories -------------------------------------------
+
+    def _ensure_dir(self, path: str):
+        db_dir = os.path.dirname(path)
+        if db_dir and db_dir not in self._prepared_dirs:
+            os.makedirs(db_dir, exist_ok=True)
+            self._prepared_dirs.add(db_dir)
+
+    def open_connection(self, path: str = None, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new connection with PRAGMAs applied (and the on_connect hook run)."""
+        path = path or self._path_getter()
+        if read_only:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30, check_same_thread=False,
+                                   factory=self._factory())
+            pragmas = READ_PRAGMAS
+        else:
+            self._ensure_dir(path)
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False, factory=self._factory())
+            pragmas = WRITE_PRAGMAS
+        for pragma in pragmas:
+            try:
+                conn.execute(pragma)
+            except sqlite3.DatabaseError:
+                pass
+        if self._on_connect:
+            self._on_connect(conn)
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _check_fork(self):
+        """Drop inherited connections in forked children (e.g. Celery prefork workers)."""
+        if os.getpid() != self._pid:
+            with self._lock:
+                self._pid = os.getpid()
+                self._local = threading.local()
+                self._writers = {}
+                self._read_pool = queue.LifoQueue()
+                self._read_path = None
+                self._read_open = 0
+
+    # --- writer side ------------------------------------------------------
+
+    def get_writer(self) -> sqlite3.Connection:
+        """Return this thread's writer connection, opening it on first use."""
+        self._check_fork()
+        path = self._path_getter()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.path != path:
+            self.close_thread_connection()
+            conn = None
+        if conn is None:
+            conn = self.open_connection(path)
+            self._local.conn = conn
+            self._local.path = path
+            with self._lock:
+                self._writers[threading.get_ident()] = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow this thread's writer connection for one unit of work.
+        Commits on success and rolls back on error; the connection stays open.
+        """
+        conn = self.get_writer()
+        with self._lock:
+            self._stats["writer_checkouts"] += 1
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+                with self._lock:
+                    self._stats["commits"] += 1
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+                with self._lock:
+                    self._stats["rollbacks"] += 1
+            raise
+
+    def close_thread_connection(self):
+        """Close the calling thread's writer connection, if any."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._writers.pop(threading.get_ident(), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    # --- reader side ------------------------------------------------------
+
+    @contextmanager
+    def read_connection(self):
+        """
+        Borrow a read-only connection from the pool. When all are in use,
+        waits up to read_timeout, then raises sqlite3.OperationalError.
+        """
+        self._check_fork()
+        path = self._path_getter()
+        if self._read_path != path:
+            self._reset_read_pool(path)
+
+        conn = None
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._read_open < self.read_pool_size
+                if can_open:
+                    self._read_open += 1
+            if can_open:
+                try:
+                    conn = self.open_connection(path, read_only=True)
+                except Exception:
+                    with self._lock:
+                        self._read_open -= 1
+                    raise
+            else:
+                with self._lock:
+                    self._stats["reader_waits"] += 1
+                try:
+                    conn = self._read_pool.get(timeout=self.read_timeout)
+                except queue.Empty:
+                    # Same failure type as a locked database, so callers handle it like any DB timeout
+                    raise sqlite3.OperationalError(
+                        f"read pool exhausted: no connection free after {self.read_timeout:g}s"
+                    ) from None
+
+        with self._lock:
+            self._stats["reader_checkouts"] += 1
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._read_path == path:
+                self._read_pool.put(conn)
+            else:
+                conn.close()
+
+    def _reset_read_pool(self, path: str):
+        with self._lock:
+            self._read_path = path
+            self._read_open = 0
+            old_pool, self._read_pool = self._read_pool, queue.LifoQueue()
+        while True:
+            try:
+                old_pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # --- housekeeping -----------------------------------------------------
+
+    def close_all(self):
+        """Close every pooled and thread-local connection (shutdown / tests)."""
+        with self._lock:
+            writers, self._writers = self._writers, {}
+        for conn in writers.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+        self._reset_read_pool(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool counters for monitoring."""
+        with self._lock:
+            return {
+                **self._stats,
+                "writer_connections": len(self._writers),
+                "reader_connections": self._read_open,
+                "readers_idle": self._read_pool.qsize(),
+                "read_pool_size": self.read_pool_size,
+            }
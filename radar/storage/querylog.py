@@ -0,0 +1,212 @@
+"""
+Opt-in SQLite slow-query log.
+
+With SLOW_QUERY_MS > 0 the connection manager opens InstrumentedConnection
+objects, whose cursors time every statement from execute() until its rows
+are fetched (or the cursor is dropped). Statements slower than the
+threshold are appended to SLOW_QUERY_LOG_PATH as JSON lines: normalized
+SQL, duration, parameter shapes (types and counts, never values) and, the
+first time a statement is slow in a process, its EXPLAIN QUERY PLAN.
+
+top_slow_queries() aggregates the log across processes (API, workers, CLI)
+for `radar db slow-queries` and /api/admin/slow-queries.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+from radar.config import SLOW_QUERY_MS, SLOW_QUERY_LOG_PATH
+
+_lock = threading.Lock()
+_explained = set()  # normalized SQL whose plan this process has logged
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize_sql(sql: str) -> str:
+    """One line, with placeholder lists of any length folded, so IN (?, ?, ...) variants aggregate."""
+    return _PLACEHOLDER_LIST.sub("?, ...", " ".join(sql.split()))
+
+
+def param_shape(params, many: bool = False) -> str:
+    """Types (and counts) of bound parameters, e.g. '(str, int)' or '500 x (str, NoneType)'."""
+    if many:
+        rows = params if isinstance(params, (list, tuple)) else list(params)
+        return f"{len(rows)} x {param_shape(rows[0]) if rows else '()'}"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    types = [type(value).__name__ for value in params or ()]
+    if len(types) > 8 and len(set(types)) == 1:
+        return f"({len(types)} x {types[0]})"
+    return "(" + ", ".join(types) + ")"
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params) -> List[str]:
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # A plain cursor, so the EXPLAIN itself is not timed
+        rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+    except sqlite3.Error:
+        return []
+    return [row[3] for row in rows]
+
+
+def record(conn: sqlite3.Connection, sql: str, params, many: bool, seconds: float, path: str = None):
+    """Append one slow statement to the log."""
+    normalized = normalize_sql(sql)
+    entry = {
+        'ts': round(time.time(), 3),
+        'sql': normalized,
+        'ms': round(seconds * 1000, 3),
+        'params': param_shape(params, many),
+        'pid': os.getpid(),
+    }
+    with _lock:
+        first = normalized not in _explained
+        _explained.add(normalized)
+    if first:
+        entry['plan'] = _explain(conn, sql, params[0] if many and params else params)
+    path = path or SLOW_QUERY_LOG_PATH
+    line = json.dumps(entry) + "\n"
+    with _lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(line)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that charges execute and fetch time to the current statement."""
+
+    _statement = None
+
+    def _begin(self, sql, params, many):
+        self._finish()
+        self._statement = (sql, params, many)
+        self._elapsed = 0.0
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement and SLOW_QUERY_MS > 0 and self._elapsed * 1000 >= SLOW_QUERY_MS:
+            try:
+                record(self.connection, *statement, self._elapsed)
+            except Exception as e:
+                print(f"DEBUG: slow-query log failed: {e}")
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def execute(self, sql, params=()):
+        self._begin(sql, params, False)
+        self._timed(super().execute, sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self._begin(sql, seq_of_params, True)
+        self._timed(super().executemany, sql, seq_of_params)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # interpreter shutdown
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose statements all run on InstrumentedCursors."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connection_factory():
+    """Connection class for new SQLite connections: instrumented while SLOW_QUERY_MS > 0."""
+    return InstrumentedConnection if SLOW_QUERY_MS > 0 else sqlite3.Connection
+
+
+def top_slow_queries(limit: int = 20, sort: str = "total", path: str = None) -> List[Dict[str, Any]]:
+    """
+    Aggregate the slow-query log by statement: count, total/avg/max ms,
+    parameter shapes seen, latest query plan and last occurrence, ordered
+    by `sort` ("total", "max", "avg" or "count") descending.
+    """
+    path = path or SLOW_QUERY_LOG_PATH
+    stats: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                s = stats.setdefault(entry['sql'], {
+                    'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'params': [], 'plan': [], 'last_seen': 0,
+                })
+                s['count'] += 1
+                s['total_ms'] += entry['ms']
+                s['max_ms'] = max(s['max_ms'], entry['ms'])
+                s['last_seen'] = max(s['last_seen'], entry['ts'])
+                if entry['params'] not in s['params'] and len(s['params']) < 5:
+                    s['params'].append(entry['params'])
+                if entry.get('plan'):
+                    s['plan'] = entry['plan']
+    for s in stats.values():
+        s['total_ms'] = round(s['total_ms'], 3)
+        s['avg_ms'] = round(s['total_ms'] / s['count'], 3)
+    key = {"max": "max_ms", "avg": "avg_ms", "count": "count"}.get(sort, "total_ms")
+    return sorted(stats.values(), key=lambda s: s[key], reverse=True)[:limit]
+
+
+def clear_slow_queries(path: str = None):
+    """Empty the slow-query log."""
+    path = path or SLOW_QUERY_LOG_PATH
+    with _lock:
+        if os.path.exists(path):
+            os.remove(path)
+        _explained.clear()
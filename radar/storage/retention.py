@@ -0,0 +1,156 @@
+"""
+Retention policy engine.
+
+Rows older than their table's TTL (RETENTION_DAYS) are copied into a
+compressed archive database (ARCHIVE_PATH) and then deleted from the live
+database, RETENTION_BATCH_SIZE keys per write so other writers are never
+blocked for long. An expired post takes its comments, analyses and Chroma
+embedding with it; an expired analysis leaves an analysis marker so the pair
+is not re-scored. Posts a user has triaged or answered never expire.
+
+Comments never expire before their post: a surviving post keeps its
+comments_fetched_count, so the scrapers would never fetch them again.
+"""
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+from radar.config import RETENTION_DAYS, RETENTION_BATCH_SIZE, ARCHIVE_PATH, BLOB_COMPRESSION
+from radar.storage.codecs import encode_blob, decode_blob
+
+# Posts first: their cascades shrink the comment and analysis passes
+RETENTION_TABLES = ("posts", "comments", "post_analysis")
+
+# Archive row key columns per archived table
+_ARCHIVE_KEYS = {
+    "posts": ("id",),
+    "comments": ("id",),
+    "post_analysis": ("post_id", "product_id", "user_id"),
+    "post_signals": ("post_id", "intent"),
+}
+
+
+def retention_cutoff(table: str, days: int, now: datetime = None) -> Union[int, str]:
+    """
+    Cutoff in the form the table's age column uses: epoch seconds for
+    posts/comments created_utc, UTC 'YYYY-MM-DD HH:MM:SS' text for
+    post_analysis updated_at.
+    """
+    if table == "post_analysis":
+        return ((now or datetime.utcnow()) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    return int((now.timestamp() if now else time.time()) - days * 86400)
+
+
+def effective_policy(policy: Dict[str, int] = None) -> Dict[str, int]:
+    """
+    The TTLs apply_retention() enforces: `policy` (default RETENTION_DAYS)
+    with the comment TTL raised to the post TTL, and 0 while posts are kept
+    forever.
+    """
+    policy = dict(RETENTION_DAYS if policy is None else policy)
+    posts_days = policy.get("posts") or 0
+    if policy.get("comments"):
+        policy["comments"] = max(policy["comments"], posts_days) if posts_days > 0 else 0
+    return policy
+
+
+def open_archive(path: str = None) -> sqlite3.Connection:
+    """Open (creating if needed) the archive database."""
+    path = path or ARCHIVE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archived_rows (
+        table_name TEXT NOT NULL,
+        row_key TEXT NOT NULL,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (table_name, row_key)
+    ) WITHOUT ROWID
+    """)
+    conn.commit()
+    return conn
+
+
+def _archive_key(table: str, row: Dict[str, Any]) -> str:
+    return "/".join(str(row[column]) for column in _ARCHIVE_KEYS[table])
+
+
+def archive_rows(conn: sqlite3.Connection, rows_by_table: Dict[str, List[Dict[str, Any]]]) -> int:
+    """Store rows (JSON, compressed with BLOB_COMPRESSION) in the archive and commit. Returns rows written."""
+    records = []
+    for table, rows in rows_by_table.items():
+        for row in rows:
+            _, codec, data = encode_blob(json.dumps(row, default=str), BLOB_COMPRESSION)
+            records.append((table, _archive_key(table, row), codec, data))
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO archived_rows (table_name, row_key, codec, data) VALUES (?, ?, ?, ?)",
+            records
+        )
+    return len(records)
+
+
+def read_archive(table: str, key: str, path: str = None) -> Optional[Dict[str, Any]]:
+    """An archived row by table and key ('/'-joined for composite keys), or None."""
+    conn = open_archive(path)
+    try:
+        row = conn.execute(
+            "SELECT codec, data FROM archived_rows WHERE table_name = ? AND row_key = ?", (table, key)
+        ).fetchone()
+    finally:
+        conn.close()
+    return json.loads(decode_blob(*row)) if row else None
+
+
+def apply_retention(policy: Dict[str, int] = None, batch_size: int = None, archive_path: str = None,
+                    dry_run: bool = False, pause: float = 0.0, now: datetime = None) -> Dict[str, int]:
+    """
+    Archive and delete expired rows table by table. `policy` maps table ->
+    TTL days (defaults to RETENTION_DAYS; 0 or missing skips the table;
+    see effective_policy); `pause` sleeps between batches. Returns rows expired per table (with
+    dry_run, the rows that would be).
+    """
+    from radar.storage import db, vectors
+
+    policy = effective_policy(policy)
+    batch_size = batch_size or RETENTION_BATCH_SIZE
+    archive = None if dry_run else open_archive(archive_path)
+    results = {}
+    try:
+        for table in RETENTION_TABLES:
+            days = policy.get(table) or 0
+            if days <= 0:
+                continue
+            cutoff = retention_cutoff(table, days, now)
+            if dry_run:
+                results[table] = len(db.find_expired_rows(table, cutoff))
+                continue
+
+            expired = 0
+            while True:
+                keys = db.find_expired_rows(table, cutoff, limit=batch_size)
+                if not keys:
+                    break
+                # Archive first: a failed purge leaves rows in both places, never in neither
+                archive_rows(archive, db.export_expired_rows(table, keys))
+                purged = db.purge_expired_rows(table, cutoff, keys)
+                # Only posts the purge actually removed (its re-check spares newly kept
+                # ones); a vector orphaned by a crash right here is harmless
+                if table == "posts" and purged:
+                    vectors.delete_embeddings("radar_posts", purged)
+                expired += len(purged)
+                print(f"DEBUG: retention {table}: expired {len(purged)} row(s) older than {cutoff}")
+                if not purged:
+                    break
+                if pause:
+                    time.sleep(pause)
+            results[table] = expired
+    finally:
+        if archive is not None:
+            archive.close()
+    return results
@@ -0,0 +1,282 @@
+"""
+Single-writer actor for SQLite.
+
+SQLite allows one writer at a time. Instead of every thread opening its own
+transaction (and waiting on the busy timeout when another holds the lock),
+write commands are queued to one thread that owns the only write
+connection and group-commits them:
+
+  * a batch takes every queued command, up to `max_batch` operations, and
+    keeps accepting newcomers until `window` seconds after its first
+    command; a lone write therefore waits out the window, so keep it a few
+    milliseconds (a flush() ends the batch at once)
+  * each command runs inside its own SAVEPOINT, so a failing command is
+    rolled back and reported to its caller without aborting the batch
+  * a command's future resolves only after the batch COMMIT, so callers
+    that wait see their write as committed (read-your-writes holds)
+
+Durability hooks: flush() waits until everything submitted before it is
+committed (`durable=True` also checkpoints the WAL so the data is synced to
+the main database file), and add_commit_hook() registers callbacks that run
+after every commit.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+_FLUSH = object()
+
+
+class _Command:
+    __slots__ = ("fn", "future", "durable")
+
+    def __init__(self, fn, durable: bool = False):
+        self.fn = fn
+        self.future = Future()
+        self.durable = durable
+
+
+class WriteActor:
+    """Owns the write connection; runs queued `fn(conn)` commands in batched transactions."""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], path_getter: Callable[[], str],
+                 max_batch: int = 500, window: float = 0.005):
+        self._connect = connect
+        self._path_getter = path_getter
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._conn = None
+        self._conn_path = None
+        self._pid = os.getpid()
+        self._commit_hooks: List[Callable[[int], None]] = []
+        self._stats = {
+            "submitted": 0,
+            "ops": 0,
+            "batches": 0,
+            "largest_batch": 0,
+            "failed_ops": 0,
+            "failed_commits": 0,
+            "checkpoints": 0,
+        }
+
+    # --- public API ---------------------------------------------------------
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue `fn(conn)`; the future resolves with its return value once committed."""
+        if self.on_writer_thread():
+            # A command issuing another write (e.g. a helper calling a helper) runs inline
+            future = Future()
+            future.set_result(fn(self._conn))
+            return future
+        self._ensure_running()
+        command = _Command(fn)
+        with self._lock:
+            self._stats["submitted"] += 1
+        self._queue.put(command)
+        return command.future
+
+    def execute(self, fn: Callable[[sqlite3.Connection], Any], timeout: float = None) -> Any:
+        """Submit `fn(conn)` and wait for it to commit. Re-raises the command's exception."""
+        return self.submit(fn).result(timeout)
+
+    def flush(self, durable: bool = False, timeout: float = None):
+        """Block until every command submitted before this call has been committed."""
+        if self._thread is None or self.on_writer_thread():
+            return
+        command = _Command(_FLUSH, durable=durable)
+        self._queue.put(command)
+        command.future.result(timeout)
+
+    def add_commit_hook(self, hook: Callable[[int], None]):
+        """Call `hook(ops_in_batch)` on the writer thread after each successful commit."""
+        self._commit_hooks.append(hook)
+
+    def remove_commit_hook(self, hook: Callable[[int], None]):
+        if hook in self._commit_hooks:
+            self._commit_hooks.remove(hook)
+
+    def on_writer_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        stats["avg_batch"] = round(stats["ops"] / stats["batches"], 2) if stats["batches"] else 0
+        return stats
+
+    def close(self, timeout: float = 10.0):
+        """Drain the queue, stop the thread and close the connection."""
+        thread = self._thread
+        if thread is None or os.getpid() != self._pid:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+    # --- writer thread --------------------------------------------------------
+
+    def _ensure_running(self):
+        if os.getpid() != self._pid:
+            # Forked child (e.g. Celery prefork): the parent's thread does not exist here
+            self._pid = os.getpid()
+            self._thread = None
+            self._conn = None
+            self._queue = queue.Queue()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="radar-db-writer", daemon=True)
+                self._thread.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        path = self._path_getter()
+        if self._conn is not None and self._conn_path != path:
+            self._conn.close()
+            self._conn = None
+        if self._conn is None:
+            self._conn = self._connect()
+            self._conn.isolation_level = None  # BEGIN/COMMIT are issued explicitly
+            self._conn_path = path
+        return self._conn
+
+    def _next_batch(self):
+        """Block for one command, then gather more until the batch is full, a flush arrives or the window closes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch and first.fn is not _FLUSH:
+            try:
+                command = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if command is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(command)
+            if command.fn is _FLUSH or time.monotonic() >= deadline:
+                break
+        return batch
+
+    def _checkpoint(self, conn: sqlite3.Connection):
+        # With synchronous=NORMAL a WAL commit is not fsynced until a checkpoint
+        try:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            with self._lock:
+                self._stats["checkpoints"] += 1
+        except sqlite3.Error:
+            pass
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            try:
+                self._run_batch(batch)
+            except BaseException as e:
+                # e.g. a disk I/O error on SAVEPOINT/RELEASE: fail the batch, keep serving the queue
+                self._fail_batch(batch, e)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _fail_batch(self, batch: List[_Command], error: BaseException):
+        """Roll back a batch that broke mid-way and fail every command not yet resolved."""
+        print(f"DEBUG: write batch failed: {error!r}", flush=True)
+        if self._conn is not None and self._conn.in_transaction:
+            try:
+                self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                # The connection is unusable; the next batch opens a fresh one
+                self._conn.close()
+                self._conn = None
+        with self._lock:
+            self._stats["failed_commits"] += 1
+        for command in batch:
+            if not command.future.done():
+                command.future.set_exception(error)
+
+    def _run_batch(self, batch: List[_Command]):
+        if all(command.fn is _FLUSH for command in batch):
+            # Nothing left to write: everything queued earlier is already committed
+            if any(command.durable for command in batch) and self._conn is not None:
+                self._checkpoint(self._conn)
+            for command in batch:
+                command.future.set_result(None)
+            return
+
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            for command in batch:
+                command.future.set_exception(e)
+            return
+
+        results = []
+        ops = 0
+        for command in batch:
+            if command.fn is _FLUSH:
+                results.append((command, None, None))
+                continue
+            ops += 1
+            conn.execute("SAVEPOINT radar_op")
+            try:
+                value = command.fn(conn)
+                conn.execute("RELEASE radar_op")
+                results.append((command, value, None))
+            except BaseException as e:
+                conn.execute("ROLLBACK TO radar_op")
+                conn.execute("RELEASE radar_op")
+                results.append((command, None, e))
+
+        try:
+            conn.execute("COMMIT")
+        except Exception as e:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                self._stats["failed_commits"] += 1
+            for command, _, _ in results:
+                command.future.set_exception(e)
+            return
+
+        if any(command.durable for command in batch):
+            self._checkpoint(conn)
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["ops"] += ops
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], ops)
+            self._stats["failed_ops"] += sum(1 for _, _, error in results if error is not None)
+
+        for hook in list(self._commit_hooks):
+            try:
+                hook(ops)
+            except Exception as e:
+                print(f"DEBUG: commit hook {hook!r} failed: {e}")
+
+        for command, value, error in results:
+            if error is not None:
+                command.future.set_exception(error)
+            else:
+                command.future.set_result(value)
+
+
+def register_shutdown(actor: WriteActor):
+    """Flush and stop the actor when the interpreter exits."""
+    atexit.register(actor.close)
@@ -0,0 +1,28 @@
+"""
+Celery tasks for periodic database maintenance (scheduled by celery beat).
+"""
+from radar.celery_app import celery_app
+from radar.storage.db import close_thread_connection
+
+
+@celery_app.task(name="radar.tasks.maintenance.apply_retention")
+def apply_retention_task():
+    """
+    Nightly retention pass: archive and delete rows past RETENTION_DAYS.
+    Returns rows expired per table.
+    """
+    try:
+        from radar.storage.retention import apply_retention
+        return apply_retention()
+    finally:
+        close_thread_connection()
+
+
+@celery_app.task(name="radar.tasks.maintenance.backup")
+def backup_task():
+    """
+    Nightly online backup of radar.db and the Chroma store (BACKUP_PATH).
+    Returns the backup manifest.
+    """
+    from radar.storage.backup import create_backup
+    return create_backup()
@@ -0,0 +1,42 @@
+import asyncio
+import time
+import httpx
+from radar.api.main import app, get_current_user
+
+SLOW_QUERY_SECONDS = 0.3
+
+
+def _slow_lead_threads(user_id, product_id, limit=50, intent=None, since=None, until=None):
+    time.sleep(SLOW_QUERY_SECONDS)  # a blocking query, as sqlite3 would be
+    return []
+
+
+async def _timed_get(client, url):
+    start = time.perf_counter()
+    response = await client.get(url)
+    assert response.status_code == 200
+    return time.perf_counter() - start
+
+
+async def _health_under_threads_load(concurrent_threads: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        load = [asyncio.create_task(_timed_get(client, "/api/threads?product=p")) for _ in range(concurrent_threads)]
+        await asyncio.sleep(0.05)  # let the slow queries occupy the db lane
+        health = [await _timed_get(client, "/health") for _ in range(5)]
+        threads = await asyncio.gather(*load)
+    return health, threads
+
+
+def test_health_is_not_blocked_by_slow_thread_queries(db_conn, monkeypatch):
+    monkeypatch.setattr("radar.storage.db.get_lead_threads", _slow_lead_threads)
+    app.dependency_overrides[get_current_user] = lambda: "async_user"
+    try:
+        health, threads = asyncio.run(_health_under_threads_load(concurrent_threads=8))
+    finally:
+        app.dependency_overrides = {}
+
+    # The slow queries are queued on the db lane (so they really are under load)...
+    assert max(threads) >= 2 * SLOW_QUERY_SECONDS
+    # ...while /health answers from its own lane without waiting for them
+    assert max(health) < SLOW_QUERY_SECONDS
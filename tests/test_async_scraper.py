@@ -0,0 +1,106 @@
+"""The async scraper fetches comment threads concurrently, paced by token buckets."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+import radar.storage.db as db
+from radar.ingest import ratelimit
+from radar.ingest.async_scraper import AsyncRedditScraper
+from radar.ingest.ratelimit import TokenBucket
+from radar.storage.db import get_post, get_comments
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload, self.status_code, self.headers = payload, status_code, {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeReddit:
+    """Serves one listing page of `posts` new posts and a thread of `comments.get(i, 2)` comments per post."""
+
+    def __init__(self, posts, latency=0.05):
+        self.posts, self.latency, self.calls, self.comments = posts, latency, [], {}
+
+    async def get(self, url, **kwargs):
+        self.calls.append(url)
+        await asyncio.sleep(self.latency)
+        if "/new/" in url:
+            now = time.time()
+            children = [{'data': {'name': f"t3_as{i}", 'title': f"Post {i}", 'selftext': "body", 'permalink': f"/r/as/{i}",
+                                  'author': 'a', 'score': 1, 'num_comments': self.comments.get(i, 2), 'created_utc': now - 60}}
+                        for i in range(self.posts)]
+            return FakeResponse({'data': {'children': children, 'after': None}})
+        post_id = "t3_" + url.split("/comments/")[1].split("/")[0]
+        count = self.comments.get(int(post_id[5:]), 2)
+        comments = [{'kind': 't1', 'data': {'name': f"t1_{post_id}_{n}", 'body': f"reply {n}", 'author': 'b',
+                                            'score': 1, 'created_utc': 1700000000}} for n in range(count)]
+        post = {'data': {'children': [{'data': {'num_comments': count}}]}}
+        return FakeResponse([post, {'data': {'children': comments}}])
+
+
+@pytest.fixture
+def fake_reddit(db_conn, monkeypatch):
+    fake = FakeReddit(posts=12)
+
+    @asynccontextmanager
+    async def _open_session(self):
+        yield fake
+
+    monkeypatch.setattr(AsyncRedditScraper, "_open_session", _open_session)
+    monkeypatch.setattr(ratelimit, "_buckets", {})
+    yield fake
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM comments WHERE post_id LIKE 't3_as%'")
+        conn.execute("DELETE FROM posts WHERE id LIKE 't3_as%'")
+    db.rebuild_search_index()
+
+
+def test_comment_threads_are_fetched_concurrently(fake_reddit):
+    scraper = AsyncRedditScraper(concurrency=6, rate=1000, burst=1000)
+    started = time.monotonic()
+    assert scraper.fetch_subreddit_posts("as", days=1) == 12
+    elapsed = time.monotonic() - started
+
+    assert len(fake_reddit.calls) == 13
+    assert get_post("t3_as3")['title'] == "Post 3"
+    assert [c['body'] for c in get_comments("t3_as3")] == ["reply 0", "reply 1"]
+    stats = scraper.get_stats()
+    assert stats['success'] == 13 and stats['peak_in_flight'] == 6
+    assert elapsed < 13 * fake_reddit.latency  # sequential would be ~0.65s
+
+
+def test_resync_refreshes_only_grown_threads(fake_reddit):
+    scraper = AsyncRedditScraper(concurrency=4, rate=1000, burst=1000)
+    scraper.fetch_subreddit_posts("as", days=1)
+    high_water = db.get_work_high_water()
+
+    fake_reddit.calls.clear()
+    fake_reddit.comments = {3: 9, 4: 3}  # post 4 grew by less than COMMENT_REFRESH_MIN_NEW
+    assert scraper.fetch_subreddit_posts("as", days=1) == 12
+
+    assert [url for url in fake_reddit.calls if "/comments/" in url] == ["https://www.reddit.com/r/as/comments/as3/.json"]
+    assert len(get_comments("t3_as3")) == 9 and len(get_comments("t3_as4")) == 2
+    assert get_post("t3_as3")['comments_fetched_count'] == 9
+    assert get_post("t3_as4")['comments_fetched_count'] == 2
+    # Stats changes queue posts 3 and 4; the new comments queue post 3 again, for re-scoring
+    with db.read_connection() as conn:
+        queued = [row[0] for row in conn.execute(
+            "SELECT post_id FROM pending_work WHERE seq > ? AND post_id LIKE 't3_as%' ORDER BY seq", (high_water,))]
+    assert queued == ["t3_as4", "t3_as3"]
+    assert scraper.get_stats()['threads_refreshed'] == 1
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    async def _burst():
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        return time.monotonic() - started
+
+    # Two tokens up front, then one every 50ms
+    assert 0.15 <= asyncio.run(_burst()) < 0.4
@@ -0,0 +1,76 @@
+"""Online backups stay consistent under concurrent writes and restores are verified."""
+import json
+import os
+import sqlite3
+import threading
+
+import chromadb
+import pytest
+import radar.storage.db as db
+from radar.storage import backup, vectors
+from radar.storage.db import save_posts_bulk
+
+
+def _post(post_id):
+    return {'id': post_id, 'platform': 'reddit', 'source': 'backup_sub', 'title': 'Backup', 'body': 'x' * 200,
+            'author': 'a', 'score': 1, 'num_comments': 0, 'created_at': "2026-01-10T00:00:00"}
+
+
+@pytest.fixture
+def live_store(db_conn, tmp_path, monkeypatch):
+    chroma_path = str(tmp_path / "chroma")
+    chromadb.PersistentClient(path=chroma_path).get_or_create_collection("radar_posts").add(
+        ids=[f"t3_bk{i}" for i in range(5)], embeddings=[[float(i), 1.0, 0.0] for i in range(5)]
+    )
+    monkeypatch.setattr(vectors, "CHROMA_PATH", chroma_path)
+    save_posts_bulk([_post(f"t3_bk{i}") for i in range(200)])
+    yield tmp_path
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM posts WHERE id LIKE 't3_bk%'")
+    db.rebuild_search_index()
+
+
+def test_backup_is_consistent_while_writers_commit(live_store):
+    stop = threading.Event()
+    written = []
+
+    def _writer():
+        while not stop.is_set():
+            save_posts_bulk([_post(f"t3_bkw{len(written)}")])
+            written.append(1)
+
+    thread = threading.Thread(target=_writer)
+    thread.start()
+    try:
+        manifest = backup.create_backup(str(live_store / "backups"), pages=1, pause=0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    copy = os.path.join(manifest['path'], "radar.db")
+    conn = sqlite3.connect(copy)
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == manifest['rows']['posts']
+    conn.close()
+    assert manifest['rows']['posts'] >= 200 and written
+    assert manifest['vectors'] == {"radar_posts": 5}
+    assert backup.latest_backup(str(live_store / "backups")) == manifest['path']
+
+
+def test_restore_checks_row_and_vector_counts(live_store):
+    manifest = backup.create_backup(str(live_store / "backups"), keep=1)
+    target_db, target_chroma = str(live_store / "restored.db"), str(live_store / "restored_chroma")
+
+    report = backup.restore_backup(manifest['path'], db_path=target_db, chroma_path=target_chroma)
+    assert report['ok']
+    assert report['rows']['posts'] == (manifest['rows']['posts'],) * 2
+    assert report['vectors'] == {"radar_posts": (5, 5)}
+
+    with pytest.raises(FileExistsError):
+        backup.restore_backup(manifest['path'], db_path=target_db, chroma_path=target_chroma)
+
+    manifest['rows']['posts'] += 1
+    with open(os.path.join(manifest['path'], backup.MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    report = backup.restore_backup(manifest['path'], db_path=target_db, chroma_path=target_chroma, overwrite=True)
+    assert not report['ok']
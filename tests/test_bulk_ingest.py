@@ -0,0 +1,37 @@
+from radar.storage.db import save_posts_bulk, save_comments_bulk, get_comments, get_post, write_connection
+from radar.ingest.reddit_scraper import RedditScraper
+
+
+def _comment(c_id, body, replies=None):
+    data = {'name': c_id, 'body': body, 'author': 'someone', 'score': 1, 'created_utc': 1700000000}
+    if replies:
+        data['replies'] = {'data': {'children': replies}}
+    return {'kind': 't1', 'data': data}
+
+
+def test_bulk_upserts_are_idempotent(db_conn):
+    posts = [{'id': f'bulk_post_{i}', 'platform': 'reddit', 'source': 'bulk_sub', 'title': f'T{i}'} for i in range(5)]
+    assert save_posts_bulk(posts) == 5
+    posts[0]['title'] = 'Updated'
+    save_posts_bulk(posts)
+    assert get_post('bulk_post_0')['title'] == 'Updated'
+
+    comments = [{'id': f'bulk_c_{i}', 'post_id': 'bulk_post_0', 'body': 'hi', 'score': i} for i in range(10)]
+    assert save_comments_bulk(comments) == 10
+    save_comments_bulk(comments)
+    assert len(get_comments('bulk_post_0')) == 10
+
+    with write_connection() as conn:
+        conn.execute("DELETE FROM comments WHERE post_id LIKE 'bulk_post_%'")
+        conn.execute("DELETE FROM posts WHERE source = 'bulk_sub'")
+
+
+def test_parse_json_comments_flattens_thread():
+    scraper = RedditScraper()
+    children = [
+        _comment('t1_a', 'top level', replies=[_comment('t1_b', 'reply', replies=[_comment('t1_c', 'deep')])]),
+        _comment('t1_d', '   '),  # blank bodies are skipped
+        {'kind': 'more', 'data': {}},
+    ]
+    rows = scraper._parse_json_comments(children, 't3_post')
+    assert [(r['id'], r['depth']) for r in rows] == [('t1_a', 0), ('t1_b', 1), ('t1_c', 2)]
@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+import pytest
+from radar.storage.db import (
+    save_post,
+    get_post,
+    get_pool_stats,
+    read_connection,
+    write_connection,
+)
+
+
+def test_writer_connection_is_reused(db_conn):
+    before = get_pool_stats()["connections_opened"]
+    for i in range(20):
+        save_post({'id': f'pool_post_{i}', 'platform': 'reddit', 'source': 'pool_sub', 'title': f'Post {i}'})
+        assert get_post(f'pool_post_{i}')['title'] == f'Post {i}'
+
+    # At most one writer for this thread plus one reader from the pool
+    assert get_pool_stats()["connections_opened"] - before <= 2
+
+    with write_connection() as conn:
+        conn.execute("DELETE FROM posts WHERE source = 'pool_sub'")
+
+
+def test_read_pool_is_read_only(db_conn):
+    with read_connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM posts")
+
+
+def test_writer_rolls_back_on_error(db_conn):
+    with pytest.raises(RuntimeError):
+        with write_connection() as conn:
+            conn.execute("INSERT INTO user_settings (user_id, key, value) VALUES ('u', 'k', 'v')")
+            raise RuntimeError("boom")
+
+    with read_connection() as conn:
+        row = conn.execute("SELECT value FROM user_settings WHERE user_id = 'u' AND key = 'k'").fetchone()
+    assert row is None
+
+
+def test_threads_get_their_own_writer(db_conn):
+    connections = []
+
+    def worker():
+        with write_connection() as conn:
+            connections.append(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in connections}) == 3
+
+
+def test_exhausted_read_pool_raises_operational_error(db_conn):
+    from radar.storage import db
+    from radar.storage.pool import ConnectionManager
+
+    manager = ConnectionManager(lambda: db.DATABASE_PATH, read_pool_size=1, read_timeout=0.05)
+    try:
+        with manager.read_connection():
+            with pytest.raises(sqlite3.OperationalError, match="read pool exhausted"):
+                with manager.read_connection():
+                    pass
+    finally:
+        manager.close_all()
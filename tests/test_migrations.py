@@ -0,0 +1,110 @@
+import json
+import sqlite3
+from datetime import datetime
+import numpy as np
+from radar.storage.migrations import migrate, get_schema_version, pending_migrations, LATEST_VERSION
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_fresh_database_migrates_once(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    assert get_schema_version(conn) == 0
+
+    planned = migrate(conn, dry_run=True)
+    assert len(planned) == len(pending_migrations(conn))
+    assert get_schema_version(conn) == 0  # dry run changes nothing
+
+    applied = migrate(conn)
+    assert [v for v, _ in applied] == [v for v, _ in planned]
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_legacy_database_gains_missing_columns(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    # Shape of a database created before multi-tenancy
+    conn.execute("CREATE TABLE post_analysis (post_id TEXT, product_id TEXT, relevance_score REAL, signals_json TEXT, PRIMARY KEY (post_id, product_id))")
+    conn.execute("CREATE TABLE products (id TEXT PRIMARY KEY, name TEXT NOT NULL, description TEXT NOT NULL, pain_signals TEXT NOT NULL, intent_signals TEXT NOT NULL, target_subreddits TEXT NOT NULL)")
+    conn.execute("INSERT INTO post_analysis VALUES ('p1', 'prod', 3.0, '{}')")
+    conn.commit()
+
+    migrate(conn)
+
+    assert {"user_id", "triage_status", "last_processed_score"} <= _columns(conn, "post_analysis")
+    assert {"user_id", "website_url", "embedding_vector"} <= _columns(conn, "products")
+    assert conn.execute("SELECT relevance_score FROM post_analysis").fetchone()[0] == 3.0
+    conn.close()
+
+
+def test_json_product_embeddings_become_float32_blobs(tmp_path):
+    conn = sqlite3.connect(tmp_path / "vectors.db")
+    migrate(conn)
+    vector = [0.25, -1.5, 3.0]
+    conn.execute("""
+        INSERT INTO products (id, user_id, name, description, pain_signals, intent_signals, target_subreddits, embedding_vector)
+        VALUES ('prod', 'user', 'P', 'd', '[]', '[]', '[]', ?)
+    """, (json.dumps(vector),))
+    conn.execute("DELETE FROM schema_version WHERE version >= 4")
+    conn.commit()
+
+    migrate(conn)
+
+    stored = conn.execute("SELECT embedding_vector FROM products").fetchone()[0]
+    assert isinstance(stored, bytes) and len(stored) == 4 * len(vector)
+    assert np.frombuffer(stored, dtype=np.float32).tolist() == vector
+    conn.close()
+
+
+def test_signals_json_is_normalized(tmp_path):
+    conn = sqlite3.connect(tmp_path / "signals.db")
+    migrate(conn)
+    signals = json.dumps({"intents": ["seeking_tool"], "product_matches": {"a": {"pain_points": ["slow"], "intents": []}}})
+    for product in ("a", "b"):
+        conn.execute("INSERT INTO post_analysis (post_id, product_id, user_id, signals_json) VALUES ('p1', ?, 'u', ?)", (product, signals))
+    conn.execute("DELETE FROM schema_version WHERE version >= 7")
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute("SELECT post_id, intent FROM post_signals").fetchall() == [("p1", "seeking_tool")]
+    rows = conn.execute("SELECT product_id, signals_json, signals_hash, pain_matches, intent_matches FROM post_analysis ORDER BY product_id").fetchall()
+    assert rows == [("a", None, None, '["slow"]', None), ("b", None, None, None, None)]
+    assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
+    conn.close()
+
+
+def test_text_timestamps_are_backfilled_as_epochs(tmp_path):
+    conn = sqlite3.connect(tmp_path / "epochs.db")
+    migrate(conn)
+    conn.execute("""INSERT INTO posts (id, platform, source, created_at, scraped_at)
+                    VALUES ('p1', 'reddit', 's', '2024-01-01T12:00:00', '2024-01-02 00:00:00')""")
+    conn.execute("INSERT INTO posts (id, platform, source, created_at) VALUES ('p2', 'reddit', 's', 'garbage')")
+    conn.execute("INSERT INTO sync_runs (user_id, timestamp) VALUES ('u', '2024-01-02 00:00:00')")
+    conn.execute("DELETE FROM schema_version WHERE version >= 11")
+    conn.commit()
+
+    migrate(conn)
+
+    rows = conn.execute("SELECT id, created_utc, scraped_utc FROM posts ORDER BY id").fetchall()
+    assert rows[0] == ("p1", int(datetime(2024, 1, 1, 12).timestamp()), 1704153600)
+    assert rows[1][1] is None
+    assert conn.execute("SELECT started_utc FROM sync_runs").fetchone()[0] == 1704153600
+    conn.close()
+
+
+def test_legacy_analyses_without_updated_at_age_from_their_post(tmp_path):
+    conn = sqlite3.connect(tmp_path / "analysis_age.db")
+    migrate(conn)
+    conn.execute("INSERT INTO posts (id, platform, source, created_at) VALUES ('p1', 'reddit', 's', '2024-01-01T12:00:00')")
+    conn.execute("INSERT INTO post_analysis (post_id, product_id, user_id, updated_at) VALUES ('p1', 'prod', 'u', NULL)")
+    conn.execute("DELETE FROM schema_version WHERE version >= 10")
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute("SELECT updated_at FROM post_analysis").fetchone()[0] == "2024-01-01 12:00:00"
+    conn.close()
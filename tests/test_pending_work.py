@@ -0,0 +1,80 @@
+import pytest
+from radar.storage.db import (
+    save_posts_bulk,
+    update_post_stats,
+    get_unprocessed_posts,
+    iter_unprocessed_posts,
+    get_work_high_water,
+    advance_work_cursor,
+    requeue_posts,
+    explain_query_plan,
+    write_connection,
+)
+
+USER, PRODUCT = "queue_user", "queue_product"
+
+
+@pytest.fixture
+def queued_posts(db_conn):
+    posts = [{'id': f'queue_post_{i}', 'platform': 'reddit', 'source': 'queue_sub', 'title': f'Q{i}', 'score': 1, 'num_comments': 0} for i in range(3)]
+    save_posts_bulk(posts)
+    yield [p['id'] for p in posts]
+    with write_connection() as conn:
+        conn.execute("DELETE FROM pending_work WHERE post_id LIKE 'queue_post_%'")
+        conn.execute("DELETE FROM posts WHERE source = 'queue_sub'")
+        conn.execute("DELETE FROM work_cursors WHERE consumer LIKE 'queue_user|%'")
+
+
+def _pending_ids():
+    return {p['id'] for p in get_unprocessed_posts(subreddit_filter=['queue_sub'], user_id=USER, product_id=PRODUCT)}
+
+
+def test_inserts_and_stat_changes_are_queued(queued_posts):
+    # First run has no cursor and sees every unanalyzed post
+    assert _pending_ids() == set(queued_posts)
+    advance_work_cursor(USER, PRODUCT, ['queue_sub'], get_work_high_water())
+    assert _pending_ids() == set()
+
+    update_post_stats('queue_post_1', 50, 7)
+    assert _pending_ids() == {'queue_post_1'}
+
+    # Unchanged stats do not enqueue anything
+    advance_work_cursor(USER, PRODUCT, ['queue_sub'], get_work_high_water())
+    update_post_stats('queue_post_1', 50, 7)
+    assert _pending_ids() == set()
+
+
+def test_requeue_after_failure(queued_posts):
+    high_water = get_work_high_water()
+    requeue_posts(['queue_post_2'])
+    advance_work_cursor(USER, PRODUCT, ['queue_sub'], high_water)
+    assert _pending_ids() == {'queue_post_2'}
+
+
+def test_new_posts_are_queued_after_drained_rows_are_deleted(queued_posts):
+    advance_work_cursor(USER, PRODUCT, ['queue_sub'], get_work_high_water())
+    # Retention deletes consumed rows; the next sequence must still be past the cursor
+    with write_connection() as conn:
+        conn.execute("DELETE FROM pending_work WHERE post_id LIKE 'queue_post_%'")
+    save_posts_bulk([{'id': 'queue_post_9', 'platform': 'reddit', 'source': 'queue_sub', 'title': 'Q9'}])
+    requeue_posts(['queue_post_0'])
+    assert _pending_ids() == {'queue_post_9', 'queue_post_0'}
+
+
+def test_cursor_path_reads_queue_by_sequence(db_conn):
+    plan = explain_query_plan("""
+        SELECT p.* FROM pending_work w JOIN posts p ON p.id = w.post_id
+        WHERE w.seq > ? ORDER BY w.seq
+    """, (0,))
+    assert any("idx_pending_work_seq" in line for line in plan)
+    assert not any(line.startswith("SCAN p") for line in plan)
+
+
+def test_streaming_batches_cover_every_pending_post(queued_posts):
+    batches = list(iter_unprocessed_posts(subreddit_filter=['queue_sub'], user_id=USER, product_id=PRODUCT, batch_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert [p['id'] for b in batches for p in b] == sorted(queued_posts)
+    assert '_page_key' not in batches[0][0]
+
+    limited = list(iter_unprocessed_posts(subreddit_filter=['queue_sub'], force=True, limit=2, batch_size=5))
+    assert [len(b) for b in limited] == [2]
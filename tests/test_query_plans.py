@@ -0,0 +1,38 @@
+"""Guard the hot multi-tenant queries against regressing to full scans or sorts."""
+import pytest
+from radar.storage.db import (
+    explain_query_plan,
+    _threads_query,
+    _COMMENTS_SQL,
+    _SYNC_HISTORY_SQL,
+    _GENERATED_RESPONSES_SQL,
+)
+
+# /api/threads runs whatever _threads_query builds for its filters
+HOT_QUERIES = {
+    "threads": _threads_query("user_a", "product_a", 50),
+    "threads_by_intent": _threads_query("user_a", "product_a", 50, intent="complaint"),
+    "comments": (_COMMENTS_SQL, ("t3_post",)),
+    "sync_history": (_SYNC_HISTORY_SQL, ("user_a", 10)),
+    "generated_responses": (_GENERATED_RESPONSES_SQL, ("user_a", "t3_post", "product_a", 5)),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_indexes(db_conn, name):
+    query, params = HOT_QUERIES[name]
+    plan = explain_query_plan(query, params)
+
+    full_scans = [line for line in plan if line.startswith("SCAN ")]
+    temp_sorts = [line for line in plan if "USE TEMP B-TREE" in line]
+    assert not full_scans, f"{name} does a full scan: {plan}"
+    assert not temp_sorts, f"{name} sorts in a temp b-tree: {plan}"
+
+
+@pytest.mark.parametrize("intent", [None, "complaint"])
+def test_time_window_is_a_range_scan(db_conn, intent):
+    plan = explain_query_plan(*_threads_query("user_a", "product_a", 50, intent=intent,
+                                              since=1700000000, until=1800000000))
+    assert not [line for line in plan if line.startswith("SCAN ")], plan
+    plan = explain_query_plan("SELECT id FROM posts WHERE created_utc >= ? AND created_utc < ?", (1700000000, 1800000000))
+    assert any("idx_posts_created_utc (created_utc>? AND created_utc<?)" in line for line in plan), plan
@@ -0,0 +1,73 @@
+"""Retention archives expired rows before deleting them, batch by batch."""
+from datetime import datetime
+
+import pytest
+import radar.storage.db as db
+from radar.storage import retention, vectors
+from radar.storage.db import save_posts_bulk, save_comments_bulk, get_post, get_comments
+
+
+def _post(post_id, created_at):
+    return {'id': post_id, 'platform': 'reddit', 'source': 'retention_sub', 'title': 'Old', 'body': 'x' * 300,
+            'author': 'a', 'score': 1, 'num_comments': 0, 'created_at': created_at}
+
+
+@pytest.fixture
+def old_posts(db_conn, monkeypatch):
+    deleted = []
+    monkeypatch.setattr(vectors, "delete_embeddings", lambda collection, ids: deleted.extend(ids))
+    save_posts_bulk([_post(f"t3_ret{i}", "1999-01-01T00:00:00") for i in range(5)] + [_post("t3_ret_new", "2099-01-01T00:00:00")])
+    save_comments_bulk([{'id': "t1_ret", 'post_id': "t3_ret0", 'body': "reply", 'created_at': "1999-01-02T00:00:00"}])
+    yield deleted
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM comments WHERE post_id LIKE 't3_ret%'")
+        conn.execute("DELETE FROM posts WHERE id LIKE 't3_ret%'")
+    db.rebuild_search_index()
+
+
+def test_apply_retention_archives_then_deletes(old_posts, tmp_path):
+    archive = str(tmp_path / "archive.db")
+    policy = {"posts": 365}
+    now = datetime(2000, 6, 1)
+
+    assert retention.apply_retention(policy, archive_path=archive, dry_run=True, now=now) == {"posts": 5}
+    assert get_post("t3_ret0") is not None
+
+    assert retention.apply_retention(policy, batch_size=2, archive_path=archive, now=now) == {"posts": 5}
+    assert sorted(old_posts) == [f"t3_ret{i}" for i in range(5)]
+    assert get_post("t3_ret0") is None and get_comments("t3_ret0") == []
+    assert get_post("t3_ret_new") is not None
+
+    archived = retention.read_archive("posts", "t3_ret0", path=archive)
+    assert archived['body'] == 'x' * 300
+    assert retention.read_archive("comments", "t1_ret", path=archive)['body'] == "reply"
+    assert retention.apply_retention(policy, archive_path=archive, now=now) == {"posts": 0}
+
+
+def test_posts_spared_by_the_recheck_keep_their_vectors(old_posts, tmp_path, monkeypatch):
+    export = db.export_expired_rows
+
+    def export_then_reply(table, keys):
+        # A response is generated for t3_ret1 between the expiry scan and the purge
+        db.save_generated_response("ret_user", "t3_ret1", "ret_product", "empathetic", "hi", 1)
+        return export(table, keys)
+
+    monkeypatch.setattr(db, "export_expired_rows", export_then_reply)
+    try:
+        retention.apply_retention({"posts": 365}, archive_path=str(tmp_path / "archive.db"), now=datetime(2000, 6, 1))
+        assert get_post("t3_ret1") is not None
+        assert "t3_ret1" not in old_posts and "t3_ret0" in old_posts
+    finally:
+        with db.write_connection() as conn:
+            conn.execute("DELETE FROM generated_responses WHERE user_id = 'ret_user'")
+            conn.execute("DELETE FROM posts WHERE id = 't3_ret1'")
+
+
+def test_comments_never_expire_before_their_posts(old_posts, tmp_path):
+    assert retention.effective_policy({"posts": 90, "comments": 30}) == {"posts": 90, "comments": 90}
+    assert retention.effective_policy({"posts": 0, "comments": 30}) == {"posts": 0, "comments": 0}
+
+    # t3_ret0 stays, so its comment (and comments_fetched_count) must stay too
+    results = retention.apply_retention({"comments": 30}, archive_path=str(tmp_path / "archive.db"),
+                                        now=datetime(2000, 6, 1))
+    assert results == {} and [c['id'] for c in get_comments("t3_ret0")] == ["t1_ret"]
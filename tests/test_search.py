@@ -0,0 +1,58 @@
+"""Full-text search stays in sync with the write helpers and is served by the FTS index."""
+import pytest
+import radar.storage.db as db
+from radar.storage.db import save_posts_bulk, save_comments_bulk, search_posts, explain_query_plan
+
+
+def _post(post_id, title, body, source="search_sub", created_at="2026-01-10T00:00:00"):
+    return {'id': post_id, 'platform': 'reddit', 'source': source, 'title': title, 'body': body,
+            'author': 'a', 'score': 1, 'num_comments': 0, 'created_at': created_at}
+
+
+@pytest.fixture
+def corpus(db_conn):
+    save_posts_bulk([
+        _post("t3_s1", "Scheduling posts for IG/TIKTOK", "Buffer sadly doesnt make it easy"),
+        _post("t3_s2", "Invoice software", "Looking for invoicing tools", source="other_sub"),
+        _post("t3_s3", "Old thread", "scheduling is hard", created_at="2020-01-01T00:00:00"),
+    ])
+    save_comments_bulk([
+        {'id': "t1_s1", 'post_id': "t3_s2", 'body': "Try a spreadsheet with zapier", 'author': 'b', 'score': 1},
+    ])
+    yield
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM comments WHERE id = 't1_s1'")
+        conn.execute("DELETE FROM posts WHERE id IN ('t3_s1', 't3_s2', 't3_s3')")
+    db.rebuild_search_index()
+
+
+def _ids(hits):
+    return {hit['id'] for hit in hits}
+
+
+def test_search_matches_titles_bodies_and_comments(corpus):
+    assert _ids(search_posts("tiktok")) == {"t3_s1"}
+    assert _ids(search_posts('"doesnt make it easy"')) == {"t3_s1"}
+    hits = search_posts("zapier")
+    assert _ids(hits) == {"t3_s2"} and hits[0]['matched_in'] == "comment"
+    assert search_posts("zapier", include_comments=False) == []
+    assert _ids(search_posts("invoic*")) == {"t3_s2"}
+
+
+def test_search_filters(corpus):
+    assert _ids(search_posts("scheduling")) == {"t3_s1", "t3_s3"}
+    assert _ids(search_posts("scheduling", since="2025-01-01")) == {"t3_s1"}
+    assert _ids(search_posts("scheduling", subreddit="other_sub")) == set()
+
+
+def test_resaving_replaces_indexed_text(corpus):
+    save_posts_bulk([_post("t3_s1", "Renamed", "nothing relevant here")])
+    assert search_posts("tiktok") == []
+    assert _ids(search_posts("renamed")) == {"t3_s1"}
+
+
+def test_search_query_is_indexed(db_conn):
+    sql = db._SEARCH_POSTS_SQL.format(filters="")
+    plan = explain_query_plan(sql, (db.fts_query("tiktok"), 10))
+    assert any("VIRTUAL TABLE INDEX" in line for line in plan), plan
+    assert "SEARCH p USING INTEGER PRIMARY KEY (rowid=?)" in plan, plan
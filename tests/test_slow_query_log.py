@@ -0,0 +1,68 @@
+"""The opt-in slow-query log times statements and aggregates them with their plans."""
+import pytest
+from fastapi.testclient import TestClient
+
+import radar.storage.db as db
+from radar.api.main import app, get_current_user
+from radar.storage import querylog
+from radar.storage.db import save_posts_bulk, get_post, get_comments_bulk
+
+
+@pytest.fixture
+def slow_log(db_conn, tmp_path, monkeypatch):
+    monkeypatch.setattr(querylog, "SLOW_QUERY_LOG_PATH", str(tmp_path / "slow.jsonl"))
+    monkeypatch.setattr(querylog, "SLOW_QUERY_MS", 1e-6)  # every statement counts as slow
+    querylog.clear_slow_queries()
+    db.close_all_connections()  # reopen as instrumented connections
+    yield
+    monkeypatch.setattr(querylog, "SLOW_QUERY_MS", 0)
+    db.close_all_connections()
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM posts WHERE id LIKE 't3_sq%'")
+    db.rebuild_search_index()
+
+
+def _by_sql(fragment):
+    return [q for q in querylog.top_slow_queries(limit=500) if fragment in q['sql']]
+
+
+def test_statements_are_logged_with_plans_and_param_shapes(slow_log):
+    save_posts_bulk([{'id': f"t3_sq{i}", 'platform': 'reddit', 'source': 'sq', 'title': 't', 'body': 'b'} for i in range(3)])
+    assert get_post("t3_sq1")['id'] == "t3_sq1"
+    get_comments_bulk(["t3_sq0", "t3_sq1"])
+    get_comments_bulk(["t3_sq0", "t3_sq1", "t3_sq2"])
+
+    [lookup] = _by_sql("SELECT * FROM posts WHERE id = ?")
+    assert lookup['params'] == ["(str)"]
+    assert any("USING INDEX" in line or "PRIMARY KEY" in line for line in lookup['plan']), lookup['plan']
+
+    [bulk] = _by_sql("FROM comments")
+    assert "?, ..." in bulk['sql'] and bulk['count'] == 2
+    assert sorted(bulk['params']) == ["(str, str)", "(str, str, str)"]
+    [upsert] = [q for q in querylog.top_slow_queries(limit=500) if q['sql'] == querylog.normalize_sql(db._POST_UPSERT_SQL)]
+    assert upsert['params'][0].startswith("3 x (str, ")
+
+
+def test_threshold_and_admin_endpoint(slow_log, monkeypatch):
+    monkeypatch.setattr(querylog, "SLOW_QUERY_MS", 60_000)
+    get_post("t3_sq_missing")
+    assert querylog.top_slow_queries() == []
+
+    monkeypatch.setattr(querylog, "SLOW_QUERY_MS", 1e-6)
+    get_post("t3_sq_missing")
+    monkeypatch.setattr("radar.config.ADMIN_USER_IDS", {"admin"})
+    with TestClient(app) as client:
+        app.dependency_overrides[get_current_user] = lambda: "someone"
+        assert client.get("/api/admin/slow-queries").status_code == 403
+        app.dependency_overrides[get_current_user] = lambda: "admin"
+        body = client.get("/api/admin/slow-queries", params={"limit": 5, "sort": "max"}).json()
+    app.dependency_overrides = {}
+    assert body['enabled'] and 0 < len(body['queries']) <= 5
+
+
+def test_instrumented_connections_can_read_the_search_index(slow_log):
+    # posts_fts reads its content through the radar_text() view
+    save_posts_bulk([{'id': "t3_sq_fts", 'platform': 'reddit', 'source': 'sq', 'title': 'Invoicing',
+                      'body': 'looking for a quokka friendly invoicing tool'}])
+    hits = db.search_posts("quokka")
+    assert [hit['id'] for hit in hits] == ["t3_sq_fts"] and "quokka" in hits[0]['snippet']
@@ -0,0 +1,352 @@
+"""
+Contract tests run against every storage backend.
+
+The PostgreSQL case runs when TEST_POSTGRES_URL is set (and psycopg is
+installed); it works in a throwaway schema that is dropped afterwards.
+"""
+import json
+import os
+import uuid
+import pytest
+
+BACKENDS = ["sqlite", "postgres"]
+USER, PRODUCT = "contract_user", "contract_product"
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, db_conn):
+    if request.param == "sqlite":
+        from radar.storage.db import get_backend
+        backend = get_backend()
+        assert backend.name == "sqlite"
+        yield backend
+        with backend.write_connection() as conn:
+            for table in ("comments", "post_analysis", "pending_work", "post_signals"):
+                conn.execute(f"DELETE FROM {table} WHERE post_id LIKE 'contract_%'")
+            conn.execute("DELETE FROM posts WHERE id LIKE 'contract_%'")
+            conn.execute("DELETE FROM work_cursors WHERE consumer LIKE 'contract_user|%'")
+            for table in ("generated_responses", "triage_history", "products", "user_settings", "sync_runs", "lead_index", "analysis_markers"):
+                conn.execute(f"DELETE FROM {table} WHERE user_id = 'contract_user'")
+        backend.rebuild_search_index()
+        backend.prune_blobs()
+        return
+
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    pytest.importorskip("psycopg")
+    pytest.importorskip("psycopg_pool")
+    from radar.storage.backends import create_backend
+
+    schema = f"radar_test_{uuid.uuid4().hex[:8]}"
+    backend = create_backend(url, schema=schema, max_size=4)
+    backend.init_db()
+    yield backend
+    with backend.write_connection() as conn:
+        conn.execute(f"DROP SCHEMA {schema} CASCADE")
+    backend.close_all_connections()
+
+
+def _post(i, **overrides):
+    post = {'id': f'contract_{i}', 'platform': 'reddit', 'source': 'contract_sub',
+            'title': f'Post {i}', 'body': 'body', 'score': 1, 'num_comments': 0,
+            'created_at': '2024-01-01T00:00:00'}
+    post.update(overrides)
+    return post
+
+
+def _count(backend, query):
+    with backend.read_connection() as conn:
+        row = conn.execute(query).fetchone()
+    return row['n'] if isinstance(row, dict) else row[0]
+
+
+def test_backend_implements_full_api(backend):
+    assert backend.missing_methods() == []
+    assert backend.ping() is True
+
+
+def test_bulk_upsert_last_write_wins(backend):
+    assert backend.save_posts_bulk([_post(1), _post(2), _post(1, title="Renamed")]) == 3
+    assert backend.get_post('contract_1')['title'] == "Renamed"
+
+    backend.save_comments_bulk([
+        {'id': 'contract_c1', 'post_id': 'contract_1', 'body': 'low', 'score': 1},
+        {'id': 'contract_c2', 'post_id': 'contract_1', 'body': 'high', 'score': 9},
+    ])
+    assert [c['body'] for c in backend.get_comments('contract_1')] == ['high', 'low']
+    bulk = backend.get_comments_bulk(['contract_1', 'contract_2'])
+    assert len(bulk['contract_1']) == 2 and bulk['contract_2'] == []
+
+
+def test_search_posts(backend):
+    backend.save_posts_bulk([_post(1, title="Scheduling for TikTok"), _post(2, source='contract_other')])
+    backend.save_comments_bulk([{'id': 'contract_c1', 'post_id': 'contract_2', 'body': 'try zapier', 'score': 1}])
+
+    hits = backend.search_posts("tiktok")
+    assert [h['id'] for h in hits] == ['contract_1'] and hits[0]['matched_in'] == 'post'
+    assert [h['id'] for h in backend.search_posts("zapier", subreddit='contract_other')] == ['contract_2']
+    assert backend.search_posts("zapier", subreddit='contract_sub') == []
+    assert backend.search_posts("tiktok", since='2025-01-01') == []
+
+
+def test_lead_index_follows_writes(backend):
+    backend.save_posts_bulk([_post(1), _post(2)])
+    backend.save_analysis('contract_1', PRODUCT, USER, {'relevance_score': 5.0, 'ai_analysis': '{"a": 1}'})
+    backend.save_processed_batch([
+        {'post_id': 'contract_2', 'product_id': PRODUCT, 'user_id': USER, 'relevance_score': 7.0},
+    ], [])
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT)] == ['contract_2', 'contract_1']
+
+    response_id = backend.save_generated_response(USER, 'contract_1', PRODUCT, 'empathetic', 'hi', 3)
+    backend.update_triage_status(USER, PRODUCT, 'contract_1', 'agree')
+    backend.update_post_stats('contract_1', 42, 7)
+    backend.save_posts_bulk([_post(1, title="Renamed", score=42, num_comments=7)])
+    lead = {t['id']: t for t in backend.get_lead_threads(USER, PRODUCT)}['contract_1']
+    assert (lead['res_id'], lead['triage_status'], lead['score'], lead['title']) == (response_id, 'agree', 42, "Renamed")
+    assert lead['body'] == 'body' and lead['ai_analysis'] == '{"a": 1}'
+
+    # Dropping out of the leaderboard removes the row
+    backend.save_analysis('contract_2', PRODUCT, USER, {'relevance_score': 0})
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT)] == ['contract_1']
+
+
+def test_signals_are_normalized(backend):
+    backend.save_posts_bulk([_post(1)])
+    signals = {"intents": ["complaint", "seeking_tool"],
+               "product_matches": {PRODUCT: {"pain_points": ["slow"], "intents": ["alternative"]}}}
+    backend.save_processed_batch([
+        {'post_id': 'contract_1', 'product_id': product, 'user_id': USER, 'relevance_score': 2.0, 'signals': signals}
+        for product in (PRODUCT, 'contract_product_b')
+    ], [])
+
+    # General intents once per post; each row carries only its own product's matches
+    assert _count(backend, "SELECT COUNT(*) AS n FROM post_signals WHERE post_id = 'contract_1'") == 2
+    assert json.loads(backend.get_analysis('contract_1', PRODUCT, USER)['signals_json']) == signals
+    assert json.loads(backend.get_analysis('contract_1', 'contract_product_b', USER)['signals_json']) == {
+        "intents": ["complaint", "seeking_tool"], "product_matches": {}}
+
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT, intent='complaint')] == ['contract_1']
+    assert backend.get_lead_threads(USER, PRODUCT, intent='comparison') == []
+
+
+def test_triage_snapshots_are_stored_once(backend):
+    backend.save_posts_bulk([_post(1)])
+    backend.save_analysis('contract_1', PRODUCT, USER, {'relevance_score': 2.0, 'ai_analysis': json.dumps({"summary": "y" * 500})})
+    for status in ('agree', None, 'agree'):
+        backend.update_triage_status(USER, PRODUCT, 'contract_1', status)
+    assert _count(backend, "SELECT COUNT(DISTINCT ai_analysis_hash) AS n FROM triage_history WHERE post_id = 'contract_1'") == 1
+    backend.prune_blobs()
+    assert _count(backend, """
+        SELECT COUNT(*) AS n FROM blobs
+        WHERE hash IN (SELECT ai_analysis_hash FROM triage_history WHERE post_id = 'contract_1')
+    """) == 1
+
+    history = backend.get_triage_history(USER, PRODUCT, 'contract_1')
+    assert [h['status'] for h in history] == ['agree', 'null', 'agree']
+    assert all(json.loads(h['ai_analysis_snapshot']) == {"summary": "y" * 500} for h in history)
+    assert backend.get_triage_history(USER, post_id='contract_1', limit=1)[0]['id'] == history[0]['id']
+
+
+def test_default_floor_keeps_opportunity_candidates(backend):
+    backend.save_posts_bulk([_post(1)])
+    backend.save_processed_batch([
+        {'post_id': 'contract_1', 'product_id': PRODUCT, 'user_id': USER, 'relevance_score': 1.85,
+         'semantic_similarity': 0.16, 'last_processed_score': 1, 'last_processed_comments': 0},
+    ], [{'id': 'contract_1', 'score': 1, 'num_comments': 0}])
+
+    assert backend.get_analysis('contract_1', PRODUCT, USER)['relevance_score'] == 1.85
+    assert 'contract_1' in [r['id'] for r in backend.get_report_rows(PRODUCT, "OPPORTUNITY")]
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT)] == ['contract_1']
+
+
+def test_below_floor_pairs_are_stored_as_markers(backend, monkeypatch):
+    import radar.config
+    import radar.storage.db as db
+    monkeypatch.setattr(radar.config, "ANALYSIS_STORAGE_FLOOR", 2.0)  # read at call time by Postgres
+    monkeypatch.setattr(db, "ANALYSIS_STORAGE_FLOOR", 2.0)
+    backend.save_posts_bulk([_post(1), _post(2)])
+    processed = {'last_processed_score': 1, 'last_processed_comments': 0}
+    backend.save_processed_batch([
+        dict(processed, post_id='contract_1', product_id=PRODUCT, user_id=USER, relevance_score=0.5),
+        dict(processed, post_id='contract_2', product_id=PRODUCT, user_id=USER, relevance_score=9.0),
+    ], [{'id': 'contract_1', 'score': 1, 'num_comments': 0}, {'id': 'contract_2', 'score': 1, 'num_comments': 0}])
+
+    assert backend.get_analysis('contract_1', PRODUCT, USER) is None
+    assert _count(backend, "SELECT COUNT(*) AS n FROM analysis_markers WHERE post_id = 'contract_1'") == 1
+    # A marker counts as processed until the post's metrics change
+    pending = lambda: {p['id'] for p in backend.get_unprocessed_posts(subreddit_filter=['contract_sub'], user_id=USER, product_id=PRODUCT)}
+    assert pending() == set()
+    backend.update_post_stats('contract_1', 50, 4)
+    assert pending() == {'contract_1'}
+
+    # Triaged rows are kept even when they drop below the floor
+    backend.update_triage_status(USER, PRODUCT, 'contract_2', 'agree')
+    backend.save_analysis('contract_2', PRODUCT, USER, dict(processed, relevance_score=0.5))
+    assert backend.get_analysis('contract_2', PRODUCT, USER)['relevance_score'] == 0.5
+
+    # Raising the floor compacts existing rows (except triaged ones)
+    backend.save_analysis('contract_1', PRODUCT, USER, dict(processed, relevance_score=5.0))
+    assert _count(backend, "SELECT COUNT(*) AS n FROM analysis_markers WHERE post_id = 'contract_1'") == 0
+    assert backend.compact_post_analysis(floor=6.0) >= 1
+    assert backend.get_analysis('contract_1', PRODUCT, USER) is None
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT)] == ['contract_2']
+
+
+def test_retention_purges_expired_rows(backend):
+    backend.save_posts_bulk([_post(1, title="Expired thread"), _post(2), _post(3, created_at='2030-01-01T00:00:00')])
+    backend.save_comments_bulk([{'id': 'contract_c1', 'post_id': 'contract_1', 'body': 'old reply', 'score': 1}])
+    for i in (1, 2, 3):
+        backend.save_analysis(f'contract_{i}', PRODUCT, USER, {'relevance_score': 9.0})
+    backend.update_triage_status(USER, PRODUCT, 'contract_2', 'agree')
+
+    # Triaged posts never expire; expired ones take comments, analyses and leads along
+    cutoff = 1735689600  # 2025-01-01
+    expired = [key for key in backend.find_expired_rows('posts', cutoff) if key.startswith('contract_')]
+    assert expired == ['contract_1']
+    rows = backend.export_expired_rows('posts', expired)
+    assert [r['id'] for r in rows['posts']] == ['contract_1']
+    assert [r['id'] for r in rows['comments']] == ['contract_c1']
+    assert rows['post_analysis'][0]['relevance_score'] == 9.0
+    assert backend.purge_expired_rows('posts', cutoff, expired) == ['contract_1']
+    assert backend.get_post('contract_1') is None and backend.get_comments('contract_1') == []
+    assert backend.search_posts("expired") == []
+    assert {t['id'] for t in backend.get_lead_threads(USER, PRODUCT)} == {'contract_2', 'contract_3'}
+
+    # Expired analyses leave a marker behind; triaged ones stay
+    cutoff = '2100-01-01 00:00:00'
+    expired = [key for key in backend.find_expired_rows('post_analysis', cutoff) if key[0].startswith('contract_')]
+    assert expired == [('contract_3', PRODUCT, USER)]
+    assert backend.purge_expired_rows('post_analysis', cutoff, expired) == expired
+    assert backend.get_analysis('contract_3', PRODUCT, USER) is None
+    assert _count(backend, "SELECT COUNT(*) AS n FROM analysis_markers WHERE post_id = 'contract_3'") == 1
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT)] == ['contract_2']
+
+
+def test_time_window_filters(backend):
+    backend.save_posts_bulk([_post(1, created_at='2024-01-01T00:00:00'), _post(2, created_utc=1735689600)])
+    for i in (1, 2):
+        backend.save_analysis(f'contract_{i}', PRODUCT, USER, {'relevance_score': 9.0})
+    assert backend.get_post('contract_2')['created_utc'] == 1735689600
+
+    window = dict(since='2024-06-01T00:00:00', until=1767225600)
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT, **window)] == ['contract_2']
+    assert [t['id'] for t in backend.get_lead_threads(USER, PRODUCT, until='2024-06-01')] == ['contract_1']
+    pending = backend.get_unprocessed_posts(subreddit_filter=['contract_sub'], force=True, **window)
+    assert [p['id'] for p in pending] == ['contract_2']
+
+
+def test_pending_work_queue(backend):
+    backend.save_posts_bulk([_post(1), _post(2)])
+    pending = {p['id'] for p in backend.get_unprocessed_posts(subreddit_filter=['contract_sub'], user_id=USER, product_id=PRODUCT)}
+    assert pending == {'contract_1', 'contract_2'}
+
+    backend.advance_work_cursor(USER, PRODUCT, ['contract_sub'], backend.get_work_high_water())
+    assert backend.get_unprocessed_posts(subreddit_filter=['contract_sub'], user_id=USER, product_id=PRODUCT) == []
+
+    backend.update_post_stats('contract_2', 40, 3)
+    backend.requeue_posts(['contract_1'])
+    batches = list(backend.iter_unprocessed_posts(subreddit_filter=['contract_sub'], user_id=USER, product_id=PRODUCT, batch_size=1))
+    assert [[p['id'] for p in b] for b in batches] == [['contract_2'], ['contract_1']]
+
+
+def test_cursor_skips_nothing_committed_out_of_order(backend):
+    if backend.name != "postgres":
+        pytest.skip("SQLite commits one writer at a time, in sequence order")
+    backend.save_posts_bulk([_post(1), _post(2)])
+    backend.advance_work_cursor(USER, PRODUCT, ['contract_sub'], backend.get_work_high_water())
+
+    with backend.write_connection() as slow:
+        # Takes the lower seq, but commits after the run below has read its high water
+        slow.execute("UPDATE posts SET score = 50 WHERE id = 'contract_1'")
+        backend.update_post_stats('contract_2', 60, 0)
+        high_water = backend.get_work_high_water()
+        pending = backend.get_unprocessed_posts(subreddit_filter=['contract_sub'], user_id=USER, product_id=PRODUCT)
+        assert [p['id'] for p in pending] == ['contract_2']
+    backend.advance_work_cursor(USER, PRODUCT, ['contract_sub'], high_water)
+
+    pending = backend.get_unprocessed_posts(subreddit_filter=['contract_sub'], user_id=USER, product_id=PRODUCT)
+    assert 'contract_1' in {p['id'] for p in pending}
+
+
+def test_thread_refresh_stores_only_new_comments(backend):
+    backend.save_posts_bulk([_post(1, num_comments=2)])
+    thread = [{'id': f'contract_c{n}', 'post_id': 'contract_1', 'body': f'reply {n}', 'score': n} for n in range(2)]
+    assert backend.save_thread_comments('contract_1', thread, 2) == 2
+    post = backend.get_post('contract_1')
+    assert post['comments_fetched_count'] == 2 and post['last_comment_fetch_utc'] > 0
+
+    high_water = backend.get_work_high_water()
+    thread[0] = dict(thread[0], body='edited reply')
+    thread.append({'id': 'contract_c2', 'post_id': 'contract_1', 'body': 'late answer', 'score': 2})
+    assert backend.save_thread_comments('contract_1', thread, 7) == 1
+    assert [c['body'] for c in backend.get_comments('contract_1')] == ['late answer', 'reply 1', 'reply 0']
+    assert backend.get_post('contract_1')['comments_fetched_count'] == 7
+    assert backend.get_work_high_water() > high_water  # requeued for scoring
+    assert [r['id'] for r in backend.search_posts('late answer')] == ['contract_1']
+
+
+def test_resaving_a_post_keeps_its_fetch_and_embedding_state(backend):
+    backend.save_posts_bulk([_post(1, num_comments=3)])
+    thread = [{'id': f'contract_c{n}', 'post_id': 'contract_1', 'body': f'reply {n}'} for n in range(3)]
+    backend.save_thread_comments('contract_1', thread, 3)
+    backend.save_processed_batch([], [{'id': 'contract_1', 'score': 1, 'num_comments': 3}])
+
+    backend.save_posts_bulk([_post(1, num_comments=3, title='Edited title')])
+    post = backend.get_post('contract_1')
+    assert post['title'] == 'Edited title'
+    assert post['comments_fetched_count'] == 3 and post['embedding_id'] == 'contract_1'
+    assert [r['id'] for r in backend.search_posts('edited')] == ['contract_1']
+
+
+def test_analysis_triage_and_threads(backend):
+    backend.save_posts_bulk([_post(1)])
+    base = {"relevance_score": 5.0, "semantic_similarity": 0.5, "community_score": 0.2,
+            "ai_analysis": '{"summary": "x"}', "signals_json": "{}"}
+    backend.save_analysis('contract_1', PRODUCT, USER, base)
+    # A NULL AI result keeps the previous analysis
+    backend.save_processed_batch(
+        [dict(base, post_id='contract_1', product_id=PRODUCT, user_id=USER, ai_analysis=None, relevance_score=6.0)],
+        [{'id': 'contract_1', 'score': 1, 'num_comments': 0}],
+    )
+    assert backend.get_existing_analysis('contract_1', PRODUCT, USER)['ai_analysis'] == '{"summary": "x"}'
+    assert backend.get_post('contract_1')['embedding_id'] == 'contract_1'
+
+    backend.update_triage_status(USER, PRODUCT, 'contract_1', 'agree')
+    assert backend.get_analysis('contract_1', PRODUCT, USER)['triage_status'] == 'agree'
+
+    response_id = backend.save_generated_response(USER, 'contract_1', PRODUCT, 'empathetic', 'hello', 10)
+    backend.update_response_feedback(response_id, 'up')
+    assert backend.get_generated_responses(USER, 'contract_1', PRODUCT)[0]['feedback'] == 'up'
+
+    threads = backend.get_lead_threads(USER, PRODUCT)
+    assert len(threads) == 1
+    assert threads[0]['relevance_score'] == 6.0  # post_analysis column, not the legacy posts one
+    assert threads[0]['res_id'] == response_id and threads[0]['is_stale'] == 0
+
+    assert [r['id'] for r in backend.get_report_rows(PRODUCT, "DIRECT_FIT", 5)] == ['contract_1']
+
+
+def test_products_settings_and_sync_runs(backend):
+    backend.save_product_record({
+        'id': PRODUCT, 'user_id': USER, 'name': 'Contract', 'description': 'd',
+        'pain_signals': ['slow'], 'intent_signals': [], 'target_subreddits': ['contract_sub'],
+    })
+    backend.update_product_embedding(PRODUCT, USER, [0.5, -1.0, 2.0], context="ctx")
+    assert backend.get_product_embedding(PRODUCT, USER).tolist() == [0.5, -1.0, 2.0]
+    product = backend.get_product(PRODUCT, USER)
+    assert product['embedding_context'] == "ctx" and 'embedding_vector' not in product
+    assert [p['id'] for p in backend.get_products(USER)] == [PRODUCT]
+
+    backend.save_user_setting(USER, 'limits', {'daily': 3})
+    backend.save_user_setting(USER, 'limits', {'daily': 4})
+    assert backend.get_user_setting(USER, 'limits') == {'daily': 4}
+    assert backend.get_user_setting(USER, 'missing', 'fallback') == 'fallback'
+
+    run_id = backend.add_sync_run(USER, PRODUCT, ['contract_sub'], 3)
+    backend.update_sync_run_status(run_id, 'Completed', 100)
+    history = backend.get_sync_history(USER)
+    assert history[0]['id'] == run_id and history[0]['status'] == 'Completed'
+
+    backend.delete_product(PRODUCT, USER)
+    assert backend.get_product(PRODUCT, USER) is None
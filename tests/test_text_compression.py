@@ -0,0 +1,66 @@
+"""Compressed bodies read back as text and stay searchable."""
+import random
+
+import pytest
+import zstandard
+import radar.storage.db as db
+from radar.storage import compression
+from radar.storage.db import save_posts_bulk, save_comments_bulk, get_post, get_comments, search_posts
+
+_WORDS = ("schedule posting tiktok instagram invoice spreadsheet buffer pricing freelance clients "
+          "workflow automation zapier agency looking for recommendations team budget").split()
+
+
+def _post(post_id, body):
+    return {'id': post_id, 'platform': 'reddit', 'source': 'zstd_sub', 'title': 'Compressed', 'body': body,
+            'author': 'a', 'score': 1, 'num_comments': 0, 'created_at': "2026-01-10T00:00:00"}
+
+
+def _stored(table, row_id):
+    with db.read_connection() as conn:
+        return conn.execute(f"SELECT body FROM {table} WHERE id = ?", (row_id,)).fetchone()[0]
+
+
+@pytest.fixture
+def zstd_text(db_conn, monkeypatch):
+    monkeypatch.setattr(compression, "TEXT_COMPRESSION", "zstd")
+    yield
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM comments WHERE post_id LIKE 't3_z%'")
+        conn.execute("DELETE FROM posts WHERE id LIKE 't3_z%'")
+        conn.execute("DELETE FROM text_dictionaries")
+    compression.reload_dictionaries(db.DATABASE_PATH)
+    db.rebuild_search_index()
+
+
+def test_bodies_round_trip_compressed(zstd_text):
+    body = "Buffer sadly doesnt make it easy to schedule reels. " * 10
+    save_posts_bulk([_post("t3_z1", body), _post("t3_z2", "short")])
+    save_comments_bulk([{'id': "t1_z1", 'post_id': "t3_z1", 'body': "Try zapier with a spreadsheet. " * 5, 'author': 'b'}])
+
+    assert isinstance(_stored("posts", "t3_z1"), bytes) and len(_stored("posts", "t3_z1")) < len(body)
+    assert _stored("posts", "t3_z2") == "short"
+    assert get_post("t3_z1")['body'] == body
+    assert get_comments("t3_z1")[0]['body'] == "Try zapier with a spreadsheet. " * 5
+
+    hits = search_posts("reels")
+    assert [hit['id'] for hit in hits] == ["t3_z1"]
+    assert [hit['id'] for hit in search_posts("zapier")] == ["t3_z1"]
+
+
+def test_trained_dictionary_is_used_and_recompression_is_lossless(zstd_text, monkeypatch):
+    rng = random.Random(7)
+    bodies = {f"t3_z{i}": " ".join(rng.choice(_WORDS) for _ in range(40)) for i in range(200)}
+    monkeypatch.setattr(compression, "TEXT_COMPRESSION", "none")
+    save_posts_bulk([_post(post_id, body) for post_id, body in bodies.items()])
+    monkeypatch.setattr(compression, "TEXT_COMPRESSION", "zstd")
+
+    dict_id = db.train_text_dictionary(samples=500)
+    assert dict_id is not None
+    assert db.recompress_text(batch_size=64) == len(bodies)
+    assert db.recompress_text() == 0
+
+    stored = _stored("posts", "t3_z0")
+    assert zstandard.get_frame_parameters(stored).dict_id == dict_id
+    assert all(get_post(post_id)['body'] == body for post_id, body in bodies.items())
+    assert "t3_z0" in {hit['id'] for hit in search_posts(bodies["t3_z0"].split()[0], limit=500)}
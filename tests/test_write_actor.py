@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+import pytest
+import radar.storage.db as db
+from radar.storage.writer import WriteActor
+
+
+@pytest.fixture
+def actor(tmp_path):
+    path = str(tmp_path / "actor.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE kv (k TEXT PRIMARY KEY, v INTEGER)")
+    conn.close()
+    actor = WriteActor(lambda: sqlite3.connect(path, check_same_thread=False), lambda: path, max_batch=50)
+    yield actor, path
+    actor.close()
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_writes_are_group_committed(actor):
+    actor, path = actor
+
+    def worker(n):
+        for i in range(25):
+            actor.execute(lambda conn, key=f"{n}_{i}": conn.execute("INSERT INTO kv VALUES (?, 1)", (key,)))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = actor.stats()
+    assert _count(path) == 200
+    assert stats["ops"] == 200
+    assert stats["batches"] < 200 and stats["largest_batch"] <= 50
+
+
+def test_writes_within_the_window_share_a_batch(tmp_path):
+    path = str(tmp_path / "window.db")
+    sqlite3.connect(path).execute("CREATE TABLE kv (k TEXT PRIMARY KEY, v INTEGER)").connection.close()
+    actor = WriteActor(lambda: sqlite3.connect(path, check_same_thread=False), lambda: path, window=0.5)
+    try:
+        first = actor.submit(lambda conn: conn.execute("INSERT INTO kv VALUES ('a', 1)"))
+        time.sleep(0.05)  # the writer has already picked up the first command
+        second = actor.submit(lambda conn: conn.execute("INSERT INTO kv VALUES ('b', 1)"))
+        first.result(), second.result()
+        assert (actor.stats()["batches"], actor.stats()["largest_batch"]) == (1, 2)
+    finally:
+        actor.close()
+
+
+def test_failed_command_does_not_abort_its_batch(actor):
+    actor, path = actor
+    actor.execute(lambda conn: conn.execute("INSERT INTO kv VALUES ('dup', 1)"))
+
+    futures = [
+        actor.submit(lambda conn: conn.execute("INSERT INTO kv VALUES ('a', 1)")),
+        actor.submit(lambda conn: conn.execute("INSERT INTO kv VALUES ('dup', 2)")),
+        actor.submit(lambda conn: conn.execute("INSERT INTO kv VALUES ('b', 1)")),
+    ]
+    assert isinstance(futures[1].exception(), sqlite3.IntegrityError)
+    assert futures[0].result() is not None and futures[2].result() is not None
+    assert _count(path) == 3
+    assert actor.stats()["failed_ops"] == 1
+
+
+def test_failing_savepoint_fails_callers_and_keeps_the_actor_alive(tmp_path):
+    path = str(tmp_path / "broken.db")
+    sqlite3.connect(path).execute("CREATE TABLE kv (k TEXT PRIMARY KEY, v INTEGER)")
+    broken = threading.Event()
+    broken.set()
+
+    class FlakyConnection(sqlite3.Connection):
+        def execute(self, sql, *args):
+            if broken.is_set() and sql.startswith("SAVEPOINT"):
+                raise sqlite3.OperationalError("disk I/O error")
+            return super().execute(sql, *args)
+
+    actor = WriteActor(lambda: sqlite3.connect(path, check_same_thread=False, factory=FlakyConnection), lambda: path)
+    try:
+        futures = [actor.submit(lambda conn, k=k: conn.execute("INSERT INTO kv VALUES (?, 1)", (k,))) for k in "abc"]
+        for future in futures:
+            with pytest.raises(sqlite3.OperationalError, match="disk I/O"):
+                future.result(timeout=5)
+        assert _count(path) == 0
+
+        broken.clear()
+        actor.execute(lambda conn: conn.execute("INSERT INTO kv VALUES ('d', 1)"))
+        assert _count(path) == 1
+    finally:
+        actor.close()
+
+
+def test_flush_and_commit_hooks(actor):
+    actor, path = actor
+    committed = []
+    actor.add_commit_hook(committed.append)
+
+    for i in range(10):
+        actor.submit(lambda conn, key=f"k{i}": conn.execute("INSERT INTO kv VALUES (?, 1)", (key,)))
+    actor.flush(durable=True)
+
+    assert _count(path) == 10
+    assert sum(committed) == 10
+    assert actor.stats()["checkpoints"] == 1
+
+
+def test_deferred_writes_are_awaited_on_exit(db_conn):
+    with db.deferred_writes():
+        for i in range(5):
+            assert db.save_user_setting("actor_user", f"k{i}", i) is None
+    assert [db.get_user_setting("actor_user", f"k{i}") for i in range(5)] == list(range(5))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.deferred_writes():
+            db._write(lambda conn: conn.execute("INSERT INTO user_settings (user_id, key, value) VALUES (NULL, 'k', 'v')"))
+
+    with db.write_connection() as conn:
+        conn.execute("DELETE FROM user_settings WHERE user_id = 'actor_user'")